@@ -9,6 +9,7 @@ from glob import glob
 from pkg_resources import DistributionNotFound, get_distribution
 
 from setuptools import Command, find_packages, setup
+from setuptools.command.build_py import build_py
 
 root_dir = path.dirname(__file__)
 
@@ -98,6 +99,26 @@ class UploadCommand(Command):
         sys.exit()
 
 
+class BuildPyCommand(build_py):
+    """Precompiles the builtin mutations of storyhub into the build."""
+
+    def run(self):
+        super().run()
+        sys.path.insert(0, path.abspath(root_dir))
+        try:
+            from storyhub.engine.Builtins import builtins
+            from storyscript.compiler.semantics.functions import (
+                PrecompiledMutations,
+            )
+        except ImportError as e:
+            # the builtins are parsed on their first use instead
+            self.announce(f"Not precompiling the mutations: {e}", level=3)
+            return
+        mutations = PrecompiledMutations.PrecompiledMutations
+        module = path.join(self.build_lib, *mutations.module.split("."))
+        mutations.generate(builtins, f"{module}.py")
+
+
 try:
     __version__ = get_distribution(name).version
 except DistributionNotFound:
@@ -126,5 +147,5 @@ setup(
     entry_points={"console_scripts": ["storyscript=storyscript.Cli:Cli.main"]},
     use_scm_version=True,
     setup_requires=["setuptools_scm~=3.3",],
-    cmdclass={"upload": UploadCommand,},
+    cmdclass={"build_py": BuildPyCommand, "upload": UploadCommand,},
 )
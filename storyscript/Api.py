@@ -117,14 +117,14 @@ class Api:
                 return StoryscriptCompilationResult.from_error(e)
 
     @staticmethod
-    def load_map(files, features=None):
+    def load_map(files, features=None, hub=None):
         """
         Load multiple stories from a file mapping
         """
         features = Features(features)
         try:
             compiledbundle = Bundle(
-                story_files=files, features=features
+                story_files=files, features=features, hub=hub
             ).bundle()
             return StoryscriptCompilationResult.from_result(
                 compiledbundle.results, compiledbundle.deprecations
@@ -1,9 +1,21 @@
 # -*- coding: utf-8 -*-
 import json
+import os
+import shutil
+import sys
+import tempfile
+from contextlib import contextmanager
 
 from .Bundle import Bundle
+from .CompileCache import CompileCache
+from .FormatCache import FormatCache
+from .Formatter import Formatter
+from .JsonWriter import JsonWriter
+from .PackedBundle import PackedBundle
 from .Story import Compiled, Story
+from .compiler.binary import BinaryEncoder
 from .exceptions import StoryError
+from .hub.HubSnapshot import HubSnapshot
 from .parser import Grammar
 
 
@@ -29,13 +41,60 @@ class App:
         """
         parser = Bundle.parser(ebnf=ebnf)
         story = Story.from_file(path, features=features)
-        output = story.parse(parser=parser).format()
+        story.parse(parser=parser)
         if inplace:
-            with open(path, "w") as w:
-                w.write(output)
+            App.format_inplace(story)
             return None
 
-        return output
+        return story.format()
+
+    @staticmethod
+    def format_inplace(story):
+        """
+        Streams the formatted story into a temporary file, which replaces
+        the story if it changed. The output is compared with the story
+        while it is written, s.t. unchanged stories aren't touched, e.g.
+        for watchers.
+        """
+        source = story.story
+        position = 0
+        changed = False
+
+        def write_story(f):
+            def write(text):
+                nonlocal position, changed
+                if not changed and source.startswith(text, position):
+                    position += len(text)
+                else:
+                    changed = True
+                f.write(text)
+
+            story.format(writer=write)
+            return changed or position != len(source)
+
+        Formatter.write_inplace(story.path, write_story)
+
+    @staticmethod
+    def format_paths(
+        path,
+        ignored_path=None,
+        ebnf=None,
+        features=None,
+        inplace=False,
+        workers=None,
+        cache=False,
+    ):
+        """
+        Formats the stories found in path, returning the paths of the
+        stories which weren't formatted and the errors of the stories which
+        couldn't be formatted. With `inplace`, these stories are rewritten.
+        With `cache`, stories which were formatted before are skipped.
+        """
+        format_cache = FormatCache() if cache else None
+        formatter = Formatter(ebnf=ebnf, features=features, cache=format_cache)
+        paths = Formatter.find(path, ignored_path=ignored_path)
+        unformatted = formatter.format(paths, inplace=inplace, workers=workers)
+        return unformatted, formatter.errors
 
     @staticmethod
     def compile(
@@ -45,26 +104,212 @@ class App:
         concise=False,
         first=False,
         features=None,
+        workers=None,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
     ):
         """
-        Parses and compiles stories found in path, returning JSON
+        Parses and compiles stories found in path, returning JSON, binary
+        or a packed bundle. With `cache`, only stories missing from the
+        compile cache are compiled. A profiler records the compiler phases
+        of each story.
         """
+        compile_cache = CompileCache(ebnf=ebnf) if cache else None
         bundle = Bundle.from_path(
-            path, ignored_path=ignored_path, features=features
+            path,
+            ignored_path=ignored_path,
+            features=features,
+            cache=compile_cache,
+            profiler=profiler,
+            hub=hub,
+        )
+        compiledbundle = bundle.bundle(ebnf=ebnf, workers=workers)
+        return App.results(
+            compiledbundle,
+            concise=concise,
+            first=first,
+            packed=packed,
+            compact=compact,
+            output_format=output_format,
         )
-        compiledbundle = bundle.bundle(ebnf=ebnf)
+
+    @staticmethod
+    def stream(
+        path,
+        output=None,
+        ignored_path=None,
+        ebnf=None,
+        concise=False,
+        compact=False,
+        features=None,
+        workers=None,
+        cache=False,
+        profiler=None,
+        hub=None,
+    ):
+        """
+        Parses and compiles stories found in path, writing the JSON to the
+        output file or to stdout while the stories are compiled. Nothing is
+        written if a story fails to compile. Returns the deprecations of
+        the stories.
+        """
+        compile_cache = CompileCache(ebnf=ebnf) if cache else None
+        bundle = Bundle.from_path(
+            path,
+            ignored_path=ignored_path,
+            features=features,
+            cache=compile_cache,
+            profiler=profiler,
+            hub=hub,
+        )
+        if workers is not None and workers > 1:
+            compiledbundle = bundle.bundle(ebnf=ebnf, workers=workers)
+            stories = compiledbundle.results["stories"].items()
+        else:
+            stories = bundle.stream(ebnf=ebnf)
+        with App.output(output) as f:
+            writer = JsonWriter(
+                f, indent=None if compact else 2, concise=concise
+            )
+            services = set()
+            for storypath, story in stories:
+                services.update(story["services"])
+                if concise:
+                    if not story:
+                        continue
+                    story = _clean_dict(story)
+                writer.story(storypath, story)
+            writer.end(sorted(services), bundle.find_stories())
+            if output is None:
+                f.write("\n")
+        return bundle.deprecations
+
+    @staticmethod
+    def recompile(
+        bundle,
+        changed,
+        removed,
+        ebnf=None,
+        concise=False,
+        first=False,
+        packed=False,
+        compact=False,
+        output_format="json",
+    ):
+        """
+        Compiles the changed stories of a bundle again, returning JSON,
+        binary or a packed bundle.
+        """
+        compiledbundle = bundle.recompile(changed, removed, ebnf=ebnf)
+        return App.results(
+            compiledbundle,
+            concise=concise,
+            first=first,
+            packed=packed,
+            compact=compact,
+            output_format=output_format,
+        )
+
+    @staticmethod
+    def results(
+        compiledbundle,
+        concise=False,
+        first=False,
+        packed=False,
+        compact=False,
+        output_format="json",
+    ):
+        """
+        Converts a compiled bundle to JSON, binary or to a packed bundle.
+        Compact JSON isn't indented.
+        """
         result = compiledbundle.results
         if concise:
             result = _clean_dict(result)
+        if packed:
+            if first:
+                raise StoryError.create_error("packed_option_first")
+            return Compiled(
+                results=PackedBundle.pack(result),
+                deprecations=compiledbundle.deprecations,
+            )
         if first:
             if len(result["stories"]) != 1:
                 raise StoryError.create_error("first_option_more_stories")
             result = next(iter(result["stories"].values()))
+        if output_format == "binary":
+            return Compiled(
+                results=BinaryEncoder.encode(result),
+                deprecations=compiledbundle.deprecations,
+            )
         return Compiled(
-            results=json.dumps(result, indent=2),
+            results=json.dumps(result, indent=None if compact else 2),
             deprecations=compiledbundle.deprecations,
         )
 
+    @staticmethod
+    def write(path, output):
+        """
+        Writes an output file atomically, s.t. readers never see partial
+        files. Packed bundles are written as bytes.
+        """
+        mode = "wb" if isinstance(output, bytes) else "w"
+        with App.output(path, mode) as f:
+            f.write(output)
+
+    @staticmethod
+    @contextmanager
+    def output(path, mode="w"):
+        """
+        Opens an output file, which replaces path once it has been written
+        completely. Without a path, the output is buffered in a temporary
+        file and copied to stdout once it has been written completely.
+        """
+        if path is None:
+            with tempfile.TemporaryFile(f"{mode}+") as f:
+                yield f
+                f.seek(0)
+                stdout = sys.stdout.buffer if "b" in mode else sys.stdout
+                shutil.copyfileobj(f, stdout)
+            sys.stdout.flush()
+            return
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, mode) as f:
+                yield f
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @staticmethod
+    def snapshot(path, output, ignored_path=None, catalog=None, features=None):
+        """
+        Writes a hub snapshot of the services used by the stories found in
+        path. The services are taken from a hub dump, as written by the
+        ServiceWrapper of the hub sdk, or are fetched from the hub.
+        Returns the names of the services.
+        """
+        hub = None
+        if catalog is not None:
+            from storyhub.sdk.ServiceWrapper import ServiceWrapper
+
+            entries = HubSnapshot.catalog(catalog)
+            hub = ServiceWrapper.from_json_file(catalog)
+        bundle = Bundle.from_path(
+            path, ignored_path=ignored_path, features=features, hub=hub
+        )
+        services = bundle.bundle().results["services"]
+        if catalog is None:
+            entries = HubSnapshot.fetch(services)
+        entries = HubSnapshot.select(entries, services)
+        App.write(output, HubSnapshot.dumps(entries))
+        return services
+
     @staticmethod
     def lex(path, features, ebnf=None):
         """
@@ -1,20 +1,63 @@
 # -*- coding: utf-8 -*-
 import os
-import subprocess
+from concurrent.futures import ProcessPoolExecutor
 
 from .Features import Features
+from .Gitignore import Gitignore
 from .Story import Compiled, Story
+from .exceptions.DeprecationMessage import DeprecationMessage
 from .parser import Parser
 
 
+_worker = {}
+
+
+def _init_worker(ebnf, features, hub):
+    """
+    Prepares a worker process of a parallel compilation. The parser and
+    the hub are kept for all stories compiled by the worker.
+    """
+    _worker["parser"] = Bundle.parser(ebnf)
+    _worker["features"] = Features(features)
+    _worker["hub"] = hub
+
+
+def _compile_worker(path, source):
+    """
+    Compiles a story in a worker process, returning its output and
+    deprecations or None if the compilation failed.
+    """
+    try:
+        story = Story(
+            source, features=_worker["features"], path=path, hub=_worker["hub"]
+        )
+        story.process(parser=_worker["parser"])
+    except Exception:
+        return None
+    return story.compiled.output(), story.context.deprecations()
+
+
 class Bundle:
     """
     Bundles all stories that must be compiled together.
     """
 
-    def __init__(self, story_files=None, features=None):
+    def __init__(
+        self,
+        story_files=None,
+        features=None,
+        cache=None,
+        profiler=None,
+        hub=None,
+    ):
         self.stories = {}
         self.deprecations = {}
+        self.cache = cache
+        self.profiler = profiler
+        # the hub of the stories, e.g. a HubSnapshot, or None for the sdk
+        self.hub = hub
+        # stories that must be compiled again by recompile
+        self.failed = set()
         if isinstance(features, Features):
             self.features = features
         else:
@@ -24,42 +67,21 @@ class Bundle:
         self.story_files = story_files
 
     @staticmethod
-    def gitignores():
-        """
-        Get the list of files ignored by git
-        """
-        command = [
-            "git",
-            "ls-files",
-            "--others",
-            "--ignored",
-            "--exclude-standard",
-        ]
-        try:
-            p = subprocess.run(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-                encoding="utf8",
-            )
-        except Exception:  # Graceful fallback when there's no git executable.
-            return []
-
-        if p.returncode != 0:
-            return []
-        return p.stdout.split("\n")
+    def ignores(path):
+        """
+        Returns the set of ignored paths, which are pruned when walking a
+        directory.
+        """
+        return {os.path.relpath(path)}
 
     @staticmethod
-    def ignores(path):
-        ignores = []
-        if os.path.isdir(path):
-            for root, subdirs, files in os.walk(path):
-                for file in files:
-                    if file.endswith(".story"):
-                        story = os.path.relpath(os.path.join(root, file))
-                        ignores.append(story)
-            return ignores
-        return [os.path.relpath(path)]
+    def ignored(path, is_dir, ignores, gitignore):
+        """
+        Checks whether a path is ignored by ignored_path or by git.
+        """
+        if os.path.relpath(path) in ignores:
+            return True
+        return gitignore is not None and gitignore.ignored(path, is_dir)
 
     @staticmethod
     def filter_path(root, filename, ignores):
@@ -72,27 +94,48 @@ class Bundle:
     @classmethod
     def parse_directory(cls, directory, ignored_path=None):
         """
-        Parse a directory to find stories.
+        Parse a directory to find stories. Directories ignored by git or
+        by ignored_path aren't walked.
         """
         paths = []
-        ignores = cls.gitignores()
+        gitignore = Gitignore.find(directory)
+        if gitignore is not None and gitignore.ignored_directory(directory):
+            return paths
+        ignores = set()
         if ignored_path:
-            ignores = ignores + cls.ignores(ignored_path)
+            ignores = cls.ignores(ignored_path)
         for root, subdirs, files in os.walk(directory):
+            subdirs[:] = [
+                subdir
+                for subdir in subdirs
+                if not cls.ignored(
+                    os.path.join(root, subdir), True, ignores, gitignore
+                )
+            ]
             for file in files:
                 path = cls.filter_path(root, file, ignores)
-                if path:
+                if path and not cls.ignored(path, False, (), gitignore):
                     paths.append(path)
         return paths
 
     @classmethod
-    def from_path(cls, path, ignored_path=None, features=None):
+    def from_path(
+        cls,
+        path,
+        ignored_path=None,
+        features=None,
+        cache=None,
+        profiler=None,
+        hub=None,
+    ):
         """
         Load a bundle of stories from the filesystem.
         If a directory is given. all `.story` files in the directory will be
         loaded.
         """
-        bundle = Bundle(features=features)
+        bundle = Bundle(
+            features=features, cache=cache, profiler=profiler, hub=hub
+        )
         if os.path.isdir(path):
             for story in cls.parse_directory(path, ignored_path=ignored_path):
                 bundle.load_story(story)
@@ -106,7 +149,13 @@ class Bundle:
         """
         if path not in self.story_files:
             self.story_files[path] = Story.read(path)
-        return Story(self.story_files[path], features=self.features, path=path)
+        return Story(
+            self.story_files[path],
+            features=self.features,
+            path=path,
+            profiler=self.profiler,
+            hub=self.hub,
+        )
 
     def find_stories(self):
         """
@@ -148,13 +197,98 @@ class Bundle:
             self.stories[storypath] = story.compiled.output()
             self.deprecations[storypath] = story.deprecations()
 
-    def bundle(self, ebnf=None):
+    def load_cached(self, stories):
+        """
+        Loads the compiled stories found in the cache, returning the stories
+        that still need to be compiled.
+        """
+        if self.cache is None:
+            return stories
+        misses = []
+        for storypath in stories:
+            story = self.load_story(storypath)
+            entry = self.cache.load(story)
+            if entry is None:
+                misses.append(storypath)
+                continue
+            output, deprecations = entry
+            self.stories[storypath] = output
+            self.deprecations[storypath] = [
+                DeprecationMessage(d, story) for d in deprecations
+            ]
+        return misses
+
+    def save_cached(self, stories):
+        """
+        Stores compiled stories in the cache.
+        """
+        if self.cache is None:
+            return
+        for storypath in stories:
+            deprecations = [d.error for d in self.deprecations[storypath]]
+            self.cache.save(
+                self.load_story(storypath),
+                self.stories[storypath],
+                deprecations,
+            )
+
+    def compile_parallel(self, stories, ebnf, workers):
+        """
+        Compiles the stories in a pool of worker processes.
+        A story that failed is compiled again in this process, which raises
+        the same error as a sequential compilation would.
+        """
+        loaded = [self.load_story(storypath) for storypath in stories]
+        sources = [story.story for story in loaded]
+        initargs = (ebnf, self.features.features, self.hub)
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=initargs
+        ) as executor:
+            results = executor.map(_compile_worker, stories, sources)
+            for storypath, story, result in zip(stories, loaded, results):
+                if result is None:
+                    self.compile([storypath], parser=self.parser(ebnf))
+                    continue
+                output, deprecations = result
+                self.stories[storypath] = output
+                self.deprecations[storypath] = [
+                    DeprecationMessage(d, story) for d in deprecations
+                ]
+
+    def bundle(self, ebnf=None, workers=None):
         """
-        Makes the bundle
+        Makes the bundle. With more than one worker, stories are compiled
+        in parallel processes, unless they are profiled.
         """
         entrypoint = self.find_stories()
+        stories = self.load_cached(entrypoint)
+        parallel = workers is not None and workers > 1 and len(stories) > 1
+        if parallel and self.profiler is None:
+            self.compile_parallel(stories, ebnf=ebnf, workers=workers)
+        else:
+            parser = self.parser(ebnf)
+            self.compile(stories, parser=parser)
+        self.save_cached(stories)
+        return self.compiled(entrypoint)
+
+    def stream(self, ebnf=None):
+        """
+        Compiles the stories one by one, yielding their paths and outputs.
+        The outputs aren't kept in the bundle.
+        """
         parser = self.parser(ebnf)
-        self.compile(entrypoint, parser=parser)
+        for storypath in self.find_stories():
+            if self.load_cached([storypath]):
+                self.compile([storypath], parser=parser)
+                self.save_cached([storypath])
+            yield storypath, self.stories.pop(storypath)
+
+    def compiled(self, entrypoint):
+        """
+        Returns the compiled bundle of the stories.
+        """
+        # cached stories were loaded first, restore the order of the stories
+        self.stories = {path: self.stories[path] for path in entrypoint}
         return Compiled(
             results={
                 "stories": self.stories,
@@ -164,6 +298,27 @@ class Bundle:
             deprecations=self.deprecations,
         )
 
+    def recompile(self, changed, removed, ebnf=None):
+        """
+        Compiles the changed stories again, reusing the outputs of all
+        other stories. Stories that failed before are compiled again too.
+        """
+        for storypath in removed:
+            self.story_files.pop(storypath, None)
+            self.stories.pop(storypath, None)
+            self.deprecations.pop(storypath, None)
+            self.failed.discard(storypath)
+        for storypath in changed:
+            self.story_files[storypath] = Story.read(storypath)
+        self.failed.update(changed)
+        entrypoint = self.find_stories()
+        parser = self.parser(ebnf)
+        for storypath in entrypoint:
+            if storypath in self.failed:
+                self.compile([storypath], parser=parser)
+                self.failed.discard(storypath)
+        return self.compiled(entrypoint)
+
     def bundle_trees(self, ebnf=None, lower=False):
         """
         Makes a bundle of syntax trees
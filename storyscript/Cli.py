@@ -1,16 +1,20 @@
 # -*- coding: utf-8 -*-
 import io
+import os
+import sys
 
 import click
 
 from click_aliases import ClickAliasedGroup
 
-from .App import App
 from .Features import Features
+from .Profiler import Profiler
 from .Project import Project
 from .Version import version as app_version
 from .exceptions import StoryError
 
+# The compiler is imported by the commands which use it, s.t. commands like
+# `--version`, `help` or `new` start quickly.
 
 story_features = Features.all_feature_names()
 
@@ -47,6 +51,23 @@ class Cli:
     ebnf_help = "Load the grammar from a file. Useful for development"
     preview_help = "Activate upcoming Storyscript features"
     inplace_help = "Perform operation directly on the source file."
+    jobs_help = "Number of processes used to compile stories in parallel."
+    cache_help = "Reuse compiled stories that did not change."
+    profile_help = "Write a JSON report of the compiler phases to a file."
+    cprofile_help = "Write cProfile statistics of the compiler to a file."
+    profile_memory_help = (
+        "Record the peak memory of the compiler phases in the --profile "
+        "report. Slows the phases down."
+    )
+    socket_help = "Listen on a Unix socket instead of stdin."
+    watch_help = "Process the stories again whenever they change."
+    packed_help = "Write a packed bundle with an index of the stories."
+    compact_help = "Write JSON without indentation."
+    format_help = "Format of the output file."
+    hub_snapshot_help = "Resolve services with a hub snapshot."
+    catalog_help = "Take the services from a hub dump instead of the hub."
+    check_help = "List the stories which aren't formatted and fail."
+    format_cache_help = "Skip stories which were formatted before."
 
     @click.group(invoke_without_command=True, cls=ClickAliasedGroup)
     @click.option("--version", "-v", is_flag=True, help=version_help)
@@ -84,6 +105,8 @@ class Cli:
         """
         Parses stories, producing the abstract syntax tree.
         """
+        from .App import App
+
         try:
             trees = App.parse(
                 path,
@@ -116,6 +139,13 @@ class Cli:
     @click.argument("path")
     @click.option("--debug", is_flag=True)
     @click.option("--inplace", "-i", is_flag=True, help=inplace_help)
+    @click.option("--watch", "-w", is_flag=True, help=watch_help)
+    @click.option("--check", is_flag=True, help=check_help)
+    @click.option("--jobs", type=int, default=None, help=jobs_help)
+    @click.option("--cache", is_flag=True, help=format_cache_help)
+    @click.option(
+        "--ignore", default=None, help="Specify path of ignored files"
+    )
     @click.option("--ebnf", help=ebnf_help)
     @click.option(
         "--preview",
@@ -124,11 +154,43 @@ class Cli:
         multiple=True,
         help=preview_help,
     )
-    def format(path, debug, ebnf, preview, inplace):
+    def format(
+        path, debug, ebnf, preview, inplace, watch, check, jobs, cache, ignore
+    ):
         """
-        Format a story.
+        Format a story or the stories of a directory.
         """
+        from .App import App
+
+        if watch:
+            Cli.watch_format(
+                path, ebnf=ebnf, features=preview, inplace=inplace
+            )
+            return
+        directory = os.path.isdir(path)
+        if directory and not (check or inplace):
+            raise click.UsageError(
+                "Directories can only be formatted with --inplace or --check."
+            )
         try:
+            if check or directory or (inplace and cache):
+                unformatted, errors = App.format_paths(
+                    path,
+                    ignored_path=ignore,
+                    ebnf=ebnf,
+                    features=preview,
+                    inplace=inplace and not check,
+                    workers=jobs,
+                    cache=cache,
+                )
+                for error in errors:
+                    error.echo()
+                if check:
+                    for story in unformatted:
+                        click.echo(f"{story} isn't formatted.")
+                if errors or (check and unformatted):
+                    exit(1)
+                return
             output = App.format(
                 path, ebnf=ebnf, features=preview, inplace=inplace
             )
@@ -156,6 +218,22 @@ class Cli:
     @click.option("--debug", is_flag=True)
     @click.option("--concise", "-c", is_flag=True)
     @click.option("--first", "-f", is_flag=True)
+    @click.option("--jobs", type=int, default=None, help=jobs_help)
+    @click.option("--cache", is_flag=True, help=cache_help)
+    @click.option("--profile", default=None, help=profile_help)
+    @click.option("--cprofile", default=None, help=cprofile_help)
+    @click.option("--profile-memory", is_flag=True, help=profile_memory_help)
+    @click.option("--watch", "-w", is_flag=True, help=watch_help)
+    @click.option("--packed", is_flag=True, help=packed_help)
+    @click.option("--compact", is_flag=True, help=compact_help)
+    @click.option(
+        "--format",
+        "output_format",
+        type=click.Choice(["json", "binary"]),
+        default="json",
+        help=format_help,
+    )
+    @click.option("--hub-snapshot", default=None, help=hub_snapshot_help)
     @click.option("--ebnf", help=ebnf_help)
     @click.option(
         "--ignore", default=None, help="Specify path of ignored files"
@@ -177,12 +255,70 @@ class Cli:
         ignore,
         concise,
         first,
+        jobs,
+        cache,
+        profile,
+        cprofile,
+        profile_memory,
+        watch,
+        packed,
+        compact,
+        output_format,
+        hub_snapshot,
         preview,
     ):
         """
-        Compiles stories and validates syntax
+        Compiles stories and validates syntax. JSON output is written while
+        the stories are compiled.
         """
+        from .App import App
+
+        binary = output_format == "binary"
+        if packed and not output:
+            raise click.UsageError("The option --packed requires an output.")
+        if binary and not output:
+            raise click.UsageError("Binary output requires an output file.")
+        if binary and packed:
+            raise click.UsageError("Packed bundles can only contain JSON.")
+        hub = Cli.hub_snapshot(hub_snapshot)
+        if watch:
+            Cli.watch_compile(
+                path,
+                output,
+                ignored_path=ignore,
+                ebnf=ebnf,
+                concise=concise,
+                first=first,
+                features=preview,
+                packed=packed,
+                compact=compact,
+                output_format=output_format,
+                hub=hub,
+            )
+            return
+        profiler = None
+        if profile or cprofile:
+            profiler = Profiler(
+                memory=profile_memory, cprofile=cprofile is not None
+            )
         try:
+            if json and not (silent or first or packed or binary):
+                deprecations = App.stream(
+                    path,
+                    output,
+                    ignored_path=ignore,
+                    ebnf=ebnf,
+                    concise=concise,
+                    compact=compact,
+                    features=preview,
+                    workers=jobs,
+                    cache=cache,
+                    profiler=profiler,
+                    hub=hub,
+                )
+                Cli.write_profile(profiler, profile, cprofile)
+                Cli.echo_deprecations(deprecations)
+                return
             compiledstories = App.compile(
                 path,
                 ignored_path=ignore,
@@ -190,14 +326,21 @@ class Cli:
                 concise=concise,
                 first=first,
                 features=preview,
+                workers=jobs,
+                cache=cache,
+                profiler=profiler,
+                packed=packed,
+                compact=compact,
+                output_format=output_format,
+                hub=hub,
             )
+            Cli.write_profile(profiler, profile, cprofile)
             results = compiledstories.results
+            if packed or binary:
+                App.write(output, results)
             if not silent:
-                for fn, deprecations in compiledstories.deprecations.items():
-                    if deprecations:
-                        for d in deprecations:
-                            click.echo(click.style(d.message(), fg="yellow"))
-                if json:
+                Cli.echo_deprecations(compiledstories.deprecations)
+                if json and not (packed or binary):
                     if output:
                         with io.open(output, "w") as f:
                             f.write(results)
@@ -219,6 +362,110 @@ class Cli:
                 StoryError.internal_error(e).echo()
                 exit(1)
 
+    @staticmethod
+    def hub_snapshot(path):
+        """
+        Loads the hub snapshot of the compile options, if any.
+        """
+        if path is None:
+            return None
+        from .hub.HubSnapshot import HubSnapshot, HubSnapshotError
+
+        try:
+            return HubSnapshot(path)
+        except (OSError, HubSnapshotError) as e:
+            raise click.BadParameter(str(e), param_hint="--hub-snapshot")
+
+    @staticmethod
+    def write_profile(profiler, profile, cprofile):
+        """
+        Writes the reports of a profiler.
+        """
+        if profile:
+            profiler.write(profile)
+        if cprofile:
+            profiler.dump_stats(cprofile)
+
+    @staticmethod
+    def echo_deprecations(deprecations):
+        for fn, story_deprecations in deprecations.items():
+            for d in story_deprecations:
+                click.echo(click.style(d.message(), fg="yellow"))
+
+    @staticmethod
+    def watch_format(path, ebnf, features, inplace):
+        """
+        Formats the stories found in path whenever they change.
+        """
+        from .App import App
+        from .Watcher import Watcher
+
+        def reformat(changed, removed):
+            for story in changed:
+                try:
+                    output = App.format(
+                        story, ebnf=ebnf, features=features, inplace=inplace
+                    )
+                    if not inplace:
+                        click.echo(output)
+                except StoryError as e:
+                    e.echo()
+                except Exception as e:
+                    StoryError.internal_error(e).echo()
+
+        Watcher(path).watch(reformat)
+
+    @staticmethod
+    def watch_compile(
+        path,
+        output,
+        ignored_path,
+        ebnf,
+        concise,
+        first,
+        features,
+        packed,
+        compact,
+        output_format,
+        hub,
+    ):
+        """
+        Compiles the stories found in path whenever they change.
+        Only the changed stories are compiled again and the output file is
+        replaced atomically.
+        """
+        from .App import App
+        from .Bundle import Bundle
+        from .Watcher import Watcher
+
+        bundle = Bundle(features=features, hub=hub)
+
+        def recompile(changed, removed):
+            try:
+                compiledstories = App.recompile(
+                    bundle,
+                    changed,
+                    removed,
+                    ebnf=ebnf,
+                    concise=concise,
+                    first=first,
+                    packed=packed,
+                    compact=compact,
+                    output_format=output_format,
+                )
+            except StoryError as e:
+                e.echo()
+                return
+            except Exception as e:
+                StoryError.internal_error(e).echo()
+                return
+            if output:
+                App.write(output, compiledstories.results)
+            msg = f"Compiled {len(changed)} stories."
+            click.echo(click.style(msg, fg="green"))
+
+        Watcher(path, ignored_path=ignored_path).watch(recompile)
+
     @staticmethod
     @main.command(aliases=["l"])
     @click.argument("path", default=".")
@@ -235,6 +482,8 @@ class Cli:
         """
         Shows lexer tokens for given stories
         """
+        from .App import App
+
         try:
             results = App.lex(path, ebnf=ebnf, features=preview)
             for file, tokens in results.items():
@@ -254,12 +503,40 @@ class Cli:
                 StoryError.internal_error(e).echo()
                 exit(1)
 
+    @staticmethod
+    @main.command(aliases=["s"])
+    @click.option("--socket", default=None, help=socket_help)
+    @click.option(
+        "--preview",
+        callback=preview_cb,
+        is_eager=True,
+        multiple=True,
+        help=preview_help,
+    )
+    def serve(socket, preview):
+        """
+        Serves compile, format and lex requests as JSON-RPC
+        """
+        from .Server import Server
+
+        server = Server(features=preview)
+        server.warm()
+        if socket:
+            try:
+                server.serve_socket(socket)
+            except FileExistsError as e:
+                raise click.BadParameter(str(e), param_hint="--socket")
+        else:
+            server.serve(sys.stdin, sys.stdout)
+
     @staticmethod
     @main.command(aliases=["g"])
     def grammar():
         """
         Prints the grammar specification
         """
+        from .App import App
+
         click.echo(App.grammar())
 
     @staticmethod
@@ -271,6 +548,60 @@ class Cli:
         """
         Project.new(name)
 
+    @main.group(cls=ClickAliasedGroup)
+    def hub():  # noqa N805
+        """
+        Manages the services of the hub
+        """
+
+    @staticmethod
+    @hub.command(aliases=["s"])
+    @click.argument("path", default=".")
+    @click.argument("output", default="hub.snapshot")
+    @click.option("--catalog", default=None, help=catalog_help)
+    @click.option("--debug", is_flag=True)
+    @click.option(
+        "--ignore", default=None, help="Specify path of ignored files"
+    )
+    @click.option(
+        "--preview",
+        callback=preview_cb,
+        is_eager=True,
+        multiple=True,
+        help=preview_help,
+    )
+    def snapshot(path, output, catalog, debug, ignore, preview):
+        """
+        Writes the services used by the stories to a hub snapshot
+        """
+        from .App import App
+        from .hub.HubSnapshot import HubSnapshotError
+
+        try:
+            services = App.snapshot(
+                path,
+                output,
+                ignored_path=ignore,
+                catalog=catalog,
+                features=preview,
+            )
+            msg = f"Wrote {len(services)} services to {output}."
+            click.echo(click.style(msg, fg="green"))
+        except HubSnapshotError as e:
+            raise click.BadParameter(str(e), param_hint="--catalog")
+        except StoryError as e:
+            if debug:
+                raise e.error
+            else:
+                e.echo()
+                exit(1)
+        except Exception as e:
+            if debug:
+                raise e
+            else:
+                StoryError.internal_error(e).echo()
+                exit(1)
+
     @staticmethod
     @main.command(aliases=["h"])
     @click.pass_context
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import os
+
+from .Version import version
+from .compiler.semantics.functions.PrecompiledMutations import (
+    PrecompiledMutations,
+)
+from .exceptions.Deprecation import Deprecation
+from .hub.Hub import service_fingerprint
+from .parser.Grammar import Grammar
+
+
+class CompileCache:
+    """
+    Persistent cache of compiled stories, addressed by the content of the
+    story, the compiler features, the compiler version, the grammar and
+    the builtin mutations.
+    The hub data of the services used by a story is verified on each hit.
+    Entries are stored as JSON, s.t. loading a cache file never runs code.
+    """
+
+    default_directory = ".storyscript-cache"
+
+    def __init__(self, directory=None, ebnf=None):
+        if directory is None:
+            directory = self.default_directory
+        self.directory = directory
+        self.ebnf = ebnf
+        self._compiler = None
+
+    def grammar(self):
+        """
+        Returns the grammar the stories are parsed with.
+        """
+        if self.ebnf:
+            with open(self.ebnf, "r") as f:
+                return f.read()
+        return Grammar().build()
+
+    def compiler(self):
+        """
+        Returns the fingerprint of the grammar and the builtin mutations,
+        which is computed once per cache.
+        """
+        if self._compiler is None:
+            from storyhub.engine.Builtins import builtins
+
+            sha = hashlib.sha256()
+            sha.update(self.grammar().encode("utf-8"))
+            sha.update(b"\0")
+            sha.update(PrecompiledMutations.fingerprint(builtins).encode())
+            self._compiler = sha.hexdigest()
+        return self._compiler
+
+    def key(self, story):
+        """
+        Computes the cache key of a story.
+        """
+        sha = hashlib.sha256()
+        parts = (
+            version,
+            self.compiler(),
+            str(story.context.features),
+            story.story,
+        )
+        for part in parts:
+            sha.update(part.encode("utf-8"))
+            sha.update(b"\0")
+        return sha.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def load(self, story):
+        """
+        Returns the cached output and deprecations of a story, or None if
+        the story must be compiled.
+        """
+        try:
+            with open(self.path(self.key(story)), "r") as f:
+                entry = json.load(f)
+            deprecations = [
+                self.load_deprecation(d) for d in entry["deprecations"]
+            ]
+        except Exception:  # Missing, unreadable or outdated cache file.
+            return None
+        hub = story.context.hub
+        for service, fingerprint in entry["services"].items():
+            if service_fingerprint(hub, service) != fingerprint:
+                return None
+        return entry["output"], deprecations
+
+    @staticmethod
+    def dump_deprecation(deprecation):
+        """
+        Converts a deprecation into a JSON object of its name, format
+        arguments and position.
+        """
+        data = {
+            "name": deprecation.deprecation,
+            "format_args": dict(deprecation.format_args),
+        }
+        for position in ("line", "column", "end_column"):
+            if hasattr(deprecation, position):
+                data[position] = getattr(deprecation, position)
+        return data
+
+    @staticmethod
+    def load_deprecation(data):
+        """
+        Restores a deprecation from its JSON object.
+        """
+        deprecation = Deprecation(
+            data["name"], format_args=data["format_args"]
+        )
+        for position in ("line", "column", "end_column"):
+            if position in data:
+                setattr(deprecation, position, data[position])
+        return deprecation
+
+    def save(self, story, output, deprecations):
+        """
+        Stores the output and deprecations of a compiled story.
+        """
+        hub = story.context.hub
+        services = {}
+        for service in output["services"]:
+            services[service] = service_fingerprint(hub, service)
+            if services[service] is None:
+                return
+        entry = {
+            "output": output,
+            "deprecations": [self.dump_deprecation(d) for d in deprecations],
+            "services": services,
+        }
+        try:
+            data = json.dumps(entry)
+        except (TypeError, ValueError):  # Not representable as JSON.
+            return
+        path = self.path(self.key(story))
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "w") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:  # Graceful fallback for read-only cache directories.
+            if os.path.exists(tmp):
+                os.remove(tmp)
@@ -361,6 +361,10 @@ class ErrorCodes:
         "E0161",
         "Effectless expressions without assignment not allowed.",
     )
+    packed_option_first = (
+        "E0162",
+        "The option `--packed` can't be combined with `--first`/`-f`.",
+    )
 
     @staticmethod
     def is_error(error_name):
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+
+from .CompileCache import CompileCache
+from .Version import version
+
+
+class FormatCache:
+    """
+    Records the digests of stories which are formatted, s.t. they aren't
+    parsed again. Digests depend on the compiler features and version.
+    """
+
+    default_path = os.path.join(CompileCache.default_directory, "formatted")
+
+    def __init__(self, path=None):
+        if path is None:
+            path = self.default_path
+        self.path = path
+        self.digests = self.read()
+        self.changed = False
+
+    @staticmethod
+    def key(source, features):
+        """
+        Computes the digest of a story.
+        """
+        sha = hashlib.sha256()
+        for part in (version, str(features), source):
+            sha.update(part.encode("utf-8"))
+            sha.update(b"\0")
+        return sha.hexdigest()
+
+    def read(self):
+        try:
+            with open(self.path, "r") as f:
+                return set(f.read().split())
+        except OSError:  # Missing or unreadable cache file.
+            return set()
+
+    def formatted(self, source, features):
+        return self.key(source, features) in self.digests
+
+    def add(self, source, features):
+        """
+        Records a story as formatted.
+        """
+        key = self.key(source, features)
+        if key not in self.digests:
+            self.digests.add(key)
+            self.changed = True
+
+    def save(self):
+        """
+        Writes the digests if stories were recorded.
+        """
+        if not self.changed:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp, "w") as f:
+                f.write("\n".join(sorted(self.digests)))
+            os.replace(tmp, self.path)
+            self.changed = False
+        except OSError:  # Graceful fallback for read-only cache directories.
+            if os.path.exists(tmp):
+                os.remove(tmp)
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+
+from .Bundle import Bundle
+from .Features import Features
+from .Story import Story
+from .exceptions import StoryError
+
+
+_worker = {}
+
+
+def _init_worker(ebnf, features):
+    """
+    Prepares a worker process of a parallel formatting.
+    """
+    _worker["parser"] = Bundle.parser(ebnf)
+    _worker["features"] = Features(features)
+
+
+def _format_worker(path, source):
+    """
+    Formats a story in a worker process, returning the formatted story or
+    None if the story couldn't be formatted.
+    """
+    try:
+        return Formatter.format_source(
+            path, source, _worker["parser"], _worker["features"]
+        )
+    except Exception:
+        return None
+
+
+class Formatter:
+    """
+    Formats the stories found in a path, sequentially or in a pool of
+    worker processes. Stories which the format cache records as formatted
+    aren't parsed again. The errors of stories which can't be formatted
+    are collected in `errors`, s.t. the other stories are still formatted.
+    """
+
+    def __init__(self, ebnf=None, features=None, cache=None):
+        self.ebnf = ebnf
+        self.features = Features(features)
+        self.cache = cache
+        self.errors = []
+
+    @staticmethod
+    def find(path, ignored_path=None):
+        """
+        Finds the stories of a directory or returns a story path as is.
+        """
+        if os.path.isdir(path):
+            return Bundle.parse_directory(path, ignored_path=ignored_path)
+        return [path]
+
+    @staticmethod
+    def format_source(path, source, parser, features):
+        story = Story(source, features, path=path)
+        return story.parse(parser=parser).format()
+
+    @staticmethod
+    def write_inplace(path, write):
+        """
+        Writes a story through a temporary file, which replaces the story
+        if `write(file)` returns True, s.t. an interrupted write never
+        truncates the story.
+        """
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, "w") as f:
+                changed = write(f)
+            if changed:
+                shutil.copymode(path, tmp)
+                os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @staticmethod
+    def writer(output):
+        """
+        Returns a `write_inplace` writer which always writes output.
+        """
+
+        def write(f):
+            f.write(output)
+            return True
+
+        return write
+
+    def format_stories(self, paths, sources):
+        """
+        Formats stories in this process. The output of a story which can't
+        be formatted is None and its error is collected.
+        """
+        parser = Bundle.parser(self.ebnf)
+        outputs = []
+        for path in paths:
+            try:
+                output = self.format_source(
+                    path, sources[path], parser, self.features
+                )
+            except StoryError as e:
+                self.errors.append(e)
+                output = None
+            outputs.append(output)
+        return outputs
+
+    def format_parallel(self, paths, sources, workers):
+        """
+        Formats stories in a pool of worker processes. A story that failed
+        is formatted again in this process, which collects its error.
+        """
+        initargs = (self.ebnf, self.features.features)
+        outputs = []
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=initargs
+        ) as executor:
+            sources_list = [sources[path] for path in paths]
+            results = executor.map(_format_worker, paths, sources_list)
+            for path, output in zip(paths, results):
+                if output is None:
+                    output = self.format_stories([path], sources)[0]
+                outputs.append(output)
+        return outputs
+
+    def format(self, paths, inplace=False, workers=None):
+        """
+        Formats stories, returning the paths of the stories which weren't
+        formatted. With `inplace`, these stories are rewritten. Stories
+        which can't be formatted aren't returned, but their errors are
+        collected.
+        """
+        sources = {path: Story.read(path) for path in paths}
+        if self.cache is not None:
+            paths = [
+                path
+                for path in paths
+                if not self.cache.formatted(sources[path], self.features)
+            ]
+        if workers is not None and workers > 1 and len(paths) > 1:
+            outputs = self.format_parallel(paths, sources, workers)
+        else:
+            outputs = self.format_stories(paths, sources)
+        unformatted = []
+        for path, output in zip(paths, outputs):
+            if output is None:
+                continue
+            if output != sources[path]:
+                unformatted.append(path)
+                if not inplace:
+                    continue
+                self.write_inplace(path, self.writer(output))
+            if self.cache is not None:
+                self.cache.add(output, self.features)
+        if self.cache is not None:
+            self.cache.save()
+        return unformatted
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+
+
+class Gitignore:
+    """
+    Matches paths against the ignore rules of a git repository, i.e.
+    `.git/info/exclude` and the `.gitignore` files of its directories.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        # maps directories to the rules of their .gitignore
+        self.rules = {}
+
+    @classmethod
+    def find(cls, path):
+        """
+        Returns the rules of the repository containing path or None if
+        path is not in a git repository.
+        """
+        directory = os.path.abspath(path)
+        while True:
+            if os.path.exists(os.path.join(directory, ".git")):
+                return cls(directory)
+            parent = os.path.dirname(directory)
+            if parent == directory:
+                return None
+            directory = parent
+
+    @staticmethod
+    def translate(pattern):
+        """
+        Translates a gitignore glob into a regular expression.
+        """
+        regex = ""
+        i = 0
+        while i < len(pattern):
+            char = pattern[i]
+            if pattern.startswith("**/", i):
+                regex += "(?:.*/)?"
+                i += 3
+                continue
+            if pattern.startswith("**", i):
+                regex += ".*"
+                i += 2
+                continue
+            if char == "*":
+                regex += "[^/]*"
+            elif char == "?":
+                regex += "[^/]"
+            elif char == "[":
+                end = pattern.find("]", i + 2)
+                if end == -1:
+                    regex += re.escape(char)
+                else:
+                    group = pattern[i + 1 : end].replace("\\", "\\\\")
+                    if group.startswith("!"):
+                        group = "^" + group[1:]
+                    regex += f"[{group}]"
+                    i = end
+            elif char == "\\" and i + 1 < len(pattern):
+                i += 1
+                regex += re.escape(pattern[i])
+            else:
+                regex += re.escape(char)
+            i += 1
+        return regex
+
+    @classmethod
+    def parse(cls, lines):
+        """
+        Parses the lines of a .gitignore file into a list of
+        `(regex, negated, directories_only)` rules.
+        """
+        rules = []
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line.endswith("\\ "):
+                line = line.rstrip(" ")
+            if not line or line.startswith("#"):
+                continue
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            directories_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            if "/" in line:
+                # patterns with a slash are relative to the .gitignore
+                regex = cls.translate(line.lstrip("/"))
+            else:
+                regex = "(?:.*/)?" + cls.translate(line)
+            rules.append(
+                (re.compile(f"{regex}\\Z", re.S), negated, directories_only)
+            )
+        return rules
+
+    @classmethod
+    def read(cls, path):
+        """
+        Reads the rules of an ignore file.
+        """
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                return cls.parse(f)
+        except OSError:  # Missing or unreadable ignore files.
+            return []
+
+    def directory_rules(self, directory):
+        """
+        Returns the rules of a directory's .gitignore, which are cached.
+        """
+        rules = self.rules.get(directory)
+        if rules is None:
+            rules = self.read(os.path.join(directory, ".gitignore"))
+            if directory == self.root:
+                exclude = os.path.join(self.root, ".git", "info", "exclude")
+                rules = self.read(exclude) + rules
+            self.rules[directory] = rules
+        return rules
+
+    def ignored(self, path, is_dir):
+        """
+        Checks whether a path is ignored. The rules of deeper directories
+        take precedence and the last matching rule wins. Directories of
+        the path aren't checked, as ignored directories are pruned when
+        walking a directory.
+        """
+        path = os.path.abspath(path)
+        if os.path.basename(path) == ".git":
+            return True
+        relative = os.path.relpath(path, self.root)
+        if relative.startswith(os.pardir):
+            return False
+        parts = relative.split(os.sep)
+        directory = self.root
+        ignored = False
+        for i in range(len(parts)):
+            name = "/".join(parts[i:])
+            for regex, negated, directories_only in self.directory_rules(
+                directory
+            ):
+                if directories_only and not is_dir:
+                    continue
+                if regex.match(name):
+                    ignored = not negated
+            directory = os.path.join(directory, parts[i])
+        return ignored
+
+    def ignored_directory(self, path):
+        """
+        Checks whether a directory or any of its parents is ignored.
+        """
+        path = os.path.abspath(path)
+        while path != self.root and path.startswith(self.root):
+            if self.ignored(path, is_dir=True):
+                return True
+            path = os.path.dirname(path)
+        return False
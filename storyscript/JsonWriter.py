@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import json
+
+
+class JsonWriter:
+    """
+    Writes a compiled bundle to a stream story by story, s.t. only the
+    output of a single story needs to be kept in memory. The result is the
+    same as `json.dumps(results, indent=indent)`. With `concise`, the
+    bundle doesn't contain empty stories, services or entrypoints.
+    """
+
+    def __init__(self, stream, indent=2, concise=False):
+        self.stream = stream
+        self.indent = indent
+        self.concise = concise
+        self.keys = 0
+        self.stories = 0
+        if indent is None:
+            self.separator = ", "
+        else:
+            self.separator = ","
+
+    def newline(self, level):
+        if self.indent is None:
+            return ""
+        return "\n" + " " * (self.indent * level)
+
+    def dumps(self, value, level):
+        """
+        Serializes a value nested at the given level.
+        """
+        text = json.dumps(value, indent=self.indent)
+        if self.indent is None:
+            return text
+        # newlines in strings are escaped, all newlines are indentation
+        return text.replace("\n", self.newline(level))
+
+    def key(self, name):
+        """
+        Writes the key of the bundle object.
+        """
+        if self.keys == 0:
+            self.stream.write("{")
+        else:
+            self.stream.write(self.separator)
+        self.stream.write(f"{self.newline(1)}{json.dumps(name)}: ")
+        self.keys += 1
+
+    def story(self, path, output):
+        """
+        Writes the output of a story.
+        """
+        if self.stories == 0:
+            self.key("stories")
+            self.stream.write("{")
+        else:
+            self.stream.write(self.separator)
+        self.stream.write(
+            f"{self.newline(2)}{json.dumps(path)}: {self.dumps(output, 2)}"
+        )
+        self.stories += 1
+
+    def end(self, services, entrypoint):
+        """
+        Writes the services and the entrypoint, closing the bundle.
+        """
+        if self.stories:
+            self.stream.write(f"{self.newline(1)}}}")
+        elif not self.concise:
+            self.key("stories")
+            self.stream.write("{}")
+        for name, value in (
+            ("services", services),
+            ("entrypoint", entrypoint),
+        ):
+            if self.concise and not value:
+                continue
+            self.key(name)
+            self.stream.write(self.dumps(value, 1))
+        if self.keys:
+            self.stream.write(f"{self.newline(0)}}}")
+        else:
+            self.stream.write("{}")
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import json
+import mmap
+
+
+class PackedBundle:
+    """
+    Reads and writes packed bundles. The first line of a packed bundle is a
+    JSON manifest with the entrypoint, the services and the hash, offset and
+    length of each story. It is followed by the compiled stories, s.t. a
+    story can be loaded without deserializing the other stories.
+    """
+
+    format_version = 1
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.manifest = json.loads(self.file.readline())
+            if not isinstance(self.manifest, dict) or (
+                self.manifest.get("version") != self.format_version
+            ):
+                raise ValueError(f"{path} is not a packed bundle.")
+            # offsets of the stories are relative to the end of the manifest
+            self.start = self.file.tell()
+            self.data = mmap.mmap(
+                self.file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except Exception:
+            self.file.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def digest(payload):
+        return hashlib.sha256(payload).hexdigest()
+
+    @classmethod
+    def pack(cls, results):
+        """
+        Packs the results of a compiled bundle.
+        """
+        payloads = []
+        stories = {}
+        offset = 0
+        for path, story in results["stories"].items():
+            payload = json.dumps(story, separators=(",", ":")).encode("utf-8")
+            stories[path] = {
+                "hash": cls.digest(payload),
+                "offset": offset,
+                "length": len(payload),
+            }
+            payloads.append(payload)
+            offset += len(payload)
+        manifest = {
+            "version": cls.format_version,
+            "entrypoint": results.get("entrypoint", []),
+            "services": results.get("services", []),
+            "stories": stories,
+        }
+        header = json.dumps(manifest, separators=(",", ":")).encode("utf-8")
+        return b"".join([header, b"\n", *payloads])
+
+    def entrypoint(self):
+        return self.manifest["entrypoint"]
+
+    def services(self):
+        return self.manifest["services"]
+
+    def payload(self, path):
+        """
+        Returns the serialized output of a story.
+        """
+        entry = self.manifest["stories"][path]
+        start = self.start + entry["offset"]
+        return self.data[start : start + entry["length"]]
+
+    def story(self, path, verify=False):
+        """
+        Loads the output of a story. With `verify`, the hash of the story
+        is checked first.
+        """
+        payload = self.payload(path)
+        if verify:
+            if self.digest(payload) != self.manifest["stories"][path]["hash"]:
+                raise ValueError(f"The story {path} is corrupted.")
+        return json.loads(payload)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+
+class Profiler:
+    """
+    Records the wall time and number of calls of the compiler phases of
+    each story. Optionally, the peak memory allocations of the phases are
+    traced and all phases are profiled with cProfile too. Both slow the
+    phases down, so their wall times are only comparable to runs with the
+    same options.
+    """
+
+    def __init__(self, memory=False, cprofile=False):
+        self.memory = memory
+        self.stories = {}
+        self.profile = cProfile.Profile() if cprofile else None
+
+    @contextmanager
+    def phase(self, story, name):
+        """
+        Measures a phase of a story. Phases must not be nested. Memory
+        tracing is started before and stopped after the timed region.
+        """
+        stats = self.stories.setdefault(story, {}).setdefault(
+            name, {"time": 0.0, "calls": 0, "peak_memory": 0}
+        )
+        trace = self.memory and not tracemalloc.is_tracing()
+        if trace:
+            tracemalloc.start()
+        if self.profile is not None:
+            self.profile.enable()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats["time"] += time.perf_counter() - start
+            stats["calls"] += 1
+            if self.profile is not None:
+                self.profile.disable()
+            if trace:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                stats["peak_memory"] = max(stats["peak_memory"], peak)
+
+    def report(self):
+        """
+        Returns the measurements per story and their totals per phase.
+        """
+        phases = {}
+        for story in self.stories.values():
+            for name, stats in story.items():
+                total = phases.setdefault(
+                    name, {"time": 0.0, "calls": 0, "peak_memory": 0}
+                )
+                total["time"] += stats["time"]
+                total["calls"] += stats["calls"]
+                total["peak_memory"] = max(
+                    total["peak_memory"], stats["peak_memory"]
+                )
+        return {"stories": self.stories, "phases": phases}
+
+    def write(self, path):
+        """
+        Writes the report as JSON.
+        """
+        with open(path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+
+    def dump_stats(self, path):
+        """
+        Writes the cProfile statistics, which can be read with pstats.
+        """
+        self.profile.dump_stats(path)
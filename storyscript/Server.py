@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+import inspect
+import io
+import json
+import os
+import socketserver
+import stat
+import threading
+
+from .Api import Api
+from .Features import Features
+from .Story import Story, _parser
+from .compiler.semantics.functions.MutationTable import MutationTable
+from .exceptions import StoryError
+from .hub.Hub import story_hub
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Serves the requests of a single socket connection.
+    """
+
+    def handle(self):
+        instream = io.TextIOWrapper(self.rfile, encoding="utf-8")
+        outstream = io.TextIOWrapper(
+            self.wfile, encoding="utf-8", write_through=True
+        )
+        self.server.rpc.serve(instream, outstream)
+
+
+class Server:
+    """
+    Serves compile, format and lex requests as JSON-RPC 2.0, with one
+    request or response per line. The parser, the hub and the mutation
+    table are kept between requests. Connections are served in threads,
+    but requests are handled one at a time as the parser keeps state.
+    """
+
+    methods = ["compile", "compile_map", "format", "lex"]
+
+    parse_error = -32700
+    invalid_request = -32600
+    method_not_found = -32601
+    invalid_params = -32602
+    internal_error = -32603
+    story_error = -32000
+
+    def __init__(self, features=None, hub=None):
+        if features is None:
+            features = {}
+        self.features = features
+        self.hub = hub
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def warm():
+        """
+        Builds the cached parser, hub and mutation table.
+        """
+        _parser()
+        story_hub()
+        MutationTable.instance()
+
+    def story_features(self, features):
+        """
+        Merges the features of a request into the default features.
+        """
+        return {**self.features, **(features or {})}
+
+    @staticmethod
+    def message(error):
+        """
+        Converts an error or deprecation into a JSON object.
+        """
+        error.with_color = False
+        message = error.message()
+        return {"code": error.error_tuple[0], "message": message}
+
+    @classmethod
+    def compilation(cls, result, output):
+        """
+        Converts a compilation result into a JSON object.
+        """
+        deprecations = result.deprecations()
+        if isinstance(deprecations, dict):
+            deprecations = {
+                path: [cls.message(d) for d in story_deprecations]
+                for path, story_deprecations in deprecations.items()
+            }
+        else:
+            deprecations = [cls.message(d) for d in deprecations]
+        return {
+            "success": result.success(),
+            "result": output(result.result()) if result.success() else None,
+            "errors": [cls.message(e) for e in result.errors()],
+            "deprecations": deprecations,
+        }
+
+    def compile(self, source, features=None):
+        """
+        Compiles a story, like Api.loads.
+        """
+        result = Api.loads(
+            source, features=self.story_features(features), hub=self.hub
+        )
+        return self.compilation(result, lambda compiled: compiled.output())
+
+    def compile_map(self, files, features=None):
+        """
+        Compiles a bundle of stories, like Api.load_map.
+        """
+        result = Api.load_map(
+            files, features=self.story_features(features), hub=self.hub
+        )
+        return self.compilation(result, lambda compiled: compiled)
+
+    def story(self, source, features):
+        features = Features(self.story_features(features))
+        return Story(source, features, hub=self.hub)
+
+    def format(self, source, features=None):
+        """
+        Formats a story.
+        """
+        return self.story(source, features).parse(parser=None).format()
+
+    def lex(self, source, features=None):
+        """
+        Lexes a story.
+        """
+        tokens = self.story(source, features).lex(parser=None)
+        return [
+            {
+                "type": token.type,
+                "value": token.value,
+                "line": token.line,
+                "column": token.column,
+            }
+            for token in tokens
+        ]
+
+    @staticmethod
+    def response(id, result):
+        return {"jsonrpc": "2.0", "id": id, "result": result}
+
+    @staticmethod
+    def error(id, code, message, data=None):
+        error = {"code": code, "message": message}
+        if data is not None:
+            error["data"] = data
+        return {"jsonrpc": "2.0", "id": id, "error": error}
+
+    def handle(self, line):
+        """
+        Handles a request, returning the response or None for
+        notifications, which are never answered, even if they failed.
+        """
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return self.error(None, self.parse_error, "Parse error")
+        if not isinstance(request, dict):
+            return self.error(None, self.invalid_request, "Invalid Request")
+        is_notification = "id" not in request
+        response = self.dispatch(request)
+        if is_notification:
+            return None
+        return response
+
+    def dispatch(self, request):
+        """
+        Calls the method of a request, returning its response.
+        """
+        id = request.get("id")
+        method = request.get("method")
+        params = request.get("params", {})
+        if not isinstance(method, str) or not isinstance(params, dict):
+            return self.error(id, self.invalid_request, "Invalid Request")
+        if method not in self.methods:
+            return self.error(id, self.method_not_found, "Method not found")
+        handler = getattr(self, method)
+        try:
+            inspect.signature(handler).bind(**params)
+        except TypeError as e:
+            return self.error(id, self.invalid_params, str(e))
+        try:
+            result = handler(**params)
+        except StoryError as e:
+            data = self.message(e)
+            return self.error(id, self.story_error, data["message"], data)
+        except Exception as e:
+            return self.error(id, self.internal_error, str(e))
+        return self.response(id, result)
+
+    def serve(self, instream, outstream):
+        """
+        Answers the requests of a stream until it is closed.
+        """
+        for line in instream:
+            if not line.strip():
+                continue
+            with self.lock:
+                response = self.handle(line)
+            if response is not None:
+                outstream.write(json.dumps(response) + "\n")
+                outstream.flush()
+
+    def serve_socket(self, path):
+        """
+        Answers the requests of the connections to a Unix socket. A stale
+        socket at path is replaced, but any other file is kept.
+        """
+        if os.path.exists(path):
+            if not stat.S_ISSOCK(os.stat(path).st_mode):
+                raise FileExistsError(f"{path} exists and isn't a socket")
+            os.remove(path)
+        server = socketserver.ThreadingUnixStreamServer(path, RequestHandler)
+        server.daemon_threads = True
+        server.rpc = self
+        try:
+            server.serve_forever()
+        finally:
+            server.server_close()
+            os.remove(path)
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 import os
 from collections import namedtuple
+from contextlib import nullcontext
 from functools import lru_cache
 
 from bom_open import bom_open
@@ -35,10 +36,30 @@ class StoryContext:
     Represents context of a given story.
     """
 
-    def __init__(self, features, hub):
+    def __init__(self, features, hub, name="story", profiler=None):
         self.features = features
         self._deprecations = []
-        self.hub = hub
+        self._hub = hub
+        self.name = name
+        self.profiler = profiler
+
+    @property
+    def hub(self):
+        """
+        The hub of the story, which defaults to the hub of the hub sdk.
+        It is only loaded when services are resolved.
+        """
+        if self._hub is None:
+            self._hub = story_hub()
+        return self._hub
+
+    def phase(self, phase):
+        """
+        Measures a compiler phase of the story if a profiler is used.
+        """
+        if self.profiler is None:
+            return nullcontext()
+        return self.profiler.phase(self.name, phase)
 
     def deprecate(self, tree_or_token, name, **kwargs):
         if isinstance(tree_or_token, Tree):
@@ -59,17 +80,24 @@ class Story:
     """
 
     def __init__(
-        self, story, features, path=None, backend="json", scope=None, hub=None
+        self,
+        story,
+        features,
+        path=None,
+        backend="json",
+        scope=None,
+        hub=None,
+        profiler=None,
     ):
         self.story = story
         self.path = path
         self.lines = story.splitlines(keepends=False)
-        if hub is None:
-            hub = story_hub()
-        self.context = StoryContext(features=features, hub=hub)
         self.backend = backend
         self.scope = scope
         self.name = self.extract_name()
+        self.context = StoryContext(
+            features=features, hub=hub, name=self.name, profiler=profiler
+        )
 
     def extract_name(self):
         """
@@ -128,12 +156,14 @@ class Story:
         if parser is None:
             parser = self._parser()
         try:
-            self.tree = parser.parse(
-                self.story, allow_single_quotes=allow_single_quotes
-            )
+            with self.context.phase("parse"):
+                self.tree = parser.parse(
+                    self.story, allow_single_quotes=allow_single_quotes
+                )
             if lower:
                 proc = Lowering(parser, features=self.context.features)
-                self.tree = proc.process(self.tree)
+                with self.context.phase("lowering"):
+                    self.tree = proc.process(self.tree)
         except (CompilerError, StorySyntaxError) as error:
             raise self.error(error) from error
         except UnexpectedToken as error:
@@ -142,12 +172,13 @@ class Story:
             raise self.error(error) from error
         return self
 
-    def format(self):
+    def format(self, writer=None):
         """
-        Pretty prints the story.
+        Pretty prints the story. With a writer, the output is written line
+        by line instead of being returned.
         """
         try:
-            return PrettyPrinter().compile(self.tree)
+            return PrettyPrinter().compile(self.tree, writer=writer)
         except (CompilerError, StorySyntaxError) as error:
             raise self.error(error) from error
 
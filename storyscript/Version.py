@@ -1,11 +1,21 @@
 # -*- coding: utf-8 -*-
-import pkg_resources
+try:
+    from importlib import metadata
+except ImportError:  # Python 3.7 lacks importlib.metadata
+    metadata = None
 
 
 def get_version():
+    if metadata is None:
+        import pkg_resources
+
+        try:
+            return pkg_resources.get_distribution("storyscript").version
+        except pkg_resources.DistributionNotFound:
+            return "0.0.0"
     try:
-        return pkg_resources.get_distribution("storyscript").version
-    except pkg_resources.DistributionNotFound:
+        return metadata.version("storyscript")
+    except metadata.PackageNotFoundError:
         return "0.0.0"
 
 
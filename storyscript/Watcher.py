@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+from .Bundle import Bundle
+
+
+class Watcher:
+    """
+    Polls the stories of a path for changes.
+    """
+
+    def __init__(self, path, ignored_path=None, interval=0.5):
+        self.path = path
+        self.ignored_path = ignored_path
+        self.interval = interval
+        self.mtimes = {}
+
+    def stories(self):
+        """
+        Finds the stories of the path, like Bundle.from_path.
+        """
+        if os.path.isdir(self.path):
+            return Bundle.parse_directory(
+                self.path, ignored_path=self.ignored_path
+            )
+        return [self.path]
+
+    def snapshot(self):
+        """
+        Returns the modification times of the stories.
+        """
+        mtimes = {}
+        for story in self.stories():
+            try:
+                mtimes[story] = os.stat(story).st_mtime_ns
+            except OSError:  # The story was removed in the meantime.
+                pass
+        return mtimes
+
+    def poll(self):
+        """
+        Returns the stories that changed and the stories that were removed
+        since the last poll.
+        """
+        mtimes = self.snapshot()
+        changed = [
+            story
+            for story, mtime in mtimes.items()
+            if self.mtimes.get(story) != mtime
+        ]
+        removed = [story for story in self.mtimes if story not in mtimes]
+        self.mtimes = mtimes
+        return changed, removed
+
+    def watch(self, callback):
+        """
+        Calls `callback(changed, removed)` with all stories first and then
+        with the stories touched since the previous call, until interrupted.
+        """
+        try:
+            while True:
+                changed, removed = self.poll()
+                if changed or removed:
+                    callback(changed, removed)
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
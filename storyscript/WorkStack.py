@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+
+class WorkStack:
+    """
+    Runs tree walks without recursing once per level, s.t. deep trees don't
+    exceed the recursion limit. A task is a generator which yields the
+    subtasks it depends on, i.e. further generators, and receives their
+    results in turn. Errors of a subtask are raised in the task waiting for
+    it, like in a recursive walk.
+    """
+
+    @staticmethod
+    def run(task):
+        """
+        Runs a task and its subtasks, returning the result of the task.
+        """
+        stack = [task]
+        value = None
+        error = None
+        while True:
+            try:
+                if error is None:
+                    subtask = stack[-1].send(value)
+                else:
+                    subtask = stack[-1].throw(error)
+            except StopIteration as stop:
+                value = stop.value
+                error = None
+            except Exception as e:
+                value = None
+                error = e
+            else:
+                stack.append(subtask)
+                value = None
+                error = None
+                continue
+            stack.pop()
+            if not stack:
+                if error is not None:
+                    raise error
+                return value
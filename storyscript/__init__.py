@@ -1,11 +1,19 @@
 # -*- coding: utf-8 -*-
-from .Api import Api
 from .Version import version
 
 
 __version__ = version
 
 
-loads = Api.loads
-load = Api.load
-load_map = Api.load_map
+def __getattr__(name):
+    """
+    Imports the compiler on first use, s.t. the command line doesn't load
+    it for commands which don't compile.
+    """
+    if name in ("Api", "loads", "load", "load_map"):
+        from .Api import Api
+
+        if name == "Api":
+            return Api
+        return getattr(Api, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from storyscript.compiler.binary.BinaryEncoder import BinaryEncoder
 from storyscript.compiler.json.JSONCompiler import JSONCompiler
 from storyscript.compiler.lowering.Lowering import Lowering
 from storyscript.compiler.semantics.Semantics import Semantics
@@ -34,9 +35,10 @@ class Compiler:
         """
         Parses an AST and checks it.
         """
-        tree = Lowering(
-            parser=tree.parser, features=storycontext.features
-        ).process(tree)
+        with storycontext.phase("lowering"):
+            tree = Lowering(
+                parser=tree.parser, features=storycontext.features
+            ).process(tree)
         module = Semantics(
             storycontext=storycontext, root_scope=scope
         ).process(tree)
@@ -45,9 +47,13 @@ class Compiler:
     @classmethod
     def compile(cls, tree, story, backend="json", scope=None):
         tree, module = cls.generate(tree, story.context, scope=scope)
-        if backend == "json":
+        if backend in ("json", "binary"):
             compiler = JSONCompiler(story)
-            output = compiler.compile(tree)
+            with story.context.phase("json"):
+                output = compiler.compile(tree)
+            if backend == "binary":
+                with story.context.phase("binary"):
+                    output = BinaryEncoder.encode(output)
         else:
             assert backend == "semantic"
             output = tree
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+import struct
+from collections import Counter
+
+
+class BinaryEncoder:
+    """
+    Encodes the output of the JSON compiler in a compact binary format.
+    Strings, including the keys of maps, are stored once in a string table,
+    which is ordered by frequency, and referenced by their index.
+
+    The format is the magic, the string table and the encoded value. Each
+    value starts with a tag. Integers and lengths are LEB128 varints, where
+    signed integers are zigzag encoded, and floats are 64-bit doubles.
+    """
+
+    magic = b"SSB\x01"
+
+    tag_null = 0
+    tag_false = 1
+    tag_true = 2
+    tag_int = 3
+    tag_float = 4
+    tag_string = 5
+    tag_list = 6
+    tag_map = 7
+
+    float_struct = struct.Struct("<d")
+
+    @staticmethod
+    def write_varint(buffer, value):
+        while value > 0x7F:
+            buffer.append((value & 0x7F) | 0x80)
+            value >>= 7
+        buffer.append(value)
+
+    @staticmethod
+    def read_varint(data, position):
+        value = 0
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value, position
+            shift += 7
+
+    @classmethod
+    def count_strings(cls, value, counter):
+        """
+        Counts the occurrences of the strings of a value.
+        """
+        if isinstance(value, str):
+            counter[value] += 1
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if not isinstance(key, str):
+                    raise TypeError(f"Keys must be strings, not {key!r}")
+                counter[key] += 1
+                cls.count_strings(item, counter)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                cls.count_strings(item, counter)
+
+    @classmethod
+    def write_value(cls, buffer, value, strings):
+        if value is None:
+            buffer.append(cls.tag_null)
+        elif value is False:
+            buffer.append(cls.tag_false)
+        elif value is True:
+            buffer.append(cls.tag_true)
+        elif isinstance(value, int):
+            buffer.append(cls.tag_int)
+            zigzag = value << 1 if value >= 0 else (-value << 1) - 1
+            cls.write_varint(buffer, zigzag)
+        elif isinstance(value, float):
+            buffer.append(cls.tag_float)
+            buffer += cls.float_struct.pack(value)
+        elif isinstance(value, str):
+            buffer.append(cls.tag_string)
+            cls.write_varint(buffer, strings[value])
+        elif isinstance(value, (list, tuple)):
+            buffer.append(cls.tag_list)
+            cls.write_varint(buffer, len(value))
+            for item in value:
+                cls.write_value(buffer, item, strings)
+        elif isinstance(value, dict):
+            buffer.append(cls.tag_map)
+            cls.write_varint(buffer, len(value))
+            for key, item in value.items():
+                cls.write_varint(buffer, strings[key])
+                cls.write_value(buffer, item, strings)
+        else:
+            raise TypeError(f"Can't encode values of type {type(value)}")
+
+    @classmethod
+    def encode(cls, value):
+        """
+        Encodes a value made of dicts, lists, strings, numbers, booleans
+        and None.
+        """
+        counter = Counter()
+        cls.count_strings(value, counter)
+        table = [string for string, count in counter.most_common()]
+        strings = {string: index for index, string in enumerate(table)}
+        buffer = bytearray(cls.magic)
+        cls.write_varint(buffer, len(table))
+        for string in table:
+            encoded = string.encode("utf-8")
+            cls.write_varint(buffer, len(encoded))
+            buffer += encoded
+        cls.write_value(buffer, value, strings)
+        return bytes(buffer)
+
+    @classmethod
+    def read_value(cls, data, position, table):
+        tag = data[position]
+        position += 1
+        if tag == cls.tag_null:
+            return None, position
+        if tag == cls.tag_false:
+            return False, position
+        if tag == cls.tag_true:
+            return True, position
+        if tag == cls.tag_int:
+            zigzag, position = cls.read_varint(data, position)
+            return (zigzag >> 1) ^ -(zigzag & 1), position
+        if tag == cls.tag_float:
+            value = cls.float_struct.unpack_from(data, position)[0]
+            return value, position + cls.float_struct.size
+        if tag == cls.tag_string:
+            index, position = cls.read_varint(data, position)
+            return table[index], position
+        if tag == cls.tag_list:
+            length, position = cls.read_varint(data, position)
+            items = []
+            for i in range(length):
+                item, position = cls.read_value(data, position, table)
+                items.append(item)
+            return items, position
+        if tag == cls.tag_map:
+            length, position = cls.read_varint(data, position)
+            items = {}
+            for i in range(length):
+                index, position = cls.read_varint(data, position)
+                item, position = cls.read_value(data, position, table)
+                items[table[index]] = item
+            return items, position
+        raise ValueError(f"Unknown tag {tag} at {position - 1}")
+
+    @classmethod
+    def decode(cls, data):
+        """
+        Decodes a value encoded by `encode`.
+        """
+        if not data.startswith(cls.magic):
+            raise ValueError("The data isn't in the binary format.")
+        position = len(cls.magic)
+        length, position = cls.read_varint(data, position)
+        table = []
+        for i in range(length):
+            size, position = cls.read_varint(data, position)
+            table.append(data[position : position + size].decode("utf-8"))
+            position += size
+        value, position = cls.read_value(data, position, table)
+        return value
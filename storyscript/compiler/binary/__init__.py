@@ -0,0 +1,4 @@
+# -*- coding: utf-8 -*-
+from storyscript.compiler.binary.BinaryEncoder import BinaryEncoder
+
+__all__ = ["BinaryEncoder"]
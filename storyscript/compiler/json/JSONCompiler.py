@@ -2,6 +2,7 @@
 from contextlib import contextmanager
 
 from storyscript.Version import version
+from storyscript.compiler.visitors.DispatchVisitor import DispatchVisitor
 from storyscript.exceptions import StorySyntaxError
 from storyscript.exceptions import internal_assert
 from storyscript.parser import Tree
@@ -10,12 +11,34 @@ from .Lines import Lines
 from .Objects import Objects
 
 
-class JSONCompiler:
+class JSONCompiler(DispatchVisitor):
 
     """
     Compiles Storyscript abstract syntax tree to JSON.
     """
 
+    # the subtrees which are compiled directly
+    dispatch_rules = [
+        "service_block",
+        "absolute_expression",
+        "assignment",
+        "if_block",
+        "elseif_block",
+        "else_block",
+        "foreach_block",
+        "function_block",
+        "when_block",
+        "try_block",
+        "return_statement",
+        "arguments",
+        "while_block",
+        "throw_statement",
+        "break_statement",
+        "continue_statement",
+        "mutation_block",
+        "indented_chain",
+    ]
+
     def __init__(self, story):
         self.lines = Lines(story)
         self.objects = Objects()
@@ -470,30 +493,11 @@ class JSONCompiler:
         Parses a subtree, checking whether it should be compiled directly
         or keep parsing for deeper trees.
         """
-        allowed_nodes = [
-            "service_block",
-            "absolute_expression",
-            "assignment",
-            "if_block",
-            "elseif_block",
-            "else_block",
-            "foreach_block",
-            "function_block",
-            "when_block",
-            "try_block",
-            "return_statement",
-            "arguments",
-            "while_block",
-            "throw_statement",
-            "break_statement",
-            "continue_statement",
-            "mutation_block",
-            "indented_chain",
-        ]
-        if tree.data in allowed_nodes:
-            getattr(self, tree.data)(tree, parent)
-        else:
+        handler = self.handlers.get(tree.data)
+        if handler is None:
             self.parse_tree(tree, parent=parent)
+        else:
+            handler(tree, parent)
 
     def parse_tree(self, tree, parent=None):
         """
@@ -12,9 +12,12 @@ class Lines:
         self.lines = {}
         self._lines = []  # sorted line nr (by insertion)
         self.variables = []
+        # hashable parts of the variable names, i.e. their heads
+        self.variable_names = set()
         self.services = []
         self.functions = {}
-        self.output_scopes = []
+        # maps active scopes to the outputs visible in them
+        self.output_scopes = {}
         self.scopes = []
         self.previous_scope = None
         self.finished_scopes = []
@@ -53,6 +56,9 @@ class Lines:
             previous_line["name"] = name
 
         self.variables.append(name)
+        for part in name:
+            if isinstance(part, str):
+                self.variable_names.add(part)
 
     def set_next(self, line_number):
         """
@@ -75,12 +81,16 @@ class Lines:
     def set_scope(self, line, parent, output):
         """
         Keeps track of output scopes so that defined outputs are recognized for
-        nested children.
+        nested children. The outputs of the parents are resolved once.
         """
         self.scopes.append(line)
         # initially a new scope starts without a next reference
         self.previous_scope = "NO_NEXT"
-        self.output_scopes.append({line: {"parent": parent, "output": output}})
+        outputs = set(output)
+        if parent:
+            assert parent != line
+            outputs.update(self.output_scopes.get(parent, ()))
+        self.output_scopes[line] = outputs
 
     def finish_scope(self, line):
         """
@@ -89,22 +99,14 @@ class Lines:
         """
         self.previous_scope = self.scopes.pop()
         self.finished_scopes.append(self.previous_scope)
-        self.output_scopes.pop()
+        del self.output_scopes[self.previous_scope]
 
     def is_output(self, parent, service):
         """
         Checks whether a service has been defined as output for this block
         or for its parents.
         """
-        for output_scope in self.output_scopes:
-            if parent in output_scope:
-                scope = output_scope[parent]
-                if service in scope["output"]:
-                    return True
-                if scope["parent"]:
-                    assert scope["parent"] != parent
-                    return self.is_output(scope["parent"], service)
-        return False
+        return service in self.output_scopes.get(parent, ())
 
     def make(
         self,
@@ -193,10 +195,10 @@ class Lines:
         """
         Checks whether a variable has been defined so far
         """
-        for vs in self.variables:
-            if variable_name in vs:
-                return True
-        return False
+        try:
+            return variable_name in self.variable_names
+        except TypeError:  # paths are lists, which no name contains
+            return False
 
     def _as_none(self, value):
         return value if value != "None" else None
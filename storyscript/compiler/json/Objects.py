@@ -146,7 +146,7 @@ class Objects:
         if len(names) > 1:
             for name in names[1:]:
                 fragment = Tree("path_fragment", [Token("NAME", name)])
-                tree.children.append(fragment)
+                tree.append(fragment)
         return tree
 
     def string(self, tree):
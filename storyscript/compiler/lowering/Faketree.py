@@ -61,13 +61,17 @@ class FakeTree:
 
     def mark_line(self, node, line):
         """
-        Updates the line for all tokens of a given `node`.
-        """
-        for child in node.children:
-            if isinstance(child, Token):
-                child.line = line
-            else:
-                self.mark_line(child, line)
+        Updates the line for all tokens of a given `node`. The subtrees are
+        kept on a stack, s.t. deep expressions don't exceed the recursion
+        limit.
+        """
+        stack = [node]
+        while stack:
+            for child in stack.pop().children:
+                if isinstance(child, Token):
+                    child.line = line
+                else:
+                    stack.append(child)
 
     def set_line(self, node, line):
         """
@@ -79,7 +83,7 @@ class FakeTree:
         if first_token is not None:
             first_token.line = line
         else:
-            node._line = line
+            node.set_position(line)
 
     def assignment(self, value):
         """
@@ -126,11 +130,13 @@ class FakeTree:
         Adds a node to the current block at the target line position
         """
         insert_pos = self.find_insert_pos(line)
-        self.block.children = [
-            *self.block.children[:insert_pos],
-            node,
-            *self.block.children[insert_pos:],
-        ]
+        self.block.set_children(
+            [
+                *self.block.children[:insert_pos],
+                node,
+                *self.block.children[insert_pos:],
+            ]
+        )
 
     def add_assignment(self, value, original_line):
         """
@@ -1,10 +1,14 @@
 # -*- coding: utf-8 -*-
 from enum import Enum
 
+from lark.exceptions import UnexpectedInput
 from lark.lexer import Token
 
+from storyscript.WorkStack import WorkStack
 from storyscript.compiler.lowering.Faketree import FakeTree
+from storyscript.compiler.lowering.Traversal import Traversal
 from storyscript.compiler.lowering.utils import unicode_escape
+from storyscript.exceptions import StorySyntaxError
 from storyscript.parser.Transformer import Transformer
 from storyscript.parser.Tree import Tree
 
@@ -28,6 +32,32 @@ class Lowering:
         """
         self.parser = parser
         self.features = features
+        self.fake_trees = {}
+        # Rewrites are grouped into as few traversals as possible. A new
+        # traversal is only started if a rewrite requires the result of a
+        # preceding rewrite for the entire tree.
+        self.rewrites = (
+            Traversal()
+            .on_enter("block", self.lower_concise_when)
+            .on_enter("expression", self.lower_cmp_expr)
+            .on_enter("arguments", self.lower_arguments)
+            .on_leave("rules", self.lower_destructoring)
+        )
+        # String templates are parsed into new expressions, which mustn't
+        # be processed by the previous rewrites, but by all later ones.
+        # Errors of string templates are reported first.
+        self.string_templates = Traversal().on_leave(
+            "expression", self.lower_string_templates
+        )
+        self.call_rewrites = (
+            Traversal()
+            .on_enter("call_expression", self.lower_function_dot)
+            .on_leave("absolute_expression", self.check_absolute_expr)
+        )
+        # Runs after inline expressions have been extracted in `visit`
+        self.value_rewrites = Traversal().on_enter(
+            "expression", self.lower_expr_values
+        )
 
     @staticmethod
     def fake_tree(block):
@@ -64,9 +94,34 @@ class Lowering:
 
     @classmethod
     def visit(cls, node, block, entity, pred, fun, parent):
+        """
+        Lowers the nodes matching `pred` from the leaves to the top.
+        """
+        WorkStack.run(cls.visit_task(node, block, entity, pred, fun, parent))
+
+    @classmethod
+    def visit_task(cls, node, block, entity, pred, fun, parent):
+        """
+        Lowers the nodes like `visit` as a task of a work stack, which
+        yields the tasks of its children, s.t. deep expressions don't
+        exceed the recursion limit.
+        """
         if not hasattr(node, "children") or len(node.children) == 0:
             return
 
+        block, entity = cls.inline_scope(node, block, entity)
+        for c in node.children:
+            # tokens and empty trees need no visit
+            if hasattr(c, "children") and c.children:
+                yield cls.visit_task(c, block, entity, pred, fun, node)
+        cls.lower_inline(node, block, entity, pred, fun, parent)
+
+    @classmethod
+    def inline_scope(cls, node, block, entity):
+        """
+        Returns the block and the entity the inline expressions of a tree
+        are lowered into.
+        """
         if node.data == "block":
             # only generate a fake_block once for every line
             # node: block in which the fake assignments should be inserted
@@ -77,10 +132,13 @@ class Lowering:
             entity = node
         elif node.data == "service" and node.child(0).data == "path":
             entity = node
+        return block, entity
 
-        for c in node.children:
-            cls.visit(c, block, entity, pred, fun, parent=node)
-
+    @classmethod
+    def lower_inline(cls, node, block, entity, pred, fun, parent):
+        """
+        Lowers a tree after its children have been lowered.
+        """
         # create fake lines for base_expressions too, but only when required:
         # 1) `expressions` are already allowed to be nested
         # 2) `assignment_fragments` are ignored to avoid two lines for simple
@@ -92,7 +150,7 @@ class Lowering:
         ):
             # replace base_expression too
             fun(node, block, node)
-            node.children = [Tree("path", node.children)]
+            node.set_children([Tree("path", node.children)])
 
         if pred(node):
             assert entity is not None
@@ -127,7 +185,7 @@ class Lowering:
         if len(other_nodes) == 0:
             return base_tree.children[0]
 
-        base_tree.children.append(
+        base_tree.append(
             Tree("arith_operator", [n1.create_token("PLUS", "+")]),
         )
 
@@ -136,7 +194,7 @@ class Lowering:
         # directly flatten the tree and add all additional nodes as extra
         # expressions
         for n2 in other_nodes:
-            base_tree.children.append(n2)
+            base_tree.append(n2)
         return base_tree
 
     @classmethod
@@ -212,10 +270,51 @@ class Lowering:
         Inserts the AST expression as fake_node and returns the path
         reference to the inserted fake_node.
         """
+        if not self.parser.parses_expressions():
+            return self.eval_story(orig_node, code_string, fake_tree)
+        line = orig_node.line()
+        column = int(orig_node.column()) + 1
+        try:
+            new_node = self.parser.parse_expression(
+                code_string,
+                line=int(line),
+                column_offset=column,
+                allow_single_quotes=True,
+            )
+        except (UnexpectedInput, StorySyntaxError):
+            # the story-level parse reports the error
+            return self.eval_story(orig_node, code_string, fake_tree)
+        if new_node.data == "expression":
+            path = new_node.follow(["entity", "path"])
+            if (
+                path is not None
+                and len(path.children) == 1
+                and isinstance(path.children[0], Token)
+            ):
+                # it was a plain-old path initially
+                return self.plain_path(orig_node, code_string)
+        # the new assignment should be inserted at the top of the current block
+        return fake_tree.add_assignment(new_node, original_line=line)
+
+    @staticmethod
+    def plain_path(orig_node, code_string):
+        """
+        Builds a path reference to a plain name inside a string template.
+        """
+        line = orig_node.line()
+        column = int(orig_node.column()) + 1
+        name = Token("NAME", code_string.strip(), line=line, column=column)
+        name.end_column = int(orig_node.end_column()) - 1
+        return Tree("path", [name])
+
+    def eval_story(self, orig_node, code_string, fake_tree):
+        """
+        Evaluates a string by parsing it as a story, padded with whitespace
+        to fixup the column location of the resulting tokens.
+        Used for snippets that aren't single expressions.
+        """
         line = orig_node.line()
         column = int(orig_node.column()) + 1
-        # add whitespace as padding to fixup the column location of the
-        # resulting tokens.
         from storyscript.Story import Story
 
         story = Story(" " * column + code_string, features=self.features)
@@ -236,10 +335,7 @@ class Lowering:
             new_node.data == "service_block"
             and new_node.service_fragment is None
         ):
-            # it was a plain-old path initially
-            name = Token("NAME", code_string.strip(), line=line, column=column)
-            name.end_column = int(orig_node.end_column()) - 1
-            return Tree("path", [name])
+            return self.plain_path(orig_node, code_string)
         if new_node.data == "absolute_expression":
             new_node = new_node.children[0]
         else:
@@ -343,41 +439,30 @@ class Lowering:
         new_node = self.add_strings(*children)
 
         assert len(node.children) == 1
-        node.children = new_node.children
+        node.set_children(new_node.children)
         node.kind = new_node.kind
 
-    def visit_string_templates(self, node, block, parent):
+    def lower_string_templates(self, node, parent, block):
         """
-        Iterates the AST and evaluates string templates.
+        Evaluates the string templates of an expression.
         """
-        if not hasattr(node, "children"):
-            return
-
-        if node.data == "block":
-            block = node
-
-        for c in node.children:
-            self.visit_string_templates(c, block, node)
-
         # leaf-to-to to avoid double execution
-        if node.data == "expression":
-            if node.entity is not None:
-                self.inline_string_templates(node, block, parent)
+        if node.entity is not None:
+            self.inline_string_templates(node, block, parent)
 
-    def visit_concise_when(self, node):
+    def lower_concise_when(self, node, parent, block):
         """
-        Searches for to be processed concise_when_block.
+        Processes the concise_when_blocks of a block.
         """
-        if node.data == "start":
-            for c in node.children:
-                self.visit_concise_when(c)
-        # concise_when_blocks can only occur at the root-level, hence we can
-        # directly iterate here:
-        if node.data == "block":
-            fake_tree = self.fake_tree(node)
-            for i, c in enumerate(node.children):
-                if c.data == "concise_when_block":
-                    node.children[i] = self.process_concise_block(c, fake_tree)
+        # concise_when_blocks can only occur at the root-level
+        if parent is None or parent.data != "start":
+            return
+        fake_tree = None
+        for i, c in enumerate(node.children):
+            if c.data == "concise_when_block":
+                if fake_tree is None:
+                    fake_tree = self.fake_tree(node)
+                node.replace(i, self.process_concise_block(c, fake_tree))
 
     def process_concise_block(self, node, fake_tree):
         """
@@ -416,61 +501,58 @@ class Lowering:
         """
         return Tree("expression", [Tree("entity", [path])])
 
-    def visit_assignment(self, node, block, parent):
+    def block_fake_tree(self, block):
         """
-        Visit assignments and lower destructors
+        Returns the fake tree of a block, which is shared by all rewrites
+        of the current traversal.
         """
-        if not hasattr(node, "children") or len(node.children) == 0:
-            return
+        fake_tree = self.fake_trees.get(id(block))
+        if fake_tree is None:
+            fake_tree = self.fake_tree(block)
+            self.fake_trees[id(block)] = fake_tree
+        return fake_tree
 
-        if node.data == "block":
-            # only generate a fake_block once for every line
-            # node: block in which the fake assignments should be inserted
-            block = self.fake_tree(node)
+    def lower_destructoring(self, node, parent, block):
+        """
+        Lowers destructuring assignments
+        """
+        assignment = node.children[0]
+        if assignment.data != "assignment":
+            return
 
-        if node.data == "assignment":
-            c = node.children[0]
+        c = assignment.children[0]
+        if c.data == "path":
+            # a path assignment -> no processing required
+            return
 
-            if c.data == "path":
-                # a path assignment -> no processing required
-                pass
-            else:
-                assert c.data == "assignment_destructoring"
-                line = node.line()
-                base_expr = node.assignment_fragment.base_expression
-                eq_tok = node.assignment_fragment.child(0)
-                orig_node = Tree("base_expression", base_expr.children)
-                orig_obj = block.add_assignment(orig_node, original_line=line)
-                for i, n in enumerate(c.children):
-                    new_line = block.line()
-                    n.expect(
-                        len(n.children) == 1,
-                        "object_destructoring_invalid_path",
-                    )
-                    name = n.child(0)
-                    name.line = new_line  # update token's line info
-                    # <n> = <val>
-                    val = self.create_entity(
-                        Tree(
-                            "path",
-                            [
-                                orig_obj.child(0),
-                                Tree(
-                                    "path_fragment", [Tree("string", [name])]
-                                ),
-                            ],
-                        )
-                    )
-                    a = block.assignment_path(n, val, new_line, eq_tok=eq_tok)
-                    block.insert_node(a, name.line)
-                return True
-        else:
-            for c in node.children:
-                performed_destructuring = self.visit_assignment(
-                    c, block, parent=node
+        assert c.data == "assignment_destructoring"
+        fake_tree = self.block_fake_tree(block)
+        line = assignment.line()
+        base_expr = assignment.assignment_fragment.base_expression
+        eq_tok = assignment.assignment_fragment.child(0)
+        orig_node = Tree("base_expression", base_expr.children)
+        orig_obj = fake_tree.add_assignment(orig_node, original_line=line)
+        for i, n in enumerate(c.children):
+            new_line = fake_tree.line()
+            n.expect(
+                len(n.children) == 1,
+                "object_destructoring_invalid_path",
+            )
+            name = n.child(0)
+            name.line = new_line  # update token's line info
+            # <n> = <val>
+            val = self.create_entity(
+                Tree(
+                    "path",
+                    [
+                        orig_obj.child(0),
+                        Tree("path_fragment", [Tree("string", [name])]),
+                    ],
                 )
-                if performed_destructuring:
-                    parent.children.remove(node)
+            )
+            a = fake_tree.assignment_path(n, val, new_line, eq_tok=eq_tok)
+            fake_tree.insert_node(a, name.line)
+        parent.remove(node)
 
     @classmethod
     def rewrite_cmp_expr(cls, node):
@@ -481,33 +563,28 @@ class Lowering:
             cmp_tok = cmp_op.create_token("EQUAL", "==")
         elif cmp_tok.type == "GREATER_EQUAL":
             cmp_tok = cmp_op.create_token("LESSER", "<")
-            cmp_op.children.reverse()
+            cmp_op.set_children(cmp_op.children[::-1])
         else:
             assert cmp_tok.type == "GREATER"
             cmp_tok = cmp_op.create_token("LESSER_EQUAL", "<=")
-            cmp_op.children.reverse()
+            cmp_op.set_children(cmp_op.children[::-1])
 
         # replace comparison token
-        cmp_op.children = [cmp_tok]
+        cmp_op.set_children([cmp_tok])
         # create new comparison tree with 'NOT'
         node.kind = "unary_expression"
-        node.children = [
-            Tree("unary_operator", [node.create_token("NOT", "!")]),
-            Tree("expression", node.children),
-        ]
+        node.set_children(
+            [
+                Tree("unary_operator", [node.create_token("NOT", "!")]),
+                Tree("expression", node.children),
+            ]
+        )
 
-    def visit_cmp_expr(self, node):
+    def lower_cmp_expr(self, node, parent, block):
         """
-        Visit assignments and lower destructors
+        Rewrites the comparisons `!=`, `>=` and `>` of an expression
         """
-        if not hasattr(node, "children") or len(node.children) == 0:
-            return
-
-        if (
-            node.data == "expression"
-            and node.kind == "cmp_expression"
-            and len(node.children) == 3
-        ):
+        if node.kind == "cmp_expression" and len(node.children) == 3:
             cmp_op = node.child(1)
             assert cmp_op.data == "cmp_operator"
             cmp_tok = cmp_op.child(0)
@@ -518,76 +595,46 @@ class Lowering:
             ):
                 self.rewrite_cmp_expr(node)
 
-        for c in node.children:
-            self.visit_cmp_expr(c)
-
-    def visit_arguments(self, node):
+    def lower_arguments(self, node, parent, block):
         """
         Transforms an argument tree. Short-hand argument (:foo) will be
         expanded.
         """
-        if not hasattr(node, "children") or len(node.children) == 0:
-            return
-
-        if node.data == "arguments":
-            Transformer.argument_shorthand(node)
+        Transformer.argument_shorthand(node)
 
-        for c in node.children:
-            self.visit_arguments(c)
-
-    def visit_expr_values(self, node, fake_tree):
+    def lower_expr_values(self, node, parent, block):
         """
         Transforms a value with a direct index path into two lines.
         """
-        if not hasattr(node, "children") or len(node.children) == 0:
-            return
+        values = node.follow(["entity", "values"])
+        if values is not None and len(values.children) > 1:
+            value_type = values.child(0).data
+            assert value_type == "list" or value_type == "map"
 
-        if node.data == "expression":
-            values = node.follow(["entity", "values"])
-            if values is not None and len(values.children) > 1:
-                value_type = values.child(0).data
-                assert value_type == "list" or value_type == "map"
+            path_fragments = values.children[1:]
 
-                path_fragments = values.children[1:]
-
-                # insert the list as a new temporary reference
-                values.children = [values.children[0]]
-                obj = Tree("expression", node.children)
-                path = fake_tree.add_assignment(obj, original_line="1")
-
-                # insert all path fragments to it
-                path.children.extend(path_fragments)
-                # replace assignment with new path
-                node.children = [Tree("entity", [path])]
-
-        if node.data == "block":
-            fake_tree = self.fake_tree(node)
+            # insert the list as a new temporary reference
+            values.set_children([values.children[0]])
+            obj = Tree("expression", node.children)
+            fake_tree = self.block_fake_tree(block)
+            path = fake_tree.add_assignment(obj, original_line="1")
 
-        for c in node.children:
-            self.visit_expr_values(c, fake_tree)
+            # insert all path fragments to it
+            path.set_children([*path.children, *path_fragments])
+            # replace assignment with new path
+            node.set_children([Tree("entity", [path])])
 
-    def visit_function_dot(self, node, block):
+    def lower_function_dot(self, node, parent, block):
         """
-        Visit function call with more than one path and lower
-        them into mutations.
+        Lowers function calls with more than one path into mutations.
         """
-        if not hasattr(node, "children") or len(node.children) == 0:
-            return
-
-        if node.data == "call_expression":
-            call_expr = node
-            if len(call_expr.path.children) > 1:
-                path_fragments = call_expr.path.children
-                call_expr.children = [
-                    Tree(
-                        "expression",
-                        [
-                            Tree(
-                                "entity",
-                                [Tree("path", call_expr.path.children[:-1])],
-                            )
-                        ],
-                    ),
+        call_expr = node
+        if len(call_expr.path.children) > 1:
+            path_fragments = call_expr.path.children
+            path = Tree("path", path_fragments[:-1])
+            call_expr.set_children(
+                [
+                    Tree("expression", [Tree("entity", [path])]),
                     Tree(
                         "mutation_fragment",
                         [
@@ -596,15 +643,21 @@ class Lowering:
                         ],
                     ),
                 ]
-                call_expr.data = "mutation"
-
-        for c in node.children:
-            self.visit_function_dot(c, block)
+            )
+            call_expr.rename("mutation")
 
     def visit_path(self, node, block):
         """
         Visit path's with expression and lower these expressions to path's.
         """
+        WorkStack.run(self.visit_path_task(node, block))
+
+    def visit_path_task(self, node, block):
+        """
+        Lowers the paths like `visit_path` as a task of a work stack, which
+        yields the tasks of its subtrees, s.t. deep expressions don't exceed
+        the recursion limit.
+        """
         if not hasattr(node, "children") or len(node.children) == 0:
             return
 
@@ -614,83 +667,95 @@ class Lowering:
             block = self.fake_tree(node)
 
         if node.data == "path":
-            for child in node.children:
-                if not (
-                    isinstance(child, Tree) and child.data == "path_fragment"
-                ):
-                    continue
-
-                path_fragment = child
-                expression = path_fragment.child(0)
-
-                if not (
-                    isinstance(expression, Tree)
-                    and expression.data == "expression"
-                ):
-                    # Don't do anything if the first child of path_fragment
-                    # isn't actually an expression
-                    continue
-
+            for path_fragment, expression in self.path_expressions(node):
                 # First lower path's deep inside the expression,
                 # before lowering current expression.
-                self.visit_path(expression, block)
-
-                if len(expression.children) > 1:
-                    # Generate an fake path for current expression and
-                    # make path fragment point to this fake path.
-                    fake_path = block.add_assignment(
-                        expression, original_line=node.line()
-                    )
-                    path_fragment.children = [fake_path]
-                else:
-                    # Remove the expression construct and make entity a
-                    # direct descendant. This saves us from adding fake
-                    # lines in some common use cases.
-                    path_or_values = expression.child(0).child(0)
-                    if path_or_values.data == "values":
-                        path_or_values = path_or_values.child(0)
-                    else:
-                        assert path_or_values.data == "path"
-                    path_fragment.children = [path_or_values]
+                yield self.visit_path_task(expression, block)
+                self.lower_path_expression(
+                    node, path_fragment, expression, block
+                )
         else:
             for c in node.children:
-                self.visit_path(c, block)
+                if hasattr(c, "children") and c.children:
+                    yield self.visit_path_task(c, block)
 
-    def visit_absolute_expr(self, node):
+    @staticmethod
+    def path_expressions(node):
         """
-        Visit absolute expression and check it has only call expressions
+        Yields the path fragments of a path which are expressions.
         """
-        if not hasattr(node, "children") or len(node.children) == 0:
-            return
+        for child in node.children:
+            if not (isinstance(child, Tree) and child.data == "path_fragment"):
+                continue
 
-        if node.data == "absolute_expression":
-            path_node = node.follow(["expression", "entity", "path"])
-            node.expect(path_node is not None, "no_effectless_expr")
-            node.expect(len(path_node.children) == 1, "no_effectless_expr")
+            path_fragment = child
+            expression = path_fragment.child(0)
 
-            call_expr_node = path_node.follow(
-                ["inline_expression", "call_expression"]
+            if not (
+                isinstance(expression, Tree)
+                and expression.data == "expression"
+            ):
+                # Don't do anything if the first child of path_fragment
+                # isn't actually an expression
+                continue
+
+            yield path_fragment, expression
+
+    @staticmethod
+    def lower_path_expression(node, path_fragment, expression, block):
+        """
+        Lowers the expression of a path fragment to a path.
+        """
+        if len(expression.children) > 1:
+            # Generate an fake path for current expression and
+            # make path fragment point to this fake path.
+            fake_path = block.add_assignment(
+                expression, original_line=node.line()
             )
-            node.expect(call_expr_node is not None, "no_effectless_expr")
+            path_fragment.set_children([fake_path])
+        else:
+            # Remove the expression construct and make entity a
+            # direct descendant. This saves us from adding fake
+            # lines in some common use cases.
+            path_or_values = expression.child(0).child(0)
+            if path_or_values.data == "values":
+                path_or_values = path_or_values.child(0)
+            else:
+                assert path_or_values.data == "path"
+            path_fragment.set_children([path_or_values])
 
-        for c in node.children:
-            self.visit_absolute_expr(c)
+    def check_absolute_expr(self, node, parent, block):
+        """
+        Checks that an absolute expression has only call expressions
+        """
+        path_node = node.follow(["expression", "entity", "path"])
+        node.expect(path_node is not None, "no_effectless_expr")
+        node.expect(len(path_node.children) == 1, "no_effectless_expr")
+
+        call_expr_node = path_node.follow(
+            ["inline_expression", "call_expression"]
+        )
+        node.expect(call_expr_node is not None, "no_effectless_expr")
+
+    def walk(self, tree, traversal):
+        """
+        Applies all rewrites of a traversal to the tree.
+        """
+        self.fake_trees = {}
+        traversal.walk(tree)
+        self.fake_trees = {}
 
     def process(self, tree):
         """
         Applies several preprocessing steps to the existing AST.
         """
         pred = Lowering.is_inline_expression
-        self.visit_concise_when(tree)
-        self.visit_cmp_expr(tree)
-        self.visit_arguments(tree)
-        self.visit_assignment(tree, block=None, parent=None)
-        self.visit_string_templates(tree, block=None, parent=None)
-        self.visit_function_dot(tree, block=None)
-        self.visit_absolute_expr(tree)
+        self.walk(tree, self.rewrites)
+        self.walk(tree, self.string_templates)
+        self.walk(tree, self.call_rewrites)
         self.visit(
             tree, None, None, pred, self.replace_expression, parent=None
         )
-        self.visit_expr_values(tree, None)
+        self.walk(tree, self.value_rewrites)
         self.visit_path(tree, None)
         return tree
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+
+class Traversal:
+    """
+    Applies a group of rewrites in a single walk over the tree.
+    Rewrites register handlers for the node types they lower: enter
+    handlers are called before the children of a node are visited and
+    leave handlers afterwards. Handlers of a node are called in the order
+    of their registration as `handler(node, parent, block)`, where block
+    is the closest enclosing block.
+    """
+
+    def __init__(self):
+        # maps node types to their enter and leave handlers
+        self.handlers = {}
+
+    def on_enter(self, data, handler):
+        """
+        Registers a handler that is called before visiting the children.
+        """
+        self.handlers.setdefault(data, ([], []))[0].append(handler)
+        return self
+
+    def on_leave(self, data, handler):
+        """
+        Registers a handler that is called after visiting the children.
+        """
+        self.handlers.setdefault(data, ([], []))[1].append(handler)
+        return self
+
+    def walk(self, node, parent=None, block=None):
+        """
+        Visits all nodes of a tree. Children are read after the enter
+        handlers have run, s.t. rewritten children are visited too.
+        """
+        if hasattr(node, "children") and len(node.children) > 0:
+            self.visit(node, parent, block)
+
+    def enter(self, node, parent, block):
+        """
+        Calls the enter handlers of a tree, returning its frame on the
+        stack of the walk.
+        """
+        data = node.data
+        if data == "block":
+            block = node
+
+        leave = ()
+        handlers = self.handlers.get(data)
+        if handlers is not None:
+            enter, leave = handlers
+            for handler in enter:
+                handler(node, parent, block)
+        return node, parent, block, iter(node.children), leave
+
+    def visit(self, node, parent, block):
+        """
+        Applies the handlers to a tree and its subtrees. The trees are kept
+        on an explicit stack, s.t. deep expressions don't exceed the
+        recursion limit.
+        """
+        stack = [self.enter(node, parent, block)]
+        while stack:
+            node, parent, block, children, leave = stack[-1]
+            for child in children:
+                if hasattr(child, "children") and child.children:
+                    stack.append(self.enter(child, node, block))
+                    break
+            else:
+                stack.pop()
+                for handler in leave:
+                    handler(node, parent, block)
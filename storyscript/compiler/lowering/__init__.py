@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from storyscript.compiler.lowering.Faketree import FakeTree
 from storyscript.compiler.lowering.Lowering import Lowering
+from storyscript.compiler.lowering.Traversal import Traversal
 
-__all__ = ["FakeTree", "Lowering"]
+__all__ = ["FakeTree", "Lowering", "Traversal"]
@@ -55,9 +55,12 @@ class PrettyExpressionVisitor(ExpressionVisitor):
 
         return f"{expr} to {output}"
 
-    def expression(self, tree):
-        v = super().expression(tree)
+    def parentheses(self, tree, v):
         if getattr(tree, "needs_parentheses", False):
             return f"({v})"
         else:
             return v
+
+    def expression_task(self, tree):
+        v = yield from super().expression_task(tree)
+        return self.parentheses(tree, v)
@@ -1,25 +1,77 @@
 # -*- coding: utf-8 -*-
 import contextlib
 
+from storyscript.compiler.visitors.DispatchVisitor import DispatchVisitor
 from storyscript.parser import Tree
 
 from .Objects import Objects
 
 
-class PrettyPrinter:
+class PrettyPrinter(DispatchVisitor):
 
     """
     Formats a Storyscript abstract syntax tree back to Storyscript.
     """
 
+    # the subtrees which are compiled directly
+    dispatch_rules = [
+        "service_block",
+        "absolute_expression",
+        "assignment",
+        "if_block",
+        "elseif_block",
+        "else_block",
+        "foreach_block",
+        "function_block",
+        "when_block",
+        "try_block",
+        "return_statement",
+        "arguments",
+        "call_expression",
+        "imports",
+        "while_block",
+        "throw_statement",
+        "break_statement",
+        "mutation_block",
+        "indented_chain",
+    ]
+
     def __init__(self):
-        self.buf = ""
         self.indent_type = "  "
+        # the indentation of each scope level, built once per level
+        self.indents = [""]
+        self.level = 0
         self.current_indent = ""
         self.objects = Objects(self)
+        self.writer = None
+        self.started = False
+        # whitespace which is written once more output follows
+        self.pending = ""
+
+    def start(self, writer):
+        """
+        Starts writing the output to a writer, e.g. the `write` method of a
+        file. Like `str.strip`, the whitespace around the output is dropped.
+        """
+        self.writer = writer
+        self.started = False
+        self.pending = ""
+
+    def write(self, text):
+        if not self.started:
+            text = text.lstrip()
+            if not text:
+                return
+            self.started = True
+        content = text.rstrip()
+        if content:
+            self.writer(self.pending + content)
+            self.pending = text[len(content) :]
+        else:
+            self.pending += text
 
     def add_line(self, line):
-        self.buf += f"{self.current_indent}{line}\n"
+        self.write(f"{self.current_indent}{line}\n")
 
     @contextlib.contextmanager
     def scope(self):
@@ -29,11 +81,14 @@ class PrettyPrinter:
         Use in a `with` block.
         """
         # start scope
-        indent_before = self.current_indent
-        self.current_indent += self.indent_type
+        self.level += 1
+        if self.level == len(self.indents):
+            self.indents.append(self.indents[-1] + self.indent_type)
+        self.current_indent = self.indents[self.level]
         yield
         # end scope
-        self.current_indent = indent_before
+        self.level -= 1
+        self.current_indent = self.indents[self.level]
 
     def base_expression_assignment(self, tree, parent, line):
         """
@@ -271,31 +326,11 @@ class PrettyPrinter:
         Parses a subtree, checking whether it should be compiled directly
         or keep parsing for deeper trees.
         """
-        allowed_nodes = [
-            "service_block",
-            "absolute_expression",
-            "assignment",
-            "if_block",
-            "elseif_block",
-            "else_block",
-            "foreach_block",
-            "function_block",
-            "when_block",
-            "try_block",
-            "return_statement",
-            "arguments",
-            "call_expression",
-            "imports",
-            "while_block",
-            "throw_statement",
-            "break_statement",
-            "mutation_block",
-            "indented_chain",
-        ]
-        if tree.data in allowed_nodes:
-            getattr(self, tree.data)(tree, parent)
-        else:
+        handler = self.handlers.get(tree.data)
+        if handler is None:
             self.parse_tree(tree, parent=parent)
+        else:
+            handler(tree, parent)
 
     def parse_tree(self, tree, parent=None):
         """
@@ -305,10 +340,16 @@ class PrettyPrinter:
             assert isinstance(item, Tree)
             self.subtree(item, parent=parent)
 
-    def compile(self, tree, debug=False):
+    def compile(self, tree, debug=False, writer=None):
         """
-        Compile an AST to JSON
+        Compile an AST to Storyscript. With a writer, the output is written
+        line by line instead of being returned.
         """
-        self.buf = ""
+        if writer is not None:
+            self.start(writer)
+            self.parse_tree(tree)
+            return None
+        chunks = []
+        self.start(chunks.append)
         self.parse_tree(tree)
-        return self.buf.strip()
+        return "".join(chunks)
@@ -247,8 +247,8 @@ class SymbolExpressionVisitor(ExpressionVisitor):
                 i += 1
             # check whether a tree child needs casting
             if t != target_type:
-                tree.children[i] = self.type_cast_expression(
-                    tree.children[i], target_type
+                tree.replace(
+                    i, self.type_cast_expression(tree.children[i], target_type)
                 )
 
 
@@ -33,7 +33,9 @@ class Semantics:
     visitors = [FunctionResolver, TypeResolver, FlowAnalyzer]
 
     def process(self, tree):
+        storycontext = self.module.storycontext
         for visitor in self.visitors:
             v = visitor(module=self.module)
-            v.visit(tree, self.module.root_scope)
+            with storycontext.phase(visitor.__name__):
+                v.visit(tree, self.module.root_scope)
         return self.module
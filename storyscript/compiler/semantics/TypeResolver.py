@@ -143,7 +143,7 @@ class TypeResolver(ScopeSelectiveVisitor):
             else:
                 command = tree.service.path.child(0)
             output = Tree("output", [command])
-            fragment.children.append(output)
+            fragment.append(output)
 
     def foreach_block(self, tree, scope):
         """
@@ -1,9 +1,10 @@
 # -*- coding: utf-8 -*-
 
+from storyscript.compiler.visitors.DispatchVisitor import DispatchVisitor
 from storyscript.parser import Tree
 
 
-class BaseVisitor:
+class BaseVisitor(DispatchVisitor):
     def __init__(self, module):
         self.module = module
 
@@ -15,8 +16,9 @@ class SelectiveVisitor(BaseVisitor):
     """
 
     def visit(self, tree, scope=None):
-        if hasattr(self, tree.data):
-            return getattr(self, tree.data)(tree)
+        handler = self.handlers.get(tree.data)
+        if handler is not None:
+            return handler(tree)
 
     def visit_children(self, tree):
         for c in tree.children:
@@ -31,8 +33,9 @@ class ScopeSelectiveVisitor(BaseVisitor):
     """
 
     def visit(self, tree, scope):
-        if hasattr(self, tree.data):
-            return getattr(self, tree.data)(tree, scope)
+        handler = self.handlers.get(tree.data)
+        if handler is not None:
+            return handler(tree, scope)
 
     def visit_children(self, tree, scope):
         for c in tree.children:
@@ -51,11 +54,34 @@ class FullVisitor(SelectiveVisitor):
         super().__init__(module)
         self.ignore_nodes = ignore_nodes
 
-    def visit(self, tree, scope=None):
-        if hasattr(self, tree.data):
-            return getattr(self, tree.data)(tree)
-        if (
+    def visits_children(self, tree):
+        """
+        Returns whether the children of an unhandled tree are visited.
+        """
+        return (
             self.ignore_nodes is not None
             and tree.data not in self.ignore_nodes
-        ):
+        )
+
+    def visit(self, tree, scope=None):
+        handler = self.handlers.get(tree.data)
+        if handler is not None:
+            return handler(tree)
+        if self.visits_children(tree):
             self.visit_children(tree)
+
+    def visit_children(self, tree):
+        """
+        Visits the children of a tree. The trees left to visit are kept on
+        a stack, s.t. deep expressions don't exceed the recursion limit.
+        """
+        stack = [c for c in reversed(tree.children) if isinstance(c, Tree)]
+        while stack:
+            tree = stack.pop()
+            handler = self.handlers.get(tree.data)
+            if handler is not None:
+                handler(tree)
+            elif self.visits_children(tree):
+                stack.extend(
+                    c for c in reversed(tree.children) if isinstance(c, Tree)
+                )
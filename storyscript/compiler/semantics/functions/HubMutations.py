@@ -1,8 +1,13 @@
+from functools import lru_cache
+
 from storyhub.engine.Builtins import builtins
 
 from storyscript.compiler.semantics.functions.MutationBuilder import (
     mutation_builder,
 )
+from storyscript.compiler.semantics.functions.PrecompiledMutations import (
+    PrecompiledMutations,
+)
 
 
 class Hub:
@@ -16,17 +21,29 @@ class Hub:
         for m in mutations:
             self._mutations.append(mutation_builder(m))
 
+    @classmethod
+    def from_mutations(cls, mutations):
+        """
+        Creates a hub of already built mutations.
+        """
+        hub = cls([])
+        hub._mutations = mutations
+        return hub
+
     def mutations(self):
         """
         Return all mutations supported by this hub.
         """
         return self._mutations
 
+    @lru_cache(maxsize=1)
     def instance():
         """
-        Return the current Hub instance
+        Return the current Hub instance. The builtin mutations are only
+        built when they are first used, from the precompiled mutations if
+        they match the installed builtins.
         """
-        return hub
-
-
-hub = Hub(builtins)
+        mutations = PrecompiledMutations.load(builtins)
+        if mutations is None:
+            return Hub(builtins)
+        return Hub.from_mutations(mutations)
@@ -63,6 +63,19 @@ class Mutation:
         """
         return self._ti
 
+    def args(self):
+        """
+        The generic arguments of this mutation, mapping their names to
+        their type and description.
+        """
+        return self._args
+
+    def output(self):
+        """
+        The generic output type of this mutation.
+        """
+        return self._output
+
     def base_type(self):
         """
         The base type that this mutation can mutation, e.g. IntType or ListType
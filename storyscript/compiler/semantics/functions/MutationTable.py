@@ -11,10 +11,20 @@ class MutationOverloads:
     Contains all overloads for a mutation of a specific name and type.
     """
 
-    def __init__(self, name, type_):
-        self._obj = {}
+    def __init__(self, name, type_, overloads=None, sorted_overloads=None):
+        if overloads is None:
+            overloads = {}
+        self._obj = overloads
         self._name = name
         self._type = type_
+        self._all = sorted_overloads
+
+    def with_type(self, type_):
+        """
+        Returns the same overloads for another type of the same kind,
+        sharing the overload lists.
+        """
+        return MutationOverloads(self._name, type_, self._obj, self.all())
 
     def add_overloads(self, overloads):
         for name, overload in overloads.items():
@@ -24,13 +34,17 @@ class MutationOverloads:
         if name not in self._obj:
             self._obj[name] = []
         self._obj[name].append(overload)
+        self._all = None
 
     def all(self):
         """
-        Builds a sorted list of all available overloads.
+        Returns a sorted list of all available overloads, which is built
+        once.
         """
-        overloads = chain.from_iterable(self._obj.values())
-        return list(sorted(overloads, key=lambda m: m.cmp_name()))
+        if self._all is None:
+            overloads = chain.from_iterable(self._obj.values())
+            self._all = list(sorted(overloads, key=lambda m: m.cmp_name()))
+        return self._all
 
     def single(self):
         """
@@ -75,10 +89,14 @@ class MutationOverloads:
 class MutationTable:
     """
     A table of all available mutation inside a story.
+    Resolved overloads are cached by type and name.
     """
 
     def __init__(self):
         self.mutations = {}
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
 
     def insert(self, mutation):
         """
@@ -100,6 +118,7 @@ class MutationTable:
         else:
             muts[t] = {}
         muts[t][arg_names] = mutation
+        self.cache.clear()
 
     @staticmethod
     def type_key(type_):
@@ -128,10 +147,7 @@ class MutationTable:
                 for mut in res.values():
                     yield mut
 
-    def resolve(self, type_, name):
-        """
-        Returns the mutation `name` or `None`.
-        """
+    def _resolve(self, type_, name):
         muts = self.mutations.get(name, None)
         if muts is None:
             return None
@@ -148,6 +164,35 @@ class MutationTable:
         mo.add_overloads(overloads)
         return mo
 
+    def resolve(self, type_, name):
+        """
+        Returns the mutation `name` or `None`.
+        """
+        if type_ == AnyType.instance():
+            key = (None, name)
+        else:
+            key = (self.type_key(type(type_)), name)
+        if key in self.cache:
+            self.hits += 1
+            mo = self.cache[key]
+            if mo is None:
+                return None
+            return mo.with_type(type_)
+        self.misses += 1
+        mo = self._resolve(type_, name)
+        self.cache[key] = mo
+        return mo
+
+    def cache_info(self):
+        """
+        Returns the statistics of the resolution cache.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.cache),
+        }
+
     @classmethod
     def init(cls):
         """
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import importlib
+import json
+import os
+
+from storyscript.compiler.semantics.functions.MutationBuilder import (
+    mutation_builder,
+)
+from storyscript.compiler.semantics.types.GenericTypes import (
+    GenericType,
+    TypeSymbol,
+)
+
+
+class PrecompiledMutations:
+    """
+    Generates the builtin mutations of storyhub into a Python module, which
+    builds them without parsing their type signatures. The module records
+    a fingerprint of the builtins and is only used while they match, s.t.
+    another storyhub version falls back to parsing the builtins.
+    The module is generated at build time or with:
+
+        python -m storyscript.compiler.semantics.functions.PrecompiledMutations
+    """
+
+    module = "storyscript.compiler.semantics.functions.BuiltinMutations"
+
+    @staticmethod
+    def fingerprint(builtins):
+        """
+        Computes the fingerprint of the builtin mutations.
+        """
+        data = json.dumps(builtins, sort_keys=True, default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    @classmethod
+    def type_source(cls, type_):
+        """
+        Returns the Python expression which builds a parsed type.
+        """
+        if isinstance(type_, TypeSymbol):
+            return f"TypeSymbol({type_.name()!r})"
+        if isinstance(type_, GenericType):
+            symbols = ", ".join(cls.type_source(s) for s in type_.symbols)
+            return f"GenericTypes.{type(type_).__name__}([{symbols}])"
+        return f"Types.{type(type_).__name__}.instance()"
+
+    @classmethod
+    def mutation_source(cls, mutation):
+        """
+        Returns the Python expression which builds a mutation.
+        """
+        args = ", ".join(
+            f'{name!r}: {{"type": {cls.type_source(arg["type"])}, '
+            f'"desc": {arg["desc"]!r}}}'
+            for name, arg in mutation.args().items()
+        )
+        return (
+            f"Mutation(\n"
+            f"            ti={cls.type_source(mutation.type())},\n"
+            f"            name={mutation.name()!r},\n"
+            f"            args={{{args}}},\n"
+            f"            output={cls.type_source(mutation.output())},\n"
+            f"            desc={mutation.desc()!r},\n"
+            f"        )"
+        )
+
+    @classmethod
+    def source(cls, builtins):
+        """
+        Generates the module of the builtin mutations.
+        """
+        mutations = "".join(
+            f"        {cls.mutation_source(mutation_builder(builtin))},\n"
+            for builtin in builtins
+        )
+        return (
+            "# -*- coding: utf-8 -*-\n"
+            "# Generated from the storyhub builtins by PrecompiledMutations.\n"
+            "from storyscript.compiler.semantics.functions.Mutation import "
+            "Mutation\n"
+            "from storyscript.compiler.semantics.types import GenericTypes, "
+            "Types\n"
+            "from storyscript.compiler.semantics.types.GenericTypes import "
+            "TypeSymbol\n"
+            "\n"
+            f"fingerprint = {cls.fingerprint(builtins)!r}\n"
+            "\n"
+            "\n"
+            "def mutations():\n"
+            "    return [\n"
+            f"{mutations}"
+            "    ]\n"
+        )
+
+    @classmethod
+    def path(cls):
+        """
+        Returns the path of the generated module.
+        """
+        name = cls.module.rsplit(".", 1)[1]
+        return os.path.join(os.path.dirname(__file__), f"{name}.py")
+
+    @classmethod
+    def generate(cls, builtins, path=None):
+        """
+        Writes the module of the builtin mutations.
+        """
+        if path is None:
+            path = cls.path()
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(cls.source(builtins))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, builtins):
+        """
+        Returns the precompiled builtin mutations, or None if the module is
+        missing or was generated from other builtins.
+        """
+        try:
+            module = importlib.import_module(cls.module)
+        except ImportError:
+            return None
+        if module.fingerprint != cls.fingerprint(builtins):
+            return None
+        return module.mutations()
+
+
+if __name__ == "__main__":
+    from storyhub.engine.Builtins import builtins
+
+    PrecompiledMutations.generate(builtins)
@@ -6,6 +6,7 @@ from storyscript.compiler.semantics.types.Types import (
     StringType,
 )
 
+from .SymbolTable import SymbolTable
 from .Symbols import StorageClass, Symbol, Symbols
 
 
@@ -47,9 +48,23 @@ class Scope:
     def __init__(self, parent=None):
         self._parent = parent
         self._symbols = Symbols()
+        self._table = None
+
+    def table(self):
+        """
+        Returns the symbol table of this scope, which is chained to the
+        table of the parent scope.
+        """
+        table = self._table
+        if table is None:
+            parent = self._parent
+            if parent is not None:
+                parent = parent.table()
+            table = self._table = SymbolTable(self._symbols, parent=parent)
+        return table
 
     def insert(self, sym):
-        self._symbols.insert(sym)
+        self.table().insert(sym)
 
     def insert_scope(self, scope):
         """
@@ -59,10 +74,7 @@ class Scope:
             self.insert(sym)
 
     def resolve(self, path):
-        for scope in self.scopes():
-            p = scope._symbols.resolve(path)
-            if p:
-                return p
+        return self.table().resolve(path)
 
     def symbols(self):
         """
@@ -107,7 +119,7 @@ class Scope:
         Creates and returns a new scope by copying over from current scope.
         """
         new_scope = Scope(parent=self._parent)
-        new_scope.insert_scope(self)
+        new_scope._symbols = self._symbols.copy()
         return new_scope
 
     def __str__(self):
@@ -130,29 +142,32 @@ class ScopeJoiner:
         Performs the join operation on one or more scopes.
         """
         if self.scope is None:
-            self.scope = scope.copy()
-            self.symbols = self.scope._symbols._symbols
+            # the joined symbols are only read, so they can be shared with
+            # the first scope until they are intersected
+            self.scope = scope
+            self.symbols = scope._symbols._symbols
         else:
             # join symbols
             new_symbols = scope._symbols._symbols
-            for k in [*self.symbols.keys()]:
-                if k not in new_symbols:
-                    del self.symbols[k]
+            symbols = {}
+            for k, t1 in self.symbols.items():
+                t2 = new_symbols.get(k)
+                if t2 is None:
                     self.invalid_symbols.pop(k, None)
-                else:
-                    # check for type compatibility
-                    t1 = self.symbols[k]
-                    t2 = new_symbols[k]
-                    if t1.type() != t2.type():
-                        # it is possible that a symbol doesn't appear in
-                        # all scopes, so we must save it for later and check
-                        # for such invalid symbols at the end
-                        self.invalid_symbols[k] = {
-                            "t1name": t1.name(),
-                            "t1type": t1.type(),
-                            "t2name": t2.name(),
-                            "t2type": t2.type(),
-                        }
+                    continue
+                symbols[k] = t1
+                # check for type compatibility
+                if t1.type() != t2.type():
+                    # it is possible that a symbol doesn't appear in
+                    # all scopes, so we must save it for later and check
+                    # for such invalid symbols at the end
+                    self.invalid_symbols[k] = {
+                        "t1name": t1.name(),
+                        "t1type": t1.type(),
+                        "t2name": t2.name(),
+                        "t2type": t2.type(),
+                    }
+            self.symbols = symbols
 
     def insert_to(self, tree, scope):
         """
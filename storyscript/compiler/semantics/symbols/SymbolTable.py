@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from weakref import WeakSet
+
+
+class SymbolTable:
+    """
+    Resolves the symbols of a scope and all its parent scopes with a single
+    lookup. The table of a scope is chained to the table of its parent and
+    keeps a flattened view of the chain, which is built on the first lookup.
+    Inserting a symbol drops the views of the tables chained to this one,
+    s.t. later lookups in child scopes see the new symbol.
+    """
+
+    def __init__(self, symbols, parent=None):
+        self._symbols = symbols
+        self._parent = parent
+        self._view = None
+        # the tables whose view was built from the view of this table. The
+        # references are weak, s.t. the tables of finished scopes are freed.
+        self._children = WeakSet()
+
+    def view(self):
+        """
+        Returns a mapping of all names visible in this table to their
+        symbols. Symbols of this table shadow the symbols of its parents.
+        """
+        view = self._view
+        if view is None:
+            parent = self._parent
+            if parent is None:
+                view = {}
+            else:
+                view = parent.view().copy()
+                parent._children.add(self)
+            view.update(self._symbols._symbols)
+            self._view = view
+        return view
+
+    def resolve(self, name):
+        assert len(name) > 0
+        return self.view().get(name)
+
+    def insert(self, symbol):
+        self._symbols.insert(symbol)
+        if self._view is not None:
+            self._view[symbol.name()] = symbol
+        if self._children:
+            self.invalidate_children()
+
+    def invalidate_children(self):
+        """
+        Drops the views of all tables chained to this table.
+        """
+        tables = list(self._children)
+        self._children = WeakSet()
+        while tables:
+            table = tables.pop()
+            table._view = None
+            tables.extend(table._children)
+            table._children = WeakSet()
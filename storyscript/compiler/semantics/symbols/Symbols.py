@@ -194,6 +194,14 @@ class Symbols:
     def insert(self, symbol):
         self._symbols[symbol.name()] = symbol
 
+    def copy(self):
+        """
+        Returns a copy of these symbols.
+        """
+        symbols = Symbols()
+        symbols._symbols = self._symbols.copy()
+        return symbols
+
     def pretty(self, indent=""):
         result = ""
         for k, v in self._symbols.items():
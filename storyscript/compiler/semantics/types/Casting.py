@@ -37,6 +37,9 @@ def implicit_type_cast(
         # We don't emit a type cast if:
         # * Target type is AnyType (AnyType can represent anything)
         # * Target and Source type are the same.
-        arg_node.children[1] = SymbolExpressionVisitor.type_cast_expression(
-            arg_node.children[1], target_type
+        arg_node.replace(
+            1,
+            SymbolExpressionVisitor.type_cast_expression(
+                arg_node.children[1], target_type
+            ),
         )
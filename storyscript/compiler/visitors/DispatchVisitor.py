@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+
+class DispatchTable:
+    """
+    Maps the rules of a visitor to its bound handlers. The rules are
+    collected once per class and the table is built on its first lookup,
+    then stored on the visitor s.t. later lookups are attribute accesses.
+    """
+
+    def __init__(self):
+        self.rules = {}
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def rules_of(self, cls):
+        """
+        Returns the rules a visitor class handles: its `dispatch_rules` or
+        all its public methods.
+        """
+        rules = self.rules.get(cls)
+        if rules is None:
+            rules = cls.dispatch_rules
+            if rules is None:
+                rules = [
+                    name
+                    for name in dir(cls)
+                    if not name.startswith("_")
+                    and callable(getattr(cls, name))
+                ]
+            rules = self.rules[cls] = frozenset(rules)
+        return rules
+
+    @staticmethod
+    def missing(visitor, rule):
+        """
+        Returns a handler which looks the handler of a rule up when called.
+        """
+
+        def handler(*args):
+            return getattr(visitor, rule)(*args)
+
+        return handler
+
+    def __get__(self, visitor, owner):
+        if visitor is None:
+            return self
+        table = {}
+        for rule in self.rules_of(owner):
+            handler = getattr(visitor, rule, None)
+            if handler is None:
+                # a declared rule without a handler fails when dispatched
+                handler = self.missing(visitor, rule)
+            table[rule] = handler
+        visitor.__dict__[self.name] = table
+        return table
+
+
+class DispatchVisitor:
+    """
+    A visitor which dispatches tree nodes to the handler named after their
+    rule through `handlers`.
+    """
+
+    # the rules which are dispatched, all public methods if None
+    dispatch_rules = None
+
+    handlers = DispatchTable()
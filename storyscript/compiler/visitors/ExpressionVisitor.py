@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from contextlib import contextmanager
 
+from storyscript.WorkStack import WorkStack
+
 
 class ExpressionVisitor:
     """
@@ -33,6 +35,14 @@ class ExpressionVisitor:
         """
         Compiles an expression object with the given tree.
         """
+        return WorkStack.run(self.expression_task(tree))
+
+    def expression_task(self, tree):
+        """
+        Compiles an expression like `expression` as a task of a work stack,
+        which yields the tasks of its nested expressions, s.t. deep
+        expressions don't exceed the recursion limit.
+        """
         first_child = tree.first_child()
         if len(tree.children) == 1:
             assert first_child.data == "entity"
@@ -41,16 +51,16 @@ class ExpressionVisitor:
             second_child = tree.child(1)
             if second_child.data == "to_operator":
                 with self.with_as_cast():
-                    expr = self.expression(first_child)
+                    expr = yield self.expression_task(first_child)
                     return self.to_expression(tree, expr)
             # unary_expression
             op = first_child.child(0)  # unary_operator
-            values = [self.expression(second_child)]
+            values = [(yield self.expression_task(second_child))]
             return self.nary_expression(tree, op, values)
         else:
             assert len(tree.children) >= 3
             op = tree.child(1).child(0)
-            values = [self.expression(first_child)]
+            values = [(yield self.expression_task(first_child))]
             for child in tree.children[2:]:
-                values.append(self.expression(child))
+                values.append((yield self.expression_task(child)))
             return self.nary_expression(tree, op, values)
@@ -52,3 +52,22 @@ class Diagnostics(Exception):
             self.line = pos.line
             self.column = pos.column
             self.end_column = pos.end_column
+
+    def __reduce__(self):
+        """
+        Pickles the diagnostic from its attributes, as the positional
+        information is no longer available as a token or tree.
+        """
+        state = dict(self.__dict__)
+        state["format_args"] = dict(self.format_args)
+        return (_restore_diagnostics, (type(self), state))
+
+
+def _restore_diagnostics(cls, state):
+    """
+    Restores a pickled diagnostic.
+    """
+    diagnostics = cls.__new__(cls)
+    diagnostics.__dict__.update(state)
+    diagnostics.format_args = ConstDict(state["format_args"])
+    return diagnostics
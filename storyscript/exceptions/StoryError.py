@@ -1,6 +1,4 @@
 # -*- coding: utf-8 -*-
-from lark.exceptions import UnexpectedCharacters, UnexpectedToken
-
 from .CompilerError import CompilerError
 from .ErrorTextFormatter import ErrorTextFormatter
 from .ProcessingError import ProcessingError
@@ -114,6 +112,10 @@ class StoryError(ErrorTextFormatter, SyntaxError):
             if ErrorCodes.is_error(self.error.error):
                 return ErrorCodes.get_error(self.error.error)
 
+        # lark is imported here, s.t. commands which don't parse stories
+        # can report errors without loading it
+        from lark.exceptions import UnexpectedCharacters, UnexpectedToken
+
         if isinstance(self.error, UnexpectedToken):
             return self.unexpected_token_code()
         elif isinstance(self.error, UnexpectedCharacters):
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
+import hashlib
+import pickle
 from functools import lru_cache
 
-from storyhub.sdk.StoryscriptHub import StoryscriptHub
+# the hub sdk is imported by story_hub when the hub is used
+StoryscriptHub = None
 
 
 @lru_cache(maxsize=1)
@@ -9,4 +12,19 @@ def story_hub():
     """
     Returns a cached instance of StoryscriptHub() from the hub sdk.
     """
+    global StoryscriptHub
+    if StoryscriptHub is None:
+        from storyhub.sdk.StoryscriptHub import StoryscriptHub
     return StoryscriptHub()
+
+
+def service_fingerprint(hub, service):
+    """
+    Returns a digest of the hub data of a service, or None if the data
+    can't be serialized.
+    """
+    try:
+        data = pickle.dumps(hub.get(service))
+    except Exception:
+        return None
+    return hashlib.sha256(data).hexdigest()
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import tempfile
+
+
+class HubSnapshotError(ValueError):
+    """
+    Raised for files which aren't valid hub snapshots or hub dumps.
+    """
+
+
+class HubSnapshot:
+    """
+    A local snapshot of the services of the hub, which can be used in place
+    of the hub. The first line of a snapshot is a JSON index with the offset
+    and length of each service. It is followed by the services, s.t. only
+    the services used by a story are deserialized.
+    """
+
+    format_version = 1
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            index = self.header(path, f.readline())
+            # offsets of the services are relative to the end of the index
+            self.start = f.tell()
+        self.index = index["services"]
+        # maps names to the loaded services
+        self.services = {}
+
+    @classmethod
+    def header(cls, path, line):
+        """
+        Parses and validates the index line of a snapshot.
+        """
+        try:
+            index = json.loads(line)
+        except ValueError:
+            index = None
+        if not isinstance(index, dict) or "version" not in index:
+            raise HubSnapshotError(f"{path} is not a hub snapshot.")
+        if index["version"] != cls.format_version:
+            raise HubSnapshotError(
+                f"{path} is a hub snapshot of version {index['version']}, "
+                f"but version {cls.format_version} is required. "
+                "Write it again with `storyscript hub snapshot`."
+            )
+        if not isinstance(index.get("services"), dict):
+            raise HubSnapshotError(f"{path} has no index of services.")
+        return index
+
+    @staticmethod
+    def catalog(path):
+        """
+        Reads the entries of services from a hub dump.
+        """
+        with open(path, "r") as f:
+            try:
+                entries = json.load(f)
+            except ValueError:
+                entries = None
+        if not isinstance(entries, list):
+            raise HubSnapshotError(f"{path} is not a hub dump.")
+        return entries
+
+    @staticmethod
+    def keys(entry):
+        """
+        Returns the names of a service, i.e. its alias and owner/name.
+        """
+        service = entry["service"]
+        keys = []
+        if service.get("alias"):
+            keys.append(service["alias"])
+        owner = service.get("owner") or {}
+        if owner.get("username"):
+            keys.append(f'{owner["username"]}/{service["name"]}')
+        return keys
+
+    @classmethod
+    def select(cls, entries, names):
+        """
+        Selects the entries of a hub dump which have one of the names.
+        """
+        names = set(names)
+        selected = []
+        for entry in entries:
+            if entry not in selected and names.intersection(cls.keys(entry)):
+                selected.append(entry)
+        return selected
+
+    @staticmethod
+    def fetch(names):
+        """
+        Fetches the entries of services from the hub.
+        """
+        from storyhub.sdk.ServiceWrapper import ServiceWrapper
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "services.json")
+            ServiceWrapper(sorted(names)).as_json_file(path)
+            with open(path, "r") as f:
+                return json.load(f)
+
+    @classmethod
+    def dumps(cls, entries):
+        """
+        Serializes the entries of services into a snapshot.
+        """
+        payloads = []
+        index = {}
+        offset = 0
+        for entry in entries:
+            payload = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+            for key in cls.keys(entry):
+                index[key] = {"offset": offset, "length": len(payload)}
+            payloads.append(payload)
+            offset += len(payload)
+        header = {"version": cls.format_version, "services": index}
+        header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        return b"".join([header, b"\n", *payloads])
+
+    def names(self):
+        return sorted(self.index.keys())
+
+    def entry(self, name):
+        """
+        Reads the entry of a service or returns None for unknown services.
+        """
+        location = self.index.get(name)
+        if location is None:
+            return None
+        with open(self.path, "rb") as f:
+            f.seek(self.start + location["offset"])
+            return json.loads(f.read(location["length"]))
+
+    @staticmethod
+    def load(entry):
+        """
+        Converts the entry of a service into the service data of the hub sdk.
+        """
+        from storyhub.sdk.service.ServiceData import ServiceData
+
+        return ServiceData.from_dict(data={"service_data": entry})
+
+    def get(self, name):
+        """
+        Returns the service data of a service like the hub does.
+        """
+        if name not in self.services:
+            entry = self.entry(name)
+            if entry is not None:
+                entry = self.load(entry)
+            self.services[name] = entry
+        return self.services[name]
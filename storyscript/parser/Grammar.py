@@ -330,6 +330,8 @@ class Grammar:
         self.throw_statement()
         self.block()
         self.ebnf.start = "nl? block*"
+        # entry point for single expressions, e.g. of string templates
+        self.ebnf.expression_start = "expression, service"
         self.ebnf.ignore("_WS")
         self.ebnf.SINGLE_LINE_COMMENT = r"/(\r?\n)?\s*#[^\n\r]*/"
         self.ebnf.ignore("SINGLE_LINE_COMMENT")
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import pickle
+
+import lark
+from lark import Lark
+from lark.grammar import Rule
+from lark.lexer import TerminalDef
+
+from ..Version import version
+
+
+class LarkCache:
+    """
+    Stores the tables of a built Lark parser on disk, so that later
+    processes can load them instead of analyzing the grammar again.
+    """
+
+    namespace = {"Rule": Rule, "TerminalDef": TerminalDef}
+
+    def __init__(self, directory=None):
+        if directory is None:
+            directory = self.default_directory()
+        self.directory = directory
+
+    @staticmethod
+    def default_directory():
+        """
+        Returns the cache directory, which can be overridden with
+        STORYSCRIPT_CACHE_DIR.
+        """
+        directory = os.environ.get("STORYSCRIPT_CACHE_DIR")
+        if directory:
+            return directory
+        cache_home = os.environ.get("XDG_CACHE_HOME")
+        if not cache_home:
+            cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(cache_home, "storyscript")
+
+    @staticmethod
+    def key(grammar, algo, starts):
+        """
+        Computes the cache key of a grammar and its start rules.
+        """
+        sha = hashlib.sha256()
+        start = ",".join(starts)
+        for part in (grammar, algo, start, lark.__version__, version):
+            sha.update(part.encode("utf-8"))
+            sha.update(b"\0")
+        return sha.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"lark-{key}.pickle")
+
+    def load(self, key, postlex):
+        """
+        Loads a cached Lark instance or returns None if there is none.
+        """
+        try:
+            with open(self.path(key), "rb") as f:
+                data, memo = pickle.load(f)
+            instance = Lark.deserialize(
+                data, self.namespace, memo, postlex=postlex
+            )
+        except Exception:  # Missing, unreadable or outdated cache file.
+            return None
+        # Lark.lex builds its lexer from lexer_conf, which isn't serialized
+        instance.lexer_conf = instance.parser.lexer_conf
+        return instance
+
+    def save(self, key, instance):
+        """
+        Writes a Lark instance to the cache. The file is moved in place
+        atomically, so concurrent processes never read partial files.
+        """
+        data, memo = instance.memo_serialize([TerminalDef, Rule])
+        # the postlexer is passed again when loading
+        data["options"] = dict(data["options"], postlex=None)
+        path = self.path(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp, "wb") as f:
+                pickle.dump((data, memo), f, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, path)
+        except OSError:  # Graceful fallback for read-only cache directories.
+            if os.path.exists(tmp):
+                os.remove(tmp)
@@ -1,11 +1,15 @@
 # -*- coding: utf-8 -*-
 import io
+import re
 
 from lark import Lark
 from lark.exceptions import VisitError
+from lark.lexer import Token
+from lark.tree import Tree as LarkTree
 
 from .Grammar import Grammar
 from .Indenter import CustomIndenter
+from .LarkCache import LarkCache
 from .Transformer import Transformer
 from .Tree import Tree
 
@@ -16,10 +20,18 @@ class Parser:
     functionalities.
     """
 
-    def __init__(self, algo="lalr", ebnf=None):
+    # the start rules of stories and of single expressions
+    starts = ["start", "expression_start"]
+    expression_rule = re.compile(r"^[?!]?expression_start\b", re.MULTILINE)
+    # bounds the number of memoized expression parse trees
+    max_expressions = 1024
+
+    def __init__(self, algo="lalr", ebnf=None, cache=True):
         self.algo = algo
         self.ebnf = ebnf
+        self.cache = cache
         self.lark = self._lark()
+        self.expressions = {}
 
     @staticmethod
     def indenter():
@@ -41,11 +53,48 @@ class Parser:
                 return f.read()
         return Grammar().build()
 
+    @classmethod
+    def start_rules(cls, grammar):
+        """
+        Returns the start rules a grammar defines. Custom grammars might
+        not have an entry point for single expressions.
+        """
+        if cls.expression_rule.search(grammar) is None:
+            return cls.starts[:1]
+        return cls.starts
+
+    def parses_expressions(self):
+        """
+        Whether single expressions can be parsed with `parse_expression`.
+        """
+        return "expression_start" in self.starts
+
     def _lark(self):
         """
         Get the grammar and initialize Lark.
+        LALR parsers are loaded from the on-disk cache when possible.
         """
-        return Lark(self.grammar(), parser=self.algo, postlex=self.indenter())
+        grammar = self.grammar()
+        self.starts = self.start_rules(grammar)
+        if not self.cache or self.algo != "lalr":
+            return Lark(
+                grammar,
+                parser=self.algo,
+                start=self.starts,
+                postlex=self.indenter(),
+            )
+        cache = LarkCache()
+        key = cache.key(grammar, self.algo, self.starts)
+        lark = cache.load(key, postlex=self.indenter())
+        if lark is None:
+            lark = Lark(
+                grammar,
+                parser=self.algo,
+                start=self.starts,
+                postlex=self.indenter(),
+            )
+            cache.save(key, lark)
+        return lark
 
     def parse(self, source, allow_single_quotes=False):
         """
@@ -55,7 +104,7 @@ class Parser:
             return Tree("empty", [])
         source = "{}\n".format(source)
         lark = self.lark
-        tree = lark.parse(source)
+        tree = lark.parse(source, start="start")
         try:
             result = self.transformer(allow_single_quotes).transform(tree)
         except VisitError as e:
@@ -63,6 +112,68 @@ class Parser:
         result.parser = self
         return result
 
+    @classmethod
+    def move(cls, tree, line, column_offset):
+        """
+        Copies a parse tree, moving its tokens to start at the given line
+        and column offset. The subtrees left to copy are kept on a stack,
+        s.t. deep expressions don't exceed the recursion limit.
+        """
+        root = LarkTree(tree.data, [])
+        stack = [(tree, root.children)]
+        while stack:
+            tree, children = stack.pop()
+            for child in tree.children:
+                if isinstance(child, Token):
+                    if child.line is not None:
+                        child = cls.move_token(child, line, column_offset)
+                    children.append(child)
+                else:
+                    copy = LarkTree(child.data, [])
+                    children.append(copy)
+                    stack.append((child, copy.children))
+        return root
+
+    @staticmethod
+    def move_token(token, line, column_offset):
+        """
+        Copies a token, moving it to start at the given line and column
+        offset.
+        """
+        offset = column_offset if token.line == 1 else 0
+        end_offset = column_offset if token.end_line == 1 else 0
+        return Token(
+            token.type,
+            token.value,
+            token.pos_in_stream + column_offset,
+            token.line + line - 1,
+            token.column + offset,
+            token.end_line + line - 1,
+            token.end_column + end_offset,
+        )
+
+    def parse_expression(
+        self, source, line=1, column_offset=0, allow_single_quotes=False
+    ):
+        """
+        Parses a single expression or service call, like the code of a
+        string template. Tokens are positioned as if the source started at
+        the given line and column offset.
+        Parse trees are memoized, as snippets are often repeated.
+        """
+        tree = self.expressions.get(source)
+        if tree is None:
+            tree = self.lark.parse(source, start="expression_start")
+            if len(self.expressions) >= self.max_expressions:
+                self.expressions.clear()
+            self.expressions[source] = tree
+        tree = self.move(tree, line, column_offset)
+        try:
+            result = self.transformer(allow_single_quotes).transform(tree)
+        except VisitError as e:
+            raise e.orig_exc
+        return result.children[0]
+
     def lex(self, source):
         """
         Lexes the source string
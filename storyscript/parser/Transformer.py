@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 from lark import Transformer as LarkTransformer
 from lark.lexer import Token
+from lark.tree import Tree as LarkTree
+from lark.visitors import Discard
 
 from .Tree import Tree
 from ..exceptions import StorySyntaxError
@@ -100,6 +102,29 @@ class Transformer(LarkTransformer):
     def __init__(self, allow_single_quotes=False):
         self.allow_single_quotes = allow_single_quotes
 
+    def transform(self, tree):
+        """
+        Transforms a tree bottom-up. Unlike lark's transformer, nodes are
+        kept on an explicit stack, s.t. deeply nested expressions don't
+        exceed the recursion limit.
+        """
+        stack = [(tree, iter(tree.children), [])]
+        while True:
+            node, children, transformed = stack[-1]
+            for child in children:
+                if isinstance(child, LarkTree):
+                    stack.append((child, iter(child.children), []))
+                    break
+                transformed.append(child)
+            else:
+                stack.pop()
+                if not stack:
+                    return self._call_userfunc(node, transformed)
+                try:
+                    stack[-1][2].append(self._call_userfunc(node, transformed))
+                except Discard:
+                    pass
+
     @classmethod
     def is_keyword(cls, token):
         keyword = token.value
@@ -153,7 +178,7 @@ class Transformer(LarkTransformer):
             ), "Operator assignment is only allowed on variables"
 
             # Replace `<op>=` with `=`
-            c.children[0] = assignment_node.create_token("EQUALS", "=")
+            c.replace(0, assignment_node.create_token("EQUALS", "="))
 
             # Prepare LHS as an expression:
             lvalue_path = matches[0]
@@ -185,7 +210,7 @@ class Transformer(LarkTransformer):
             else:
                 assert op_node.children[0].value in ("*", "/", "%")
                 expr.kind = "mul_expression"
-            matches[1].base_expression.children = [expr]
+            matches[1].base_expression.set_children([expr])
 
         return Tree("assignment", matches)
 
@@ -203,7 +228,7 @@ class Transformer(LarkTransformer):
         """
         Transforms an inline service back into a normal service.
         """
-        matches[1].data = "service_fragment"
+        matches[1].rename("service_fragment")
         return Tree("service", matches)
 
     @staticmethod
@@ -231,7 +256,7 @@ class Transformer(LarkTransformer):
             ]
             if len(args) > 0:
                 for arg in args:
-                    matches[0].service_fragment.children.append(arg)
+                    matches[0].service_fragment.append(arg)
                 return Tree("service_block", [matches[0]])
 
         return Tree("service_block", matches)
@@ -253,11 +278,11 @@ class Transformer(LarkTransformer):
         if command:
             assert isinstance(command, Token)
             assert command.type == "NAME"
-            service_fragment.children.append(Tree("command", [command]))
+            service_fragment.append(Tree("command", [command]))
 
         if output:
             assert output.data == "output"
-            service_fragment.children.append(output)
+            service_fragment.append(output)
         return Transformer.create_when_block_tree(
             service_name=service_name, fragment=service_fragment, block=block
         )
@@ -306,7 +331,7 @@ class Transformer(LarkTransformer):
                 block=nested_block,
             )
 
-        when.when_service_fragment.data = "service_fragment"
+        when.when_service_fragment.rename("service_fragment")
 
         # workaround for LARK's parser. It parses the first service_fragment
         # argument wrongly, because arguments without names are still allowed
@@ -323,10 +348,10 @@ class Transformer(LarkTransformer):
                 and first_arg.first_child().data == "expression"
             ):
                 # the parser parsed the first argument as `:<or_expression>`
-                first_arg.children = [path_token, first_arg.last_child()]
+                first_arg.set_children([path_token, first_arg.last_child()])
             else:
                 command = Tree("command", [path_token])
-                when.service_fragment.children.insert(0, command)
+                when.service_fragment.insert(command)
             return cls.create_when_block(
                 service_name=name_token,
                 fragment=when.service_fragment,
@@ -334,8 +359,8 @@ class Transformer(LarkTransformer):
             )
 
         # concise when which needs to wrapped in a service block
-        when.children.pop(0)
-        when.data = "service"
+        when.set_children(when.children[1:])
+        when.rename("service")
         return Tree(
             "concise_when_block",
             [
@@ -369,7 +394,7 @@ class Transformer(LarkTransformer):
         if len(matches) > 1:
             if matches[1].data == "indented_typed_arguments":
                 for argument in matches.pop(1).find_data("typed_argument"):
-                    matches[0].children.append(argument)
+                    matches[0].append(argument)
                 matches[-1] = Tree("nested_block", [matches[-1]])
 
         return Tree("function_block", matches)
@@ -431,7 +456,7 @@ class Transformer(LarkTransformer):
             )
             if path is not None:
                 # shorthand syntax for arguments (:name)
-                tree.children = [path.child(0), tree.children[0]]
+                tree.set_children([path.child(0), tree.children[0]])
 
     @classmethod
     def expression_rewrite(cls, expr, matches):
@@ -537,7 +562,7 @@ class Transformer(LarkTransformer):
             for match in matches[1:]:
                 if match.data == "arguments":
                     # append its arguments (if available)
-                    tree.children[1].children.append(match)
+                    tree.children[1].append(match)
                 else:
                     assert match.data == "mutation"
                     tree = Tree(
@@ -592,9 +617,9 @@ class Transformer(LarkTransformer):
         """
         Save line/column information from OSB `[` or OCB `{` tokens.
         """
-        t._line = matches[0].line
-        t._column = matches[0].column
-        t._end_column = matches[-1].end_column
+        t.set_position(
+            matches[0].line, matches[0].column, matches[-1].end_column
+        )
 
     @classmethod
     def list_type(cls, matches):
@@ -3,26 +3,95 @@ from lark.lexer import Token
 from lark.tree import Tree as LarkTree
 
 from .Position import Position
+from ..WorkStack import WorkStack
 from ..exceptions import CompilerError
 
 
+def _modifies(method):
+    """
+    Wraps a list method, s.t. calling it invalidates the tree caches.
+    """
+
+    def modify(self, *args):
+        Tree._generation += 1
+        return method(self, *args)
+
+    modify.__name__ = method.__name__
+    return modify
+
+
+class Children(list):
+    """
+    The children of a tree. Modifying them in place invalidates the cached
+    child indexes and positions, like the modifying methods of Tree do.
+    """
+
+    __setitem__ = _modifies(list.__setitem__)
+    __delitem__ = _modifies(list.__delitem__)
+    __iadd__ = _modifies(list.__iadd__)
+    __imul__ = _modifies(list.__imul__)
+    append = _modifies(list.append)
+    extend = _modifies(list.extend)
+    insert = _modifies(list.insert)
+    pop = _modifies(list.pop)
+    remove = _modifies(list.remove)
+    clear = _modifies(list.clear)
+    reverse = _modifies(list.reverse)
+
+    def sort(self, *, key=None, reverse=False):
+        Tree._generation += 1
+        list.sort(self, key=key, reverse=reverse)
+
+
 class Tree(LarkTree):
     """
     Wraps the original Tree class from lark, providing many useful
     enhancements.
     """
 
+    # incremented whenever a tree is modified, invalidating the cached
+    # child indexes and positions
+    _generation = 0
+
+    def __setattr__(self, name, value):
+        """
+        Stores assigned children as `Children`, s.t. any later modification
+        of them invalidates the tree caches. Replacing the children of an
+        existing tree invalidates them too.
+        """
+        if name == "children":
+            if not isinstance(value, Children):
+                value = Children(value)
+            if "children" in self.__dict__:
+                Tree._generation += 1
+        super().__setattr__(name, value)
+
+    def child_index(self):
+        """
+        Returns a mapping of rule names to the first child tree with this
+        name. The index is built lazily and rebuilt after any tree has
+        changed.
+        """
+        index = self.__dict__.get("_index")
+        if index is not None and index[0] == Tree._generation:
+            return index[1]
+        names = {}
+        for item in self.children:
+            if isinstance(item, Tree) and item.data not in names:
+                names[item.data] = item
+        self.__dict__["_index"] = (Tree._generation, names)
+        return names
+
     @staticmethod
     def walk(tree, path):
-        for item in tree.children:
-            if isinstance(item, Tree):
-                if item.data == path:
-                    return item
+        return tree.child_index().get(path)
 
     def node(self, path):
         """
         Finds a subtree or a nested subtree, using path
         """
+        if "." not in path:
+            return self.walk(self, path)
         shards = path.split(".")
         current = None
         for shard in shards:
@@ -71,38 +140,83 @@ class Tree(LarkTree):
 
     def find_first_token(self, reverse=False):
         """
-        Finds the first token in a tree
+        Finds the first token in a tree. The children left to search are
+        kept on a stack, s.t. deep trees don't exceed the recursion limit.
         """
         childs = self.children
         if reverse:
             childs = reversed(childs)
-        for child in childs:
-            if isinstance(child, Token):
-                return child
-            t = child.find_first_token(reverse=False)
-            if t is not None:
-                return t
+        stack = [iter(childs)]
+        while stack:
+            for child in stack[-1]:
+                if isinstance(child, Token):
+                    return child
+                stack.append(iter(child.children))
+                break
+            else:
+                stack.pop()
 
-    def _find_position(self, position, reverse=False):
+    def _position_sources(self):
         """
-        Finds the request positional attribute of a tree, by recursively
-        searching for the first tree node or token with the requested
-        positional attribute.
+        Returns the cached position sources of the tree, which are dropped
+        when any tree is modified.
         """
-        childs = self.children
-        if reverse:
-            childs = reversed(childs)
+        cache = self.__dict__.get("_positions")
+        if cache is None or cache[0] != Tree._generation:
+            cache = (Tree._generation, {})
+            self.__dict__["_positions"] = cache
+        return cache[1]
+
+    def _position_source(self, position, reverse=False):
+        """
+        Returns the first token or tree node with the requested positional
+        attribute. The results are cached until any tree is modified.
+        """
+        sources = self._position_sources()
+        key = (position, reverse)
+        if key in sources:
+            return sources[key]
+        return WorkStack.run(self._position_task(position, reverse))
+
+    def _position_task(self, position, reverse):
+        """
+        Searches the position source of a tree as a task of a work stack,
+        which yields the tasks of the subtrees, s.t. deep trees don't exceed
+        the recursion limit.
+        """
+        sources = self._position_sources()
+        key = (position, reverse)
+        if key in sources:
+            return sources[key]
+
+        source = None
+        children = self.children
+        childs = reversed(children) if reverse else children
         for child in childs:
-            if isinstance(child, Token):
-                return str(getattr(child, position))
-            t = child._find_position(position, reverse=reverse)
-            if t is not None:
-                return t
+            if not isinstance(child, Tree):
+                source = child
+                break
+            source = yield child._position_task(position, reverse)
+            if source is not None:
+                break
+        else:
+            if getattr(self, f"_{position}", None) is not None:
+                source = self
+        sources[key] = source
+        return source
 
-        node_pos = getattr(self, f"_{position}", None)
-        if node_pos is not None:
-            return str(node_pos)
-        return None
+    def _find_position(self, position, reverse=False):
+        """
+        Finds the request positional attribute of a tree, by searching for
+        the first tree node or token with the requested positional
+        attribute.
+        """
+        source = self._position_source(position, reverse=reverse)
+        if source is None:
+            return None
+        if isinstance(source, Token):
+            return str(getattr(source, position))
+        return str(getattr(source, f"_{position}"))
 
     def line(self):
         """
@@ -133,17 +247,48 @@ class Tree(LarkTree):
         end_column = self.end_column()
         return Position(line, column, end_column)
 
+    def set_position(self, line, column=None, end_column=None):
+        """
+        Sets the position of a tree, which is used if its subtree doesn't
+        contain tokens.
+        """
+        self._line = line
+        if column is not None:
+            self._column = column
+        if end_column is not None:
+            self._end_column = end_column
+        Tree._generation += 1
+
     def insert(self, item):
         """
         Inserts an item into the current tree.
         """
         self.children.insert(0, item)
 
+    def append(self, item):
+        """
+        Appends an item to the current tree.
+        """
+        self.children.append(item)
+
+    def remove(self, item):
+        """
+        Removes an item from the current tree.
+        """
+        self.children.remove(item)
+
+    def set_children(self, children):
+        """
+        Replaces all children of the current tree.
+        """
+        self.children = children
+
     def rename(self, new_name):
         """
         Renames the current tree
         """
         self.data = new_name
+        Tree._generation += 1
 
     def replace(self, index, item):
         """
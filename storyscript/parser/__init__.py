@@ -1,6 +1,7 @@
 from .Ebnf import Ebnf
 from .Grammar import Grammar
 from .Indenter import CustomIndenter
+from .LarkCache import LarkCache
 from .Parser import Parser
 from .Position import Position
 from .Transformer import Transformer
@@ -11,6 +12,7 @@ __all__ = [
     "CustomIndenter",
     "Ebnf",
     "Grammar",
+    "LarkCache",
     "Parser",
     "Position",
     "Transformer",
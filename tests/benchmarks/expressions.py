@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""
+Stress tests the compiler with expressions nested thousands of levels deep,
+like the conditions and arithmetic chains of generated stories. They must
+compile and format without raising the recursion limit.
+
+    python -m tests.benchmarks.expressions
+    python -m tests.benchmarks.expressions --depths 1000 10000
+"""
+
+import argparse
+import sys
+import time
+
+from pytest import fixture, mark
+
+from storyhub.sdk.ServiceWrapper import ServiceWrapper
+
+from storyscript.Features import Features
+from storyscript.Story import Story
+from storyscript.parser import Parser
+
+from tests.benchmarks.runner import hub_fixtures_file
+
+
+def arithmetic(depth):
+    """
+    A left-nested arithmetic chain.
+    """
+    return "a = " + " + ".join(str(i) for i in range(depth))
+
+
+def conditions(depth):
+    """
+    A boolean condition comparing a variable with many values.
+    """
+    terms = " or ".join(f"b == {i}" for i in range(depth))
+    return f"b = 1\na = {terms}"
+
+
+def if_condition(depth):
+    """
+    An if statement with a long condition.
+    """
+    terms = " and ".join(f"b == {i}" for i in range(depth))
+    return f"b = 1\nif {terms}\n    c = 1"
+
+
+def while_condition(depth):
+    """
+    A while loop with a long condition.
+    """
+    terms = " and ".join(f"b == {i}" for i in range(depth))
+    return f"b = 1\nwhile {terms}\n    c = 1"
+
+
+def call_argument(depth):
+    """
+    A function call with an arithmetic chain as argument.
+    """
+    terms = " + ".join(str(i) for i in range(depth))
+    return f"function f x: int returns int\n    return x\ny = f(x: {terms})"
+
+
+def string_template(depth):
+    """
+    A string template with an arithmetic chain as code.
+    """
+    terms = " + ".join(str(i) for i in range(depth))
+    return f'a = "{{{terms}}}"'
+
+
+def parentheses(depth):
+    """
+    Right-nested arithmetic in parentheses.
+    """
+    return "a = " + "(1 * " * depth + "1" + ")" * depth
+
+
+def negations(depth):
+    """
+    Repeated unary operators.
+    """
+    return "a = " + "not " * depth + "true"
+
+
+def casts(depth):
+    """
+    Nested type casts.
+    """
+    return "a = " + "(1 to string + " * depth + '""' + ")" * depth
+
+
+shapes = {
+    "arithmetic": arithmetic,
+    "conditions": conditions,
+    "if_condition": if_condition,
+    "while_condition": while_condition,
+    "call_argument": call_argument,
+    "string_template": string_template,
+    "parentheses": parentheses,
+    "negations": negations,
+    "casts": casts,
+}
+
+
+def compile_story(source, parser, hub):
+    """
+    Compiles and formats a story, returning the time of both.
+    """
+    start = time.perf_counter()
+    Story(source, features=Features(None), hub=hub).process(parser=parser)
+    compiled = time.perf_counter()
+    Story(source, features=Features(None)).parse(parser=parser).format()
+    return compiled - start, time.perf_counter() - compiled
+
+
+def main(args=None):
+    argparser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    argparser.add_argument(
+        "--depths", type=int, nargs="*", default=[1000, 5000, 10000]
+    )
+    options = argparser.parse_args(args)
+
+    parser = Parser()
+    hub = ServiceWrapper.from_json_file(hub_fixtures_file)
+    for name, shape in shapes.items():
+        for depth in options.depths:
+            compile_time, format_time = compile_story(
+                shape(depth), parser, hub
+            )
+            print(
+                f"{name:15} {depth:8} {compile_time:10.3f}s compile "
+                f"{format_time:10.3f}s format"
+            )
+    return 0
+
+
+@fixture(scope="module")
+def hub():
+    return ServiceWrapper.from_json_file(hub_fixtures_file)
+
+
+@mark.parametrize("shape", shapes.keys())
+def test_benchmark_expressions(hub, shape):
+    """
+    Ensures expressions deeper than the recursion limit compile.
+    """
+    limit = sys.getrecursionlimit()
+    compile_story(shapes[shape](limit * 3), Parser(), hub)
+    assert sys.getrecursionlimit() == limit
+
+
+if __name__ == "__main__":
+    sys.exit(main())
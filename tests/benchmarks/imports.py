@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the import time of the command line and the modules it loads.
+Lightweight commands must not import the compiler or the hub sdk.
+
+    python -m tests.benchmarks.imports
+    python -m tests.benchmarks.imports --module storyscript.App
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+
+from pytest import mark
+
+# modules which only the commands processing stories may import
+heavy_modules = [
+    "lark",
+    "storyhub.sdk",
+    "storyscript.App",
+    "storyscript.compiler",
+    "storyscript.parser",
+]
+
+
+def loaded_modules(code):
+    """
+    Runs code in a new interpreter and returns the modules it loaded.
+    """
+    script = f"{code}\nimport json, sys\nprint(json.dumps(list(sys.modules)))"
+    output = subprocess.check_output([sys.executable, "-c", script])
+    return json.loads(output.decode("utf-8").splitlines()[-1])
+
+
+def import_time(module, repeat):
+    """
+    Returns the best cumulative import time of a module in seconds.
+    """
+    best = None
+    for i in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            stderr=subprocess.PIPE,
+            check=True,
+        ).stderr.decode("utf-8")
+        # the last line is the module itself, times are in microseconds
+        time = int(output.splitlines()[-1].split("|")[1]) / 1e6
+        if best is None or time < best:
+            best = time
+    return best
+
+
+def main(args=None):
+    argparser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    argparser.add_argument("--module", default="storyscript.Cli")
+    argparser.add_argument("--repeat", type=int, default=5)
+    options = argparser.parse_args(args)
+
+    time = import_time(options.module, options.repeat)
+    print(f"{options.module:30} {time:10.3f}s")
+    modules = loaded_modules(f"import {options.module}")
+    for heavy in heavy_modules:
+        if heavy in modules:
+            print(f"{options.module} imports {heavy}")
+    return 0
+
+
+@mark.parametrize(
+    "code",
+    [
+        "import storyscript",
+        "import storyscript.Cli",
+        "from storyscript.Cli import Cli",
+    ],
+)
+def test_benchmark_imports(code):
+    """
+    Ensures the command line doesn't import the compiler on startup.
+    """
+    modules = loaded_modules(code)
+    for heavy in heavy_modules:
+        assert heavy not in modules
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks the compiler on the e2e corpus and on synthetic stories.
+Reports the throughput of each compiler phase in stories/s and lines/s.
+
+    python -m tests.benchmarks.runner --output results.json
+    python -m tests.benchmarks.runner --compare results.json
+"""
+
+import argparse
+import io
+import json
+import platform
+import sys
+from glob import glob
+from os import path
+
+from bom_open import bom_open
+
+from pytest import fixture, mark
+
+from storyhub.sdk.ServiceWrapper import ServiceWrapper
+
+from storyscript.Features import Features
+from storyscript.Profiler import Profiler
+from storyscript.Story import Story
+from storyscript.Version import version
+from storyscript.parser import Parser
+
+from tests.benchmarks.stories import generators
+from tests.e2e.utils.Features import parse_features
+
+test_dir = path.dirname(path.dirname(path.realpath(__file__)))
+e2e_dir = path.join(test_dir, "e2e")
+hub_fixtures_file = path.join(test_dir, "fixtures", "hub_fixture.json.fixed")
+
+features = {"globals": True}
+sizes = [1000, 5000, 10000, 50000]
+
+
+def e2e_stories():
+    """
+    Returns the e2e stories which compile successfully.
+    """
+    stories = {}
+    for story_path in sorted(
+        glob(path.join(e2e_dir, "**", "*.story"), recursive=True)
+    ):
+        if not path.isfile(path.splitext(story_path)[0] + ".json"):
+            continue
+        with bom_open(story_path, "r") as f:
+            stories[path.relpath(story_path, e2e_dir)] = f.read()
+    return stories
+
+
+def synthetic_stories(sizes):
+    """
+    Returns a suite of synthetic stories for each generator and size.
+    """
+    suites = {}
+    for name, generator in generators.items():
+        for size in sizes:
+            suites[f"{name}-{size}"] = {f"{name}.story": generator(size)}
+    return suites
+
+
+def compile_suite(stories, parser, hub):
+    """
+    Compiles a suite of stories once, returning the time of each phase.
+    """
+    profiler = Profiler(memory=False)
+    for name, source in stories.items():
+        story = Story(
+            source,
+            features=Features(parse_features(features, source)),
+            path=name,
+            hub=hub,
+            profiler=profiler,
+        )
+        story.process(parser=parser)
+    return {
+        phase: stats["time"]
+        for phase, stats in profiler.report()["phases"].items()
+    }
+
+
+def measure(stories, parser, hub, repeat):
+    """
+    Measures the throughput of each phase. The fastest of all repetitions
+    is used, as it is the least disturbed by other processes.
+    """
+    times = {}
+    for i in range(repeat):
+        for phase, time in compile_suite(stories, parser, hub).items():
+            times[phase] = min(times.get(phase, time), time)
+    times["total"] = sum(times.values())
+    count = len(stories)
+    lines = sum(len(source.splitlines()) for source in stories.values())
+    phases = {}
+    for phase, time in times.items():
+        phases[phase] = {
+            "time": time,
+            "stories_per_second": count / time if time else None,
+            "lines_per_second": lines / time if time else None,
+        }
+    return {"stories": count, "lines": lines, "phases": phases}
+
+
+def run(suites, repeat=3):
+    """
+    Benchmarks all suites, returning the results.
+    """
+    parser = Parser()
+    hub = ServiceWrapper.from_json_file(hub_fixtures_file)
+    results = {}
+    for name, stories in suites.items():
+        print(f"Benchmarking {name}...", file=sys.stderr)
+        results[name] = measure(stories, parser, hub, repeat)
+    return {
+        "version": version,
+        "python": platform.python_version(),
+        "repeat": repeat,
+        "suites": results,
+    }
+
+
+def compare(baseline, results, threshold):
+    """
+    Compares the results with a baseline, returning the lines of the report
+    and whether a phase of a suite regressed by more than the threshold.
+    """
+    report = []
+    regressed = False
+    for name, suite in results["suites"].items():
+        base = baseline["suites"].get(name)
+        if base is None:
+            continue
+        for phase, stats in suite["phases"].items():
+            if (
+                phase not in base["phases"]
+                or not base["phases"][phase]["time"]
+            ):
+                continue
+            change = stats["time"] / base["phases"][phase]["time"] - 1
+            marker = ""
+            if change > threshold:
+                marker = " REGRESSION"
+                regressed = True
+            report.append(f"{name:30} {phase:20} {change:+8.1%}{marker}")
+    return report, regressed
+
+
+def main(args=None):
+    argparser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    argparser.add_argument("--output", help="Write the results to a file.")
+    argparser.add_argument("--compare", help="Compare with earlier results.")
+    argparser.add_argument("--threshold", type=float, default=0.1)
+    argparser.add_argument("--repeat", type=int, default=3)
+    argparser.add_argument("--sizes", type=int, nargs="*", default=sizes)
+    argparser.add_argument("--no-e2e", action="store_true")
+    options = argparser.parse_args(args)
+
+    suites = {}
+    if not options.no_e2e:
+        suites["e2e"] = e2e_stories()
+    suites.update(synthetic_stories(options.sizes))
+    results = run(suites, repeat=options.repeat)
+    for name, suite in results["suites"].items():
+        for phase, stats in suite["phases"].items():
+            print(
+                f"{name:30} {phase:20} {stats['time']:10.3f}s "
+                f"{stats['stories_per_second'] or 0:10.1f} stories/s "
+                f"{stats['lines_per_second'] or 0:12.1f} lines/s"
+            )
+    if options.output:
+        with io.open(options.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if options.compare:
+        with io.open(options.compare, "r") as f:
+            baseline = json.load(f)
+        report, regressed = compare(baseline, results, options.threshold)
+        print("\n".join(report))
+        return 1 if regressed else 0
+    return 0
+
+
+@fixture(scope="module")
+def hub():
+    return ServiceWrapper.from_json_file(hub_fixtures_file)
+
+
+@mark.parametrize("generator", generators.keys())
+def test_benchmark_stories(hub, generator):
+    """
+    Ensures the synthetic stories compile.
+    """
+    stories = {f"{generator}.story": generators[generator](40)}
+    times = compile_suite(stories, Parser(), hub)
+    assert "parse" in times and "json" in times
+
+
+def test_benchmark_compare():
+    baseline = {"suites": {"e2e": {"phases": {"parse": {"time": 1.0}}}}}
+    results = {"suites": {"e2e": {"phases": {"parse": {"time": 1.5}}}}}
+    report, regressed = compare(baseline, results, 0.1)
+    assert regressed is True
+    report, regressed = compare(baseline, results, 0.6)
+    assert regressed is False
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Generators of synthetic stories, which scale a single aspect of a story.
+Each generator returns the source of a valid story.
+"""
+
+
+def assignments(lines):
+    """
+    Straight-line assignments with arithmetic expressions.
+    """
+    source = ["a0 = 0"]
+    for i in range(1, lines):
+        source.append(f"a{i} = a{i - 1} + {i} * 2")
+    return "\n".join(source)
+
+
+def nesting(lines, depth=20):
+    """
+    Deeply nested `if` and `foreach` blocks.
+    """
+    source = ["items = [1, 2, 3]"]
+    while len(source) < lines:
+        for level in range(depth):
+            indent = "    " * level
+            if level % 2 == 0:
+                source.append(f"{indent}foreach items as item{level}")
+            else:
+                source.append(f"{indent}if item{level - 1} > {level}")
+        indent = "    " * depth
+        source.append(f"{indent}x = item{depth - 2} + 1")
+    return "\n".join(source)
+
+
+def collections(lines, width=50):
+    """
+    Wide maps and lists.
+    """
+    source = []
+    for i in range(lines):
+        if i % 2 == 0:
+            items = ", ".join(f'"k{j}": {j}' for j in range(width))
+            source.append(f"m{i} = {{{items}}}")
+        else:
+            items = ", ".join(str(j) for j in range(width))
+            source.append(f"l{i} = [{items}]")
+    return "\n".join(source)
+
+
+def string_templates(lines):
+    """
+    String templates with paths, expressions and index accesses.
+    """
+    source = ['name = "world"', "values = [1, 2, 3]"]
+    for i in range(2, lines):
+        source.append(f's{i} = "hello {{name}} {{values[0] + {i}}}"')
+    return "\n".join(source)
+
+
+def service_calls(lines):
+    """
+    Calls of services from the hub.
+    """
+    source = []
+    for i in range(lines):
+        if i % 2 == 0:
+            source.append(f"r{i} = random integer low: {i} high: {i + 10}")
+        else:
+            source.append(f"r{i} = random string length: {i}")
+    return "\n".join(source)
+
+
+generators = {
+    "assignments": assignments,
+    "nesting": nesting,
+    "collections": collections,
+    "string_templates": string_templates,
+    "service_calls": service_calls,
+}
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Measures the per-node overhead of dispatching tree nodes to the handlers
+of the compiler visitors, comparing attribute lookups with dispatch tables.
+
+    python -m tests.benchmarks.visitors
+    python -m tests.benchmarks.visitors --lines 5000
+"""
+
+import argparse
+import sys
+import timeit
+
+from pytest import mark
+
+from storyscript.Story import Story
+from storyscript.compiler.json.JSONCompiler import JSONCompiler
+from storyscript.compiler.pretty.PrettyPrinter import PrettyPrinter
+from storyscript.compiler.semantics.FlowAnalyzer import FlowAnalyzer
+from storyscript.compiler.semantics.FunctionResolver import FunctionResolver
+from storyscript.compiler.semantics.TypeResolver import TypeResolver
+
+from tests.benchmarks.stories import generators
+
+visitors = [
+    FlowAnalyzer,
+    FunctionResolver,
+    TypeResolver,
+    JSONCompiler,
+    PrettyPrinter,
+]
+
+
+def nodes(lines):
+    """
+    Returns the rules of all nodes of synthetic stories.
+    """
+    rules = []
+    for generator in generators.values():
+        story = Story(generator(lines), features={}).parse(parser=None)
+        rules.extend(tree.data for tree in story.tree.iter_subtrees())
+    return rules
+
+
+def visitor(cls):
+    # dispatching only needs the handlers of a visitor
+    return cls.__new__(cls)
+
+
+def loop(instance, rules):
+    for rule in rules:
+        pass
+
+
+def attribute_dispatch(instance, rules):
+    """
+    Looks the handlers up like the visitors did: the semantic visitors with
+    hasattr and getattr, the backends in a list built for every node.
+    """
+    allowed_nodes = type(instance).dispatch_rules
+    if allowed_nodes is None:
+        for rule in rules:
+            if hasattr(instance, rule):
+                getattr(instance, rule)
+        return
+    for rule in rules:
+        if rule in list(allowed_nodes):
+            getattr(instance, rule, None)
+
+
+def table_dispatch(instance, rules):
+    handlers = instance.handlers
+    for rule in rules:
+        handlers.get(rule)
+
+
+def best_time(dispatch, instance, rules, repeat):
+    return min(
+        timeit.repeat(
+            lambda: dispatch(instance, rules), number=1, repeat=repeat
+        )
+    )
+
+
+def measure(cls, rules, repeat):
+    """
+    Returns the overhead per node of both dispatches in nanoseconds, i.e.
+    without the time of the loop itself.
+    """
+    instance = visitor(cls)
+    base = best_time(loop, instance, rules, repeat)
+    return [
+        (best_time(dispatch, instance, rules, repeat) - base)
+        / len(rules)
+        * 1e9
+        for dispatch in (attribute_dispatch, table_dispatch)
+    ]
+
+
+def main(args=None):
+    argparser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    argparser.add_argument("--lines", type=int, default=1000)
+    argparser.add_argument("--repeat", type=int, default=5)
+    options = argparser.parse_args(args)
+
+    rules = nodes(options.lines)
+    print(f"{len(rules)} nodes")
+    for cls in visitors:
+        attribute, table = measure(cls, rules, options.repeat)
+        print(
+            f"{cls.__name__:20} {attribute:8.1f}ns/node (lookup) "
+            f"{table:8.1f}ns/node (table)"
+        )
+    return 0
+
+
+@mark.parametrize("cls", visitors)
+def test_benchmark_visitors(cls):
+    """
+    Ensures the dispatch tables find the handlers of all visited nodes.
+    """
+    instance = visitor(cls)
+    for rule in set(nodes(20)):
+        if cls.dispatch_rules is None:
+            assert (rule in instance.handlers) == hasattr(instance, rule)
+        else:
+            assert (rule in instance.handlers) == (rule in cls.dispatch_rules)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -370,3 +370,16 @@ def test_compiler_pretty_print_format_nested_story2():
       x = 0 to float
 """
     ) == result
+
+
+def test_compiler_pretty_print_format_writer():
+    """
+    Ensures that streaming the output yields the same story as joining it.
+    """
+    source = "\n\nfunction f a:int returns int\n  return a\n\nb=f(a:1)\n\n"
+    story = Story(source, features={}).parse(parser=None)
+    chunks = []
+    assert story.format(writer=chunks.append) is None
+    assert "".join(chunks) == story.format()
+    assert not chunks[0].startswith("\n")
+    assert not chunks[-1].endswith("\n")
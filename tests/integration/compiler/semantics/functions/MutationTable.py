@@ -4,7 +4,13 @@ from storyscript.compiler.semantics.functions.HubMutations import Hub
 from storyscript.compiler.semantics.functions.MutationTable import (
     MutationTable,
 )
-from storyscript.compiler.semantics.types.Types import BooleanType, IntType
+from storyscript.compiler.semantics.types.GenericTypes import ListType
+from storyscript.compiler.semantics.types.Types import (
+    AnyType,
+    BooleanType,
+    IntType,
+    StringType,
+)
 
 
 @mark.parametrize(
@@ -49,3 +55,53 @@ def test_desc(mocker):
     fn = mut.instantiate(IntType.instance())
     arg_a = fn.args()["a"]
     assert arg_a.desc() == "Dummy arg"
+
+
+def test_resolve_cache(mocker):
+    """
+    Ensures resolved mutations are cached by type and name
+    """
+    builtins = [
+        {
+            "name": "length",
+            "input_type": "List[A]",
+            "return_type": "int",
+            "desc": "",
+            "args": {},
+        },
+    ]
+    mocker.patch.object(Hub, "instance", return_value=Hub(builtins))
+    mt = MutationTable.init()
+    int_list = ListType(IntType.instance())
+    string_list = ListType(StringType.instance())
+    first = mt.resolve(int_list, "length")
+    second = mt.resolve(string_list, "length")
+    assert first.type() == int_list
+    assert second.type() == string_list
+    assert second.all() is first.all()
+    assert mt.resolve(IntType.instance(), "length") is None
+    assert mt.resolve(IntType.instance(), "length") is None
+    assert mt.resolve(AnyType.instance(), "length").single() is not None
+    assert mt.cache_info() == {"hits": 2, "misses": 3, "size": 3}
+
+
+def test_resolve_cache_insert(mocker):
+    """
+    Ensures inserting a mutation invalidates the resolution cache
+    """
+    mocker.patch.object(Hub, "instance", return_value=Hub([]))
+    mt = MutationTable.init()
+    assert mt.resolve(IntType.instance(), "increment") is None
+    hub = Hub(
+        [
+            {
+                "name": "increment",
+                "input_type": "int",
+                "return_type": "int",
+                "desc": "",
+                "args": {},
+            }
+        ]
+    )
+    mt.insert(hub.mutations()[0])
+    assert mt.resolve(IntType.instance(), "increment").single() is not None
@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
+from os import path
+
 from lark.lexer import Token
 
 from pytest import mark
 
 from storyscript.Story import _parser
 from storyscript.compiler.lowering.Lowering import Lowering
-from storyscript.parser import Tree
+from storyscript.parser import Parser, Tree
 
 
 def parse(source, lower=False):
@@ -273,3 +275,22 @@ def test_parser_string_double_quoted():
     ar_exp = arith_exp(result)
     lhs = get_entity(ar_exp).values.string.child(0)
     assert lhs == r'"b\n.\\.\".c"'
+
+
+def test_parser_custom_grammar(tmpdir):
+    """
+    Ensures grammars without an entry point for single expressions can
+    still parse and lower string templates
+    """
+    grammar_file = path.join(path.dirname(__file__), "grammar.lark")
+    with open(grammar_file, "r") as f:
+        grammar = f.read().replace("expression_start:", "unused_start:")
+    ebnf = tmpdir.join("grammar.lark")
+    ebnf.write(grammar)
+    parser = Parser(ebnf=str(ebnf), cache=False)
+    assert parser.parses_expressions() is False
+    tree = parser.parse('a = "{1 + 2}"\n')
+    tree = Lowering(parser=parser, features={}).process(tree)
+    assignment = tree.block.assignment
+    assert assignment.path.child(0) == "__p-1.1"
+    assert assignment.find("arith_operator")[0].child(0) == "+"
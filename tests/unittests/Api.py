@@ -72,13 +72,22 @@ def test_api_load_map(patch, magic):
     api_loaded = Api.load_map(files)
     result = api_loaded.result()
     deprecations = api_loaded.deprecations()
-    Bundle.__init__.assert_called_with(story_files=files, features=ANY)
+    Bundle.__init__.assert_called_with(
+        story_files=files, features=ANY, hub=None
+    )
     assert isinstance(Bundle.__init__.call_args[1]["features"], Features)
     Bundle.bundle.assert_called()
     assert result == Bundle.bundle().results
     assert deprecations == Bundle.bundle().deprecations
 
 
+def test_api_load_map_hub(patch):
+    patch.init(Bundle)
+    patch.object(Bundle, "bundle")
+    Api.load_map({}, hub="hub")
+    Bundle.__init__.assert_called_with(story_files={}, features=ANY, hub="hub")
+
+
 def test_api_loads_internal_error(patch):
     """
     Ensures Api.loads handles unknown errors
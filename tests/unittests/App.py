@@ -1,12 +1,23 @@
 # -*- coding: utf-8 -*-
 import json
+import os
 
 from pytest import fixture, raises
 
+from storyhub.sdk.ServiceWrapper import ServiceWrapper
+
 import storyscript.App as AppModule
 from storyscript.App import App, Compiled
 from storyscript.Bundle import Bundle
+from storyscript.CompileCache import CompileCache
+from storyscript.FormatCache import FormatCache
+from storyscript.Formatter import Formatter
+from storyscript.JsonWriter import JsonWriter
+from storyscript.PackedBundle import PackedBundle
+from storyscript.Story import Story
+from storyscript.compiler.binary import BinaryEncoder
 from storyscript.exceptions import StoryError
+from storyscript.hub.HubSnapshot import HubSnapshot
 from storyscript.parser import Grammar
 
 
@@ -63,9 +74,14 @@ def test_app_compile(patch, bundle):
     patch.object(json, "dumps")
     result = App.compile("path")
     Bundle.from_path.assert_called_with(
-        "path", ignored_path=None, features=None
+        "path",
+        ignored_path=None,
+        features=None,
+        cache=None,
+        profiler=None,
+        hub=None,
     )
-    Bundle.from_path().bundle.assert_called_with(ebnf=None)
+    Bundle.from_path().bundle.assert_called_with(ebnf=None, workers=None)
     json.dumps.assert_called_with(
         Bundle.from_path().bundle().results, indent=2
     )
@@ -80,9 +96,14 @@ def test_app_compile_concise(patch, bundle):
     patch.object(AppModule, "_clean_dict")
     result = App.compile("path", concise=True)
     Bundle.from_path.assert_called_with(
-        "path", ignored_path=None, features=None
+        "path",
+        ignored_path=None,
+        features=None,
+        cache=None,
+        profiler=None,
+        hub=None,
     )
-    Bundle.from_path().bundle.assert_called_with(ebnf=None)
+    Bundle.from_path().bundle.assert_called_with(ebnf=None, workers=None)
     AppModule._clean_dict.assert_called_with(
         Bundle.from_path().bundle().results
     )
@@ -97,7 +118,12 @@ def test_app_compile_ignored_path(patch, bundle):
     patch.object(json, "dumps")
     App.compile("path", ignored_path="ignored")
     Bundle.from_path.assert_called_with(
-        "path", ignored_path="ignored", features=None
+        "path",
+        ignored_path="ignored",
+        features=None,
+        cache=None,
+        profiler=None,
+        hub=None,
     )
 
 
@@ -107,7 +133,45 @@ def test_app_compile_ebnf(patch, bundle):
     """
     patch.object(json, "dumps")
     App.compile("path", ebnf="ebnf")
-    Bundle.from_path().bundle.assert_called_with(ebnf="ebnf")
+    Bundle.from_path().bundle.assert_called_with(ebnf="ebnf", workers=None)
+
+
+def test_app_compile_workers(patch, bundle):
+    """
+    Ensures App.compile passes the number of workers to the bundle
+    """
+    patch.object(json, "dumps")
+    App.compile("path", workers=4)
+    Bundle.from_path().bundle.assert_called_with(ebnf=None, workers=4)
+
+
+def test_app_compile_cache(patch, bundle):
+    """
+    Ensures App.compile can use the compile cache
+    """
+    patch.object(json, "dumps")
+    patch.init(CompileCache)
+    App.compile("path", cache=True)
+    cache = Bundle.from_path.call_args[1]["cache"]
+    assert isinstance(cache, CompileCache)
+
+
+def test_app_compile_profiler(patch, bundle):
+    """
+    Ensures App.compile passes the profiler to the bundle
+    """
+    patch.object(json, "dumps")
+    App.compile("path", profiler="profiler")
+    assert Bundle.from_path.call_args[1]["profiler"] == "profiler"
+
+
+def test_app_compile_hub(patch, bundle):
+    """
+    Ensures App.compile passes the hub to the bundle
+    """
+    patch.object(json, "dumps")
+    App.compile("path", hub="hub")
+    assert Bundle.from_path.call_args[1]["hub"] == "hub"
 
 
 def test_app_compile_first(patch, bundle):
@@ -120,9 +184,14 @@ def test_app_compile_first(patch, bundle):
     patch.object(json, "dumps")
     result = App.compile("path", first=True)
     Bundle.from_path.assert_called_with(
-        "path", ignored_path=None, features=None
+        "path",
+        ignored_path=None,
+        features=None,
+        cache=None,
+        profiler=None,
+        hub=None,
     )
-    Bundle.from_path().bundle.assert_called_with(ebnf=None)
+    Bundle.from_path().bundle.assert_called_with(ebnf=None, workers=None)
     json.dumps.assert_called_with(42, indent=2)
     assert result == (json.dumps(), {"my_story": []})
 
@@ -132,7 +201,12 @@ def test_app_compile_first_error(patch, bundle):
     Ensures that the App throws an error for --first with more than one story
     """
     Bundle.from_path().bundle.return_value = Compiled(
-        results={"stories": {"my_story": 42, "another_story": 43,}},
+        results={
+            "stories": {
+                "my_story": 42,
+                "another_story": 43,
+            }
+        },
         deprecations={"my_story": [], "another_story": []},
     )
     patch.object(json, "dumps")
@@ -144,9 +218,150 @@ def test_app_compile_first_error(patch, bundle):
         "if one story is complied."
     )
     Bundle.from_path.assert_called_with(
-        "path", ignored_path=None, features=None
+        "path",
+        ignored_path=None,
+        features=None,
+        cache=None,
+        profiler=None,
+        hub=None,
     )
-    Bundle.from_path().bundle.assert_called_with(ebnf=None)
+    Bundle.from_path().bundle.assert_called_with(ebnf=None, workers=None)
+
+
+def test_app_compile_packed(patch, bundle):
+    patch.object(PackedBundle, "pack")
+    result = App.compile("path", packed=True)
+    PackedBundle.pack.assert_called_with(Bundle.from_path().bundle().results)
+    assert result == Compiled(
+        results=PackedBundle.pack(),
+        deprecations=Bundle.from_path().bundle().deprecations,
+    )
+
+
+def test_app_compile_packed_first(patch, bundle):
+    with raises(StoryError) as e:
+        App.compile("path", packed=True, first=True)
+    assert e.value.message().startswith("E0162: The option `--packed`")
+
+
+def test_app_compile_compact(patch, bundle):
+    patch.object(json, "dumps")
+    App.compile("path", compact=True)
+    json.dumps.assert_called_with(
+        Bundle.from_path().bundle().results, indent=None
+    )
+
+
+def test_app_compile_binary(patch, bundle):
+    patch.object(BinaryEncoder, "encode")
+    result = App.compile("path", output_format="binary")
+    BinaryEncoder.encode.assert_called_with(
+        Bundle.from_path().bundle().results
+    )
+    assert result == Compiled(
+        results=BinaryEncoder.encode(),
+        deprecations=Bundle.from_path().bundle().deprecations,
+    )
+
+
+def test_app_stream(patch, magic, bundle):
+    """
+    Ensures App.stream writes the stories while they are compiled
+    """
+    stories = [
+        ("a.story", {"services": ["b", "a"], "tree": {}}),
+        ("b.story", {"services": ["a"], "tree": {}}),
+    ]
+    Bundle.from_path().stream.return_value = iter(stories)
+    Bundle.from_path().find_stories.return_value = ["a.story", "b.story"]
+    patch.init(JsonWriter)
+    patch.many(JsonWriter, ["story", "end"])
+    output = magic()
+    patch.object(App, "output")
+    App.output.return_value.__enter__.return_value = output
+    result = App.stream("path", concise=True)
+    Bundle.from_path.assert_called_with(
+        "path",
+        ignored_path=None,
+        features=None,
+        cache=None,
+        profiler=None,
+        hub=None,
+    )
+    Bundle.from_path().stream.assert_called_with(ebnf=None)
+    App.output.assert_called_with(None)
+    JsonWriter.__init__.assert_called_with(output, indent=2, concise=True)
+    JsonWriter.story.assert_called_with("b.story", {"services": ["a"]})
+    JsonWriter.end.assert_called_with(["a", "b"], ["a.story", "b.story"])
+    output.write.assert_called_with("\n")
+    assert result == Bundle.from_path().deprecations
+
+
+def test_app_stream_workers(patch, bundle):
+    """
+    Ensures App.stream compiles all stories first with several workers
+    """
+    results = {"stories": {"a.story": {"services": []}}}
+    Bundle.from_path().bundle.return_value = Compiled(results, {})
+    patch.many(JsonWriter, ["story", "end"])
+    patch.object(App, "output")
+    App.stream("path", "out.json", compact=True, workers=2)
+    Bundle.from_path().bundle.assert_called_with(ebnf=None, workers=2)
+    Bundle.from_path().stream.assert_not_called()
+    App.output.assert_called_with("out.json")
+    JsonWriter.story.assert_called_with("a.story", {"services": []})
+
+
+def test_app_stream_file(tmpdir):
+    tmpdir.join("a.story").write("a = 1")
+    output = tmpdir.join("out.json")
+    with tmpdir.as_cwd():
+        expected = App.compile(".", compact=True).results
+        assert App.stream(".", str(output), compact=True) == {"a.story": []}
+    assert output.read() == expected
+
+
+def test_app_output_error(tmpdir):
+    """
+    Ensures App.output doesn't replace the output when writing it failed
+    """
+    path = tmpdir.join("output.json")
+    path.write("old")
+    with raises(StoryError):
+        with App.output(str(path)) as f:
+            f.write("new")
+            raise StoryError(None, None)
+    assert path.read() == "old"
+    assert tmpdir.listdir() == [path]
+
+
+def test_app_output_stdout(capsys):
+    with App.output(None) as f:
+        f.write("output")
+    assert capsys.readouterr().out == "output"
+
+
+def test_app_output_stdout_error(capsys):
+    """
+    Ensures App.output writes nothing to stdout when writing it failed
+    """
+    with raises(StoryError):
+        with App.output(None) as f:
+            f.write("output")
+            raise StoryError(None, None)
+    assert capsys.readouterr().out == ""
+
+
+def test_app_stream_error(tmpdir, capsys):
+    """
+    Ensures App.stream writes no partial JSON when a story fails
+    """
+    tmpdir.join("a.story").write("a = 1")
+    tmpdir.join("b.story").write("b = ")
+    with tmpdir.as_cwd():
+        with raises(StoryError):
+            App.stream(".")
+    assert capsys.readouterr().out == ""
 
 
 def test_app_lex(bundle):
@@ -161,6 +376,154 @@ def test_app_lex_ebnf(bundle):
     Bundle.from_path().lex.assert_called_with(ebnf="my.ebnf")
 
 
+def test_app_format(patch, magic):
+    patch.object(Bundle, "parser")
+    patch.object(Story, "from_file")
+    result = App.format("a.story", ebnf="ebnf", features="features")
+    Bundle.parser.assert_called_with(ebnf="ebnf")
+    Story.from_file.assert_called_with("a.story", features="features")
+    Story.from_file().parse.assert_called_with(parser=Bundle.parser())
+    assert result == Story.from_file().format()
+
+
+def test_app_format_inplace(tmpdir):
+    story = tmpdir.join("a.story")
+    story.write("a=1")
+    assert App.format(str(story), inplace=True) is None
+    assert story.read() == "a = 1"
+    assert tmpdir.listdir() == [story]
+
+
+def test_app_format_inplace_prefix(tmpdir):
+    """
+    Ensures App.format rewrites stories whose formatted output is a prefix
+    """
+    story = tmpdir.join("a.story")
+    story.write("a = 1\n")
+    App.format(str(story), inplace=True)
+    assert story.read() == "a = 1"
+
+
+def test_app_format_inplace_unchanged(patch, tmpdir):
+    """
+    Ensures App.format doesn't write stories which are formatted already
+    """
+    story = tmpdir.join("a.story")
+    story.write("a = 1\nb = 2")
+    patch.object(os, "replace")
+    App.format(str(story), inplace=True)
+    os.replace.assert_not_called()
+    assert tmpdir.listdir() == [story]
+
+
+def test_app_format_inplace_error(tmpdir):
+    """
+    Ensures App.format removes the temporary file if formatting fails
+    """
+    story = tmpdir.join("a.story")
+    story.write("a = 1")
+    parsed = Story("a = 1", features=None, path=str(story))
+    parsed.tree = None
+    with raises(Exception):
+        App.format_inplace(parsed)
+    assert tmpdir.listdir() == [story]
+
+
+def test_app_format_paths(patch):
+    patch.init(Formatter)
+    patch.many(Formatter, ["find", "format"])
+    patch.object(Formatter, "errors", ["error"], create=True)
+    result = App.format_paths(
+        "stories", ignored_path="ignored", inplace=True, workers=2
+    )
+    Formatter.__init__.assert_called_with(ebnf=None, features=None, cache=None)
+    Formatter.find.assert_called_with("stories", ignored_path="ignored")
+    Formatter.format.assert_called_with(
+        Formatter.find(), inplace=True, workers=2
+    )
+    assert result == (Formatter.format(), ["error"])
+
+
+def test_app_format_paths_cache(patch):
+    patch.init(Formatter)
+    patch.init(FormatCache)
+    patch.many(Formatter, ["find", "format"])
+    patch.object(Formatter, "errors", [], create=True)
+    App.format_paths("stories", cache=True)
+    cache = Formatter.__init__.call_args[1]["cache"]
+    assert isinstance(cache, FormatCache)
+
+
+def test_app_recompile(patch, magic):
+    patch.object(App, "results")
+    bundle = magic()
+    result = App.recompile(bundle, ["a.story"], [], ebnf="ebnf", first=True)
+    bundle.recompile.assert_called_with(["a.story"], [], ebnf="ebnf")
+    App.results.assert_called_with(
+        bundle.recompile(),
+        concise=False,
+        first=True,
+        packed=False,
+        compact=False,
+        output_format="json",
+    )
+    assert result == App.results()
+
+
+def test_app_write(tmpdir):
+    path = str(tmpdir.join("output.json"))
+    App.write(path, "output")
+    with open(path) as f:
+        assert f.read() == "output"
+    assert tmpdir.listdir() == [tmpdir.join("output.json")]
+
+
+def test_app_write_bytes(tmpdir):
+    path = str(tmpdir.join("output.pack"))
+    App.write(path, b"output")
+    with open(path, "rb") as f:
+        assert f.read() == b"output"
+
+
+def test_app_snapshot(patch, bundle, tmpdir):
+    """
+    Ensures App.snapshot writes the services used by the stories
+    """
+    entries = [
+        {"service": {"name": "http", "alias": "http", "owner": None}},
+        {"service": {"name": "log", "alias": "log", "owner": None}},
+    ]
+    catalog = tmpdir.join("catalog.json")
+    catalog.write(json.dumps(entries))
+    output = str(tmpdir.join("hub.snapshot"))
+    patch.object(ServiceWrapper, "from_json_file")
+    Bundle.from_path().bundle().results = {"services": ["http"]}
+    result = App.snapshot("path", output, catalog=str(catalog))
+    ServiceWrapper.from_json_file.assert_called_with(str(catalog))
+    Bundle.from_path.assert_called_with(
+        "path",
+        ignored_path=None,
+        features=None,
+        hub=ServiceWrapper.from_json_file(),
+    )
+    assert result == ["http"]
+    assert HubSnapshot(output).names() == ["http"]
+
+
+def test_app_snapshot_fetch(patch, bundle):
+    """
+    Ensures App.snapshot fetches the services from the hub without a catalog
+    """
+    entries = [{"service": {"name": "http", "alias": "http", "owner": None}}]
+    patch.object(HubSnapshot, "fetch", return_value=entries)
+    patch.object(App, "write")
+    Bundle.from_path().bundle().results = {"services": ["http"]}
+    App.snapshot("path", "hub.snapshot")
+    assert Bundle.from_path.call_args[1]["hub"] is None
+    HubSnapshot.fetch.assert_called_with(["http"])
+    App.write.assert_called_with("hub.snapshot", HubSnapshot.dumps(entries))
+
+
 def test_app_grammar(patch):
     patch.init(Grammar)
     patch.object(Grammar, "build")
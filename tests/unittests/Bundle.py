@@ -1,12 +1,13 @@
 # -*- coding: utf-8 -*-
 import os
-import subprocess
 from unittest.mock import ANY
 
-from pytest import fixture
+from pytest import fixture, raises
 
+from storyscript import Bundle as BundleModule
 from storyscript.Bundle import Bundle
 from storyscript.Features import Features
+from storyscript.Gitignore import Gitignore
 from storyscript.Story import Story
 from storyscript.parser import Parser
 
@@ -19,6 +20,8 @@ def bundle(patch):
 def test_bundle_init(bundle):
     assert bundle.stories == {}
     assert bundle.story_files == {}
+    assert bundle.cache is None
+    assert bundle.hub is None
 
 
 def test_bundle_init_files():
@@ -26,73 +29,18 @@ def test_bundle_init_files():
     assert bundle.story_files == {"one.story": "hello"}
 
 
-def test_bundle_gitignores(patch):
-    """
-    Ensures gitignores uses can produce the list of ignored files.
-    """
-    patch.object(subprocess, "run")
-    subprocess.run().returncode = 0
-    result = Bundle.gitignores()
-    command = [
-        "git",
-        "ls-files",
-        "--others",
-        "--ignored",
-        "--exclude-standard",
-    ]
-    subprocess.run.assert_called_with(
-        command,
-        encoding="utf8",
-        stderr=subprocess.DEVNULL,
-        stdout=subprocess.PIPE,
-    )
-    subprocess.run().stdout.split.assert_called_with("\n")
-    assert result == subprocess.run().stdout.split()
-
-
-def test_bundle_gitignores_failed(patch):
-    """
-    Test what happens when the gitignore command fails
-    """
-    patch.object(subprocess, "run")
-    subprocess.run().returncode = 1
-    result = Bundle.gitignores()
-    subprocess.run().stdout.split.assert_not_called()
-    assert result == []
+def test_bundle_ignores():
+    result = Bundle.ignores(os.path.join(".", "path"))
+    assert result == {"path"}
 
 
-def test_bundle_gitignores_command_not_found(patch):
-    """
-    Test what happens when there's no git command available.
-    """
-    patch.object(subprocess, "run", side_effect=FileNotFoundError())
-    result = Bundle.gitignores()
-    assert result == []
-
-
-def test_bundle_gitignores_command_not_found_oserror(patch):
-    """
-    Test what happens when executing the git command failed.
-    """
-    patch.object(subprocess, "run", side_effect=OSError())
-    result = Bundle.gitignores()
-    assert result == []
-
-
-def test_bundle_ignores(patch):
-    patch.object(os.path, "isdir")
-    patch.object(os, "walk", return_value=[("root", [], ["one.story", "two"])])
-    result = Bundle.ignores("path")
-    os.walk.assert_called_with("path")
-    assert result == [os.path.join("root", "one.story")]
-
-
-def test_bundle_ignores_not_dir(patch):
-    patch.many(os.path, ["relpath", "isdir"])
-    os.path.isdir.return_value = False
-    result = Bundle.ignores("path")
-    os.path.relpath.assert_called_with("path")
-    assert result == [os.path.relpath()]
+def test_bundle_ignored(patch, magic):
+    assert Bundle.ignored("path", True, {"path"}, None) is True
+    assert Bundle.ignored("path", True, set(), None) is False
+    gitignore = magic()
+    result = Bundle.ignored("path", True, set(), gitignore)
+    gitignore.ignored.assert_called_with("path", True)
+    assert result == gitignore.ignored()
 
 
 def test_bundle_filter_path(patch):
@@ -106,7 +54,7 @@ def test_bundle_filter_path_ignores():
     result = Bundle.filter_path(
         os.path.join(".", "root"),
         "one.story",
-        [os.path.join("root", "one.story")],
+        {os.path.join("root", "one.story")},
     )
     assert result is None
 
@@ -116,9 +64,9 @@ def test_bundle_parse_directory(patch, bundle):
     Ensures parse_directory can parse a directory
     """
     patch.object(os, "walk", return_value=[("root", [], ["one.story", "two"])])
-    patch.object(Bundle, "gitignores")
+    patch.object(Gitignore, "find", return_value=None)
     result = Bundle.parse_directory("dir")
-    assert Bundle.gitignores.call_count == 1
+    Gitignore.find.assert_called_with("dir")
     os.walk.assert_called_with("dir")
     assert result == [os.path.join("root", "one.story")]
 
@@ -132,9 +80,38 @@ def test_bundle_parse_directory_gitignored(patch, bundle):
         "walk",
         return_value=[(os.path.join(".", "root"), [], ["one.story"])],
     )
-    patch.object(Bundle, "gitignores")
-    Bundle.gitignores.return_value = [os.path.join("root", "one.story")]
+    patch.init(Gitignore)
+    patch.object(Gitignore, "find", return_value=Gitignore())
+    patch.object(Gitignore, "ignored_directory", return_value=False)
+    patch.object(Gitignore, "ignored", return_value=True)
     assert Bundle.parse_directory("dir") == []
+    path = os.path.join("root", "one.story")
+    Gitignore.ignored.assert_called_with(path, False)
+
+
+def test_bundle_parse_directory_gitignored_directory(patch, bundle):
+    """
+    Ensures parse_directory doesn't walk gitignored directories
+    """
+    patch.object(os, "walk")
+    patch.init(Gitignore)
+    patch.object(Gitignore, "find", return_value=Gitignore())
+    patch.object(Gitignore, "ignored_directory", return_value=True)
+    assert Bundle.parse_directory("dir") == []
+    Gitignore.ignored_directory.assert_called_with("dir")
+    os.walk.assert_not_called()
+
+
+def test_bundle_parse_directory_prune(patch, bundle):
+    """
+    Ensures parse_directory prunes ignored directories
+    """
+    subdirs = ["one", "two"]
+    patch.object(os, "walk", return_value=[("root", subdirs, [])])
+    patch.object(Gitignore, "find", return_value=None)
+    patch.object(Bundle, "ignored", side_effect=[True, False])
+    Bundle.parse_directory("dir")
+    assert subdirs == ["two"]
 
 
 def test_bundle_parse_directory_ignored_path(patch, bundle):
@@ -143,12 +120,26 @@ def test_bundle_parse_directory_ignored_path(patch, bundle):
         "walk",
         return_value=[(os.path.join(".", "root"), [], ["one.story"])],
     )
-    patch.many(Bundle, ["gitignores", "ignores"])
-    Bundle.gitignores.return_value = []
+    patch.object(Gitignore, "find", return_value=None)
+    patch.object(Bundle, "ignores", return_value={"root"})
     Bundle.parse_directory("dir", ignored_path="ignored")
     Bundle.ignores.assert_called_with("ignored")
 
 
+def test_bundle_parse_directory_files(tmpdir):
+    """
+    Ensures parse_directory applies the .gitignore files
+    """
+    tmpdir.mkdir(".git")
+    tmpdir.join(".gitignore").write("build/\n*.tmp.story\n")
+    for directory in ["a", "build", "ignored"]:
+        tmpdir.mkdir(directory).join("one.story").write("a = 1")
+    tmpdir.join("a", "two.tmp.story").write("a = 1")
+    with tmpdir.as_cwd():
+        result = Bundle.parse_directory(".", ignored_path="ignored")
+    assert result == [os.path.join("a", "one.story")]
+
+
 def test_bundle_from_path(patch):
     """
     Ensures Bundle.from_path can create a Bundle from a filepath
@@ -161,6 +152,32 @@ def test_bundle_from_path(patch):
     assert isinstance(result, Bundle)
 
 
+def test_bundle_from_path_cache(patch):
+    """
+    Ensures Bundle.from_path passes the compile cache to the Bundle
+    """
+    patch.object(os.path, "isdir", return_value=False)
+    patch.init(Bundle)
+    patch.object(Bundle, "load_story")
+    Bundle.from_path("path", cache="cache")
+    Bundle.__init__.assert_called_with(
+        features=None, cache="cache", profiler=None, hub=None
+    )
+
+
+def test_bundle_from_path_hub(patch):
+    """
+    Ensures Bundle.from_path passes the hub to the Bundle
+    """
+    patch.object(os.path, "isdir", return_value=False)
+    patch.init(Bundle)
+    patch.object(Bundle, "load_story")
+    Bundle.from_path("path", hub="hub")
+    Bundle.__init__.assert_called_with(
+        features=None, cache=None, profiler=None, hub="hub"
+    )
+
+
 def test_bundle_from_path_directory(patch):
     """
     Ensures Bundle.from_path can create a Bundle from a directory path
@@ -193,7 +210,9 @@ def test_bundle_load_story(patch, bundle):
     patch.init(Features)
     bundle.story_files["one.story"] = "hello"
     result = bundle.load_story("one.story")
-    Story.__init__.assert_called_with("hello", features=ANY, path="one.story")
+    Story.__init__.assert_called_with(
+        "hello", features=ANY, path="one.story", profiler=None, hub=None
+    )
     assert isinstance(Story.__init__.call_args[1]["features"], Features)
     assert isinstance(result, Story)
 
@@ -270,6 +289,163 @@ def test_bundle_bundle(patch, bundle):
     assert result == expected
 
 
+def test_bundle_bundle_workers(patch, bundle):
+    patch.many(Bundle, ["services", "compile", "compile_parallel", "parser"])
+    patch.object(Bundle, "find_stories", return_value=["a.story", "b.story"])
+    bundle.stories = {"a.story": "a", "b.story": "b"}
+    bundle.bundle(ebnf="ebnf", workers=2)
+    Bundle.compile_parallel.assert_called_with(
+        ["a.story", "b.story"], ebnf="ebnf", workers=2
+    )
+    Bundle.compile.assert_not_called()
+
+
+def test_bundle_bundle_workers_single_story(patch, bundle):
+    """
+    Ensures a bundle with a single story is not compiled in a process pool
+    """
+    patch.many(Bundle, ["services", "compile", "compile_parallel", "parser"])
+    patch.object(Bundle, "find_stories", return_value=["a.story"])
+    bundle.stories = {"a.story": "a"}
+    bundle.bundle(workers=2)
+    Bundle.compile_parallel.assert_not_called()
+    Bundle.compile.assert_called_with(["a.story"], parser=Bundle.parser())
+
+
+def test_bundle_bundle_workers_profiler(patch, bundle):
+    """
+    Ensures profiled stories are not compiled in a process pool
+    """
+    patch.many(Bundle, ["services", "compile", "compile_parallel", "parser"])
+    patch.object(Bundle, "find_stories", return_value=["a.story", "b.story"])
+    bundle.stories = {"a.story": "a", "b.story": "b"}
+    bundle.profiler = "profiler"
+    bundle.bundle(workers=2)
+    Bundle.compile_parallel.assert_not_called()
+    Bundle.compile.assert_called_with(
+        ["a.story", "b.story"], parser=Bundle.parser()
+    )
+
+
+def test_bundle_load_cached_no_cache(bundle):
+    assert bundle.load_cached(["one.story"]) == ["one.story"]
+
+
+def test_bundle_load_cached(patch, magic, bundle):
+    patch.object(Bundle, "load_story")
+    patch.object(BundleModule, "DeprecationMessage")
+    deprecation = magic()
+    bundle.cache = magic()
+    bundle.cache.load.side_effect = [("output", [deprecation]), None]
+    result = bundle.load_cached(["one.story", "two.story"])
+    bundle.cache.load.assert_called_with(Bundle.load_story())
+    BundleModule.DeprecationMessage.assert_called_with(
+        deprecation, Bundle.load_story()
+    )
+    assert result == ["two.story"]
+    assert bundle.stories == {"one.story": "output"}
+    assert bundle.deprecations == {
+        "one.story": [BundleModule.DeprecationMessage()]
+    }
+
+
+def test_bundle_save_cached(patch, magic, bundle):
+    patch.object(Bundle, "load_story")
+    deprecation = magic()
+    bundle.cache = magic()
+    bundle.stories = {"one.story": "output"}
+    bundle.deprecations = {"one.story": [deprecation]}
+    bundle.save_cached(["one.story"])
+    Bundle.load_story.assert_called_with("one.story")
+    bundle.cache.save.assert_called_with(
+        Bundle.load_story(), "output", [deprecation.error]
+    )
+
+
+def test_bundle_bundle_cached(patch, bundle):
+    """
+    Ensures only the stories missing from the cache are compiled and that
+    the order of the stories is kept
+    """
+    patch.many(Bundle, ["services", "compile", "parser", "save_cached"])
+    patch.object(Bundle, "find_stories", return_value=["a.story", "b.story"])
+    patch.object(Bundle, "load_cached", return_value=["a.story"])
+    bundle.stories = {"b.story": "b", "a.story": "a"}
+    result = bundle.bundle()
+    Bundle.load_cached.assert_called_with(["a.story", "b.story"])
+    Bundle.compile.assert_called_with(["a.story"], parser=Bundle.parser())
+    Bundle.save_cached.assert_called_with(["a.story"])
+    assert list(result.results["stories"]) == ["a.story", "b.story"]
+
+
+def test_bundle_compile_parallel(patch, magic, bundle):
+    patch.object(BundleModule, "ProcessPoolExecutor")
+    patch.object(BundleModule, "DeprecationMessage")
+    patch.object(Bundle, "load_story")
+    deprecation = magic()
+    executor = BundleModule.ProcessPoolExecutor().__enter__()
+    executor.map.return_value = [("output", [deprecation])]
+    bundle.compile_parallel(["one.story"], ebnf=None, workers=2)
+    BundleModule.ProcessPoolExecutor.assert_called_with(
+        max_workers=2,
+        initializer=BundleModule._init_worker,
+        initargs=(None, bundle.features.features, None),
+    )
+    executor.map.assert_called_with(
+        BundleModule._compile_worker,
+        ["one.story"],
+        [Bundle.load_story().story],
+    )
+    BundleModule.DeprecationMessage.assert_called_with(
+        deprecation, Bundle.load_story()
+    )
+    assert bundle.stories["one.story"] == "output"
+    assert bundle.deprecations["one.story"] == [
+        BundleModule.DeprecationMessage()
+    ]
+
+
+def test_bundle_compile_parallel_error(patch, bundle):
+    """
+    Ensures stories that failed in a worker are compiled again locally
+    """
+    patch.object(BundleModule, "ProcessPoolExecutor")
+    patch.many(Bundle, ["load_story", "compile", "parser"])
+    executor = BundleModule.ProcessPoolExecutor().__enter__()
+    executor.map.return_value = [None]
+    bundle.compile_parallel(["one.story"], ebnf="ebnf", workers=2)
+    Bundle.parser.assert_called_with("ebnf")
+    Bundle.compile.assert_called_with(["one.story"], parser=Bundle.parser())
+
+
+def test_bundle_compile_worker(patch):
+    patch.object(BundleModule, "Story")
+    patch.object(Bundle, "parser")
+    BundleModule._init_worker("ebnf", {"globals": True}, "hub")
+    Bundle.parser.assert_called_with("ebnf")
+    assert BundleModule._worker["features"].globals is True
+    result = BundleModule._compile_worker("one.story", "source")
+    BundleModule.Story.assert_called_with(
+        "source",
+        features=BundleModule._worker["features"],
+        path="one.story",
+        hub="hub",
+    )
+    story = BundleModule.Story()
+    story.process.assert_called_with(parser=Bundle.parser())
+    assert result == (
+        story.compiled.output(),
+        story.context.deprecations(),
+    )
+
+
+def test_bundle_compile_worker_error(patch):
+    patch.object(BundleModule, "Story")
+    BundleModule.Story().process.side_effect = Exception()
+    BundleModule._init_worker(None, None, None)
+    assert BundleModule._compile_worker("one.story", "source") is None
+
+
 def test_bundle_bundle_ebnf(patch, bundle):
     patch.many(Bundle, ["find_stories", "services", "compile", "parser"])
     bundle.bundle(ebnf="ebnf")
@@ -353,3 +529,88 @@ def test_bundle_parser_ebnf(patch, bundle):
     result = bundle.parser(ebnf="ebnf")
     Parser.__init__.assert_called_with(ebnf="ebnf")
     assert isinstance(result, Parser)
+
+
+def test_bundle_compiled(patch, bundle):
+    patch.object(Bundle, "services")
+    bundle.stories = {"b.story": "b", "a.story": "a"}
+    result = bundle.compiled(["a.story", "b.story"])
+    assert list(bundle.stories) == ["a.story", "b.story"]
+    assert result.results == {
+        "stories": bundle.stories,
+        "services": Bundle.services(),
+        "entrypoint": ["a.story", "b.story"],
+    }
+    assert result.deprecations == bundle.deprecations
+
+
+def test_bundle_stream(patch, bundle):
+    """
+    Ensures Bundle.stream compiles the stories one by one
+    """
+    patch.object(Bundle, "find_stories", return_value=["a.story", "b.story"])
+    patch.many(Bundle, ["parser", "save_cached"])
+    patch.object(Bundle, "load_cached", side_effect=lambda stories: stories)
+
+    def compile(stories, parser):
+        bundle.stories[stories[0]] = stories[0][0]
+
+    patch.object(Bundle, "compile", side_effect=compile)
+    stream = bundle.stream(ebnf="ebnf")
+    assert next(stream) == ("a.story", "a")
+    assert bundle.stories == {}
+    assert list(stream) == [("b.story", "b")]
+    Bundle.parser.assert_called_with("ebnf")
+    Bundle.compile.assert_called_with(["b.story"], parser=Bundle.parser())
+    Bundle.save_cached.assert_called_with(["b.story"])
+
+
+def test_bundle_stream_cached(patch, bundle):
+    patch.object(Bundle, "find_stories", return_value=["a.story"])
+    patch.many(Bundle, ["parser", "compile", "save_cached"])
+
+    def load_cached(stories):
+        bundle.stories["a.story"] = "a"
+        return []
+
+    patch.object(Bundle, "load_cached", side_effect=load_cached)
+    assert list(bundle.stream()) == [("a.story", "a")]
+    Bundle.compile.assert_not_called()
+
+
+def test_bundle_recompile(patch, bundle):
+    """
+    Ensures Bundle.recompile only compiles the changed stories
+    """
+    patch.many(Bundle, ["compile", "compiled", "parser"])
+    patch.object(Story, "read")
+    bundle.story_files = {"a.story": "a", "b.story": "b", "c.story": "c"}
+    bundle.stories = {"a.story": "a", "b.story": "b", "c.story": "c"}
+    bundle.deprecations = {"a.story": [], "b.story": [], "c.story": []}
+    result = bundle.recompile(["b.story"], ["c.story"], ebnf="ebnf")
+    Story.read.assert_called_with("b.story")
+    Bundle.parser.assert_called_with("ebnf")
+    Bundle.compile.assert_called_once_with(
+        ["b.story"], parser=Bundle.parser()
+    )
+    Bundle.compiled.assert_called_with(["a.story", "b.story"])
+    assert "c.story" not in bundle.stories
+    assert "c.story" not in bundle.deprecations
+    assert bundle.failed == set()
+    assert result == Bundle.compiled()
+
+
+def test_bundle_recompile_failed(patch, bundle):
+    """
+    Ensures Bundle.recompile compiles stories that failed before again
+    """
+    patch.many(Bundle, ["compiled", "parser"])
+    patch.object(Bundle, "compile", side_effect=[None, ValueError()])
+    bundle.story_files = {"a.story": "a", "b.story": "b"}
+    bundle.failed = {"a.story"}
+    bundle.recompile([], [])
+    assert bundle.failed == set()
+    bundle.failed = {"a.story", "b.story"}
+    with raises(ValueError):
+        bundle.recompile([], [])
+    assert bundle.failed == {"a.story", "b.story"}
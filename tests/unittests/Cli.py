@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import io
+import os
 
 import click
 from click.testing import CliRunner
@@ -7,11 +8,16 @@ from click.testing import CliRunner
 from pytest import fixture, mark
 
 from storyscript.App import App, Compiled
+from storyscript.Bundle import Bundle
 from storyscript.Cli import Cli
+from storyscript.Profiler import Profiler
 from storyscript.Project import Project
+from storyscript.Server import Server
 from storyscript.Version import version
+from storyscript.Watcher import Watcher
 from storyscript.exceptions.CompilerError import CompilerError
 from storyscript.exceptions.StoryError import StoryError
+from storyscript.hub.HubSnapshot import HubSnapshot, HubSnapshotError
 
 
 @fixture
@@ -26,7 +32,7 @@ def echo(patch):
 
 @fixture
 def app(patch):
-    patch.many(App, ["compile", "parse", "format"])
+    patch.many(App, ["compile", "stream", "parse", "format"])
     return App
 
 
@@ -104,6 +110,13 @@ def test_cli_compile_with_ignore_option(runner, app):
         concise=False,
         first=False,
         features={},
+        workers=None,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
     )
 
 
@@ -308,6 +321,13 @@ def test_cli_compile(patch, runner, echo, app):
         concise=False,
         first=False,
         features={},
+        workers=None,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
     )
     click.style.assert_called_with("Script syntax passed!", fg="green")
     click.echo.assert_called_with(click.style())
@@ -325,6 +345,13 @@ def test_cli_compile_path(patch, runner, app):
         concise=False,
         first=False,
         features={},
+        workers=None,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
     )
 
 
@@ -332,8 +359,14 @@ def test_cli_compile_output_file(patch, runner, app):
     """
     Ensures the compile command supports specifying an output file.
     """
-    patch.object(io, "open")
     runner.invoke(Cli.compile, ["/path", "hello.story", "-j"])
+    assert App.stream.call_args[0] == ("/path", "hello.story")
+    App.compile.assert_not_called()
+
+
+def test_cli_compile_output_file_first(patch, runner, app):
+    patch.object(io, "open")
+    runner.invoke(Cli.compile, ["/path", "hello.story", "-j", "-f"])
     io.open.assert_called_with("hello.story", "w")
     io.open().__enter__().write.assert_called_with(App.compile().results)
 
@@ -351,6 +384,13 @@ def test_cli_compile_silent(runner, echo, app, option):
         concise=False,
         first=False,
         features={},
+        workers=None,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
     )
     assert result.output == ""
     assert click.echo.call_count == 0
@@ -369,6 +409,13 @@ def test_cli_compile_concise(runner, echo, app, option):
         concise=True,
         first=False,
         features={},
+        workers=None,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
     )
 
 
@@ -385,6 +432,13 @@ def test_cli_compile_first(runner, echo, app, option):
         concise=False,
         first=True,
         features={},
+        workers=None,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
     )
 
 
@@ -397,6 +451,13 @@ def test_cli_compile_debug(runner, echo, app):
         concise=False,
         first=False,
         features={},
+        workers=None,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
     )
 
 
@@ -409,26 +470,61 @@ def test_cli_compile_features(runner, echo, app):
         concise=False,
         first=False,
         features={"globals": True},
+        workers=None,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
     )
 
 
 @mark.parametrize("option", ["--json", "-j"])
 def test_cli_compile_json(runner, echo, app, option):
     """
-    Ensures --json outputs json
+    Ensures --json streams json
     """
     runner.invoke(Cli.compile, [option])
-    App.compile.assert_called_with(
+    App.stream.assert_called_with(
         ".",
-        ebnf=None,
+        None,
         ignored_path=None,
+        ebnf=None,
         concise=False,
-        first=False,
+        compact=False,
         features={},
+        workers=None,
+        cache=False,
+        profiler=None,
+        hub=None,
     )
+    App.compile.assert_not_called()
+
+
+def test_cli_compile_json_compact(runner, echo, app):
+    runner.invoke(Cli.compile, ["-j", "--compact", "--concise"])
+    assert App.stream.call_args[1]["compact"] is True
+    assert App.stream.call_args[1]["concise"] is True
+
+
+def test_cli_compile_json_first(runner, echo, app):
+    runner.invoke(Cli.compile, ["-j", "--first"])
+    App.stream.assert_not_called()
     click.echo.assert_called_with(App.compile().results)
 
 
+def test_cli_compile_json_deprecation(patch, magic, runner, echo, app):
+    deprecation = magic()
+    App.stream.return_value = {"app.story": [deprecation]}
+    patch.object(click, "style", return_value="Deprecations")
+    patch.object(Cli, "write_profile")
+    runner.invoke(Cli.compile, ["-j"])
+    Cli.write_profile.assert_called_with(None, None, None)
+    click.style.assert_called_with(deprecation.message(), fg="yellow")
+    click.echo.assert_called_with("Deprecations")
+
+
 def test_cli_compile_deprecation(patch, magic, runner, echo):
     deprecation = magic()
     patch.object(click, "style", return_value="Deprecations")
@@ -453,9 +549,114 @@ def test_cli_compile_ebnf(runner, echo, app):
         concise=False,
         first=False,
         features={},
+        workers=None,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
+    )
+
+
+def test_cli_compile_jobs(runner, echo, app):
+    runner.invoke(Cli.compile, ["--jobs", "4"])
+    App.compile.assert_called_with(
+        ".",
+        ebnf=None,
+        ignored_path=None,
+        concise=False,
+        first=False,
+        features={},
+        workers=4,
+        cache=False,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
+    )
+
+
+def test_cli_compile_cache(runner, echo, app):
+    runner.invoke(Cli.compile, ["--cache"])
+    App.compile.assert_called_with(
+        ".",
+        ebnf=None,
+        ignored_path=None,
+        concise=False,
+        first=False,
+        features={},
+        workers=None,
+        cache=True,
+        profiler=None,
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
     )
 
 
+def test_cli_compile_profile(patch, runner, echo, app):
+    patch.init(Profiler)
+    patch.many(Profiler, ["write", "dump_stats"])
+    runner.invoke(Cli.compile, ["--profile", "report.json"])
+    Profiler.__init__.assert_called_with(memory=False, cprofile=False)
+    assert isinstance(App.compile.call_args[1]["profiler"], Profiler)
+    Profiler.write.assert_called_with("report.json")
+    Profiler.dump_stats.assert_not_called()
+
+
+def test_cli_compile_profile_memory(patch, runner, echo, app):
+    patch.init(Profiler)
+    patch.many(Profiler, ["write", "dump_stats"])
+    args = ["--profile", "report.json", "--profile-memory"]
+    runner.invoke(Cli.compile, args)
+    Profiler.__init__.assert_called_with(memory=True, cprofile=False)
+    Profiler.write.assert_called_with("report.json")
+
+
+def test_cli_compile_cprofile(patch, runner, echo, app):
+    patch.init(Profiler)
+    patch.many(Profiler, ["write", "dump_stats"])
+    runner.invoke(Cli.compile, ["--cprofile", "compile.prof"])
+    Profiler.__init__.assert_called_with(memory=False, cprofile=True)
+    Profiler.dump_stats.assert_called_with("compile.prof")
+    Profiler.write.assert_not_called()
+
+
+def test_cli_compile_packed(patch, runner, echo, app):
+    """
+    Ensures the compile command can write a packed bundle
+    """
+    patch.object(click, "style")
+    patch.object(App, "write")
+    runner.invoke(Cli.compile, ["/path", "out.pack", "--packed", "-j"])
+    assert App.compile.call_args[1]["packed"] is True
+    App.write.assert_called_with("out.pack", App.compile().results)
+    click.echo.assert_called_with(click.style())
+
+
+def test_cli_compile_packed_no_output(runner, app):
+    e = runner.invoke(Cli.compile, ["/path", "--packed"])
+    assert e.exit_code == 2
+    App.compile.assert_not_called()
+
+
+def test_cli_compile_binary(patch, runner, echo, app):
+    patch.object(App, "write")
+    runner.invoke(Cli.compile, ["/path", "out.bin", "--format", "binary"])
+    assert App.compile.call_args[1]["output_format"] == "binary"
+    App.write.assert_called_with("out.bin", App.compile().results)
+
+
+@mark.parametrize("options", [[], ["out.bin", "--packed"]])
+def test_cli_compile_binary_usage(runner, app, options):
+    e = runner.invoke(Cli.compile, ["/path", "--format", "binary", *options])
+    assert e.exit_code == 2
+    App.compile.assert_not_called()
+
+
 def test_cli_compile_ice(runner, echo, app):
     """
     Ensures the compile command prints unknown errors
@@ -596,6 +797,208 @@ def test_cli_lex_not_found_debug(patch, runner, echo, app):
     assert e.exception.message() == "Unknown compiler error"
 
 
+def test_cli_serve(patch, runner):
+    """
+    Ensures Cli.serve serves requests from stdin
+    """
+    patch.init(Server)
+    patch.many(Server, ["warm", "serve", "serve_socket"])
+    runner.invoke(Cli.serve, ["--preview", "globals"])
+    Server.__init__.assert_called_with(features={"globals": True})
+    assert Server.warm.call_count == 1
+    assert Server.serve.call_count == 1
+    Server.serve_socket.assert_not_called()
+
+
+def test_cli_serve_socket(patch, runner):
+    """
+    Ensures Cli.serve can listen on a Unix socket
+    """
+    patch.init(Server)
+    patch.many(Server, ["warm", "serve", "serve_socket"])
+    runner.invoke(Cli.serve, ["--socket", "storyscript.sock"])
+    Server.serve_socket.assert_called_with("storyscript.sock")
+    Server.serve.assert_not_called()
+
+
+def test_cli_serve_socket_not_socket(patch, runner):
+    """
+    Ensures Cli.serve reports a --socket path which isn't a socket
+    """
+    patch.init(Server)
+    patch.many(Server, ["warm", "serve"])
+    error = FileExistsError("notes.txt exists and isn't a socket")
+    patch.object(Server, "serve_socket", side_effect=error)
+    e = runner.invoke(Cli.serve, ["--socket", "notes.txt"])
+    assert e.exit_code == 2
+    assert "isn't a socket" in e.output
+
+
+def test_cli_compile_watch(patch, runner, app):
+    patch.object(Cli, "watch_compile")
+    runner.invoke(Cli.compile, ["stories", "out.json", "--watch"])
+    Cli.watch_compile.assert_called_with(
+        "stories",
+        "out.json",
+        ignored_path=None,
+        ebnf=None,
+        concise=False,
+        first=False,
+        features={},
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
+    )
+    App.compile.assert_not_called()
+
+
+def test_cli_watch_compile(patch, echo):
+    patch.init(Bundle)
+    patch.init(Watcher)
+    patch.object(Watcher, "watch")
+    patch.many(App, ["recompile", "write"])
+    Cli.watch_compile(
+        "stories",
+        "out.json",
+        ignored_path="ignored",
+        ebnf=None,
+        concise=False,
+        first=False,
+        features={},
+        packed=False,
+        compact=False,
+        output_format="json",
+        hub=None,
+    )
+    Bundle.__init__.assert_called_with(features={}, hub=None)
+    Watcher.__init__.assert_called_with("stories", ignored_path="ignored")
+    recompile = Watcher.watch.call_args[0][0]
+    recompile(["a.story"], [])
+    bundle = App.recompile.call_args[0][0]
+    assert isinstance(bundle, Bundle)
+    App.recompile.assert_called_with(
+        bundle,
+        ["a.story"],
+        [],
+        ebnf=None,
+        concise=False,
+        first=False,
+        packed=False,
+        compact=False,
+        output_format="json",
+    )
+    App.write.assert_called_with("out.json", App.recompile().results)
+
+
+def test_cli_watch_compile_error(patch, magic, echo):
+    patch.init(Watcher)
+    patch.object(Watcher, "watch")
+    patch.many(App, ["recompile", "write"])
+    error = magic()
+    App.recompile.side_effect = StoryError(error, None)
+    patch.object(StoryError, "echo")
+    Cli.watch_compile(
+        "stories",
+        "out.json",
+        None,
+        None,
+        False,
+        False,
+        {},
+        False,
+        False,
+        "json",
+        None,
+    )
+    Watcher.watch.call_args[0][0](["a.story"], [])
+    assert StoryError.echo.call_count == 1
+    App.write.assert_not_called()
+
+
+def test_cli_compile_hub_snapshot(patch, runner, echo, app):
+    """
+    Ensures the compile command resolves services with a hub snapshot
+    """
+    patch.init(HubSnapshot)
+    runner.invoke(Cli.compile, ["--hub-snapshot", "hub.snapshot"])
+    HubSnapshot.__init__.assert_called_with("hub.snapshot")
+    assert isinstance(App.compile.call_args[1]["hub"], HubSnapshot)
+
+
+def test_cli_hub_snapshot(patch):
+    assert Cli.hub_snapshot(None) is None
+    patch.init(HubSnapshot)
+    assert isinstance(Cli.hub_snapshot("hub.snapshot"), HubSnapshot)
+
+
+def test_cli_hub_snapshot_invalid(runner, tmpdir, app):
+    """
+    Ensures that an invalid hub snapshot is reported as a bad option
+    """
+    path = tmpdir.join("hub.snapshot")
+    path.write("{}\n")
+    e = runner.invoke(Cli.compile, ["--hub-snapshot", str(path)])
+    assert e.exit_code == 2
+    assert f"{path} is not a hub snapshot." in e.output
+    App.compile.assert_not_called()
+
+
+def test_cli_hub_snapshot_missing(runner, app):
+    e = runner.invoke(Cli.compile, ["--hub-snapshot", "missing.snapshot"])
+    assert e.exit_code == 2
+    assert "--hub-snapshot" in e.output
+
+
+def test_cli_hub_snapshot_command(patch, runner, echo):
+    patch.object(App, "snapshot", return_value=["http"])
+    patch.object(click, "style")
+    runner.invoke(
+        Cli.main, ["hub", "snapshot", "stories", "out", "--catalog", "dump"]
+    )
+    App.snapshot.assert_called_with(
+        "stories", "out", ignored_path=None, catalog="dump", features={}
+    )
+    click.style.assert_called_with("Wrote 1 services to out.", fg="green")
+
+
+def test_cli_hub_snapshot_command_catalog(patch, runner):
+    error = HubSnapshotError("dump is not a hub dump.")
+    patch.object(App, "snapshot", side_effect=error)
+    e = runner.invoke(Cli.main, ["hub", "snapshot", "--catalog", "dump"])
+    assert e.exit_code == 2
+    assert "dump is not a hub dump." in e.output
+
+
+def test_cli_hub_snapshot_command_error(patch, runner, echo):
+    ce = CompilerError(None)
+    patch.object(App, "snapshot", side_effect=StoryError(ce, None))
+    e = runner.invoke(Cli.main, ["hub", "snapshot"])
+    assert e.exit_code == 1
+    click.echo.assert_called_with(f"E0001: {StoryError._internal_error(ce)}")
+
+
+def test_cli_format_watch(patch, runner, app):
+    patch.object(Cli, "watch_format")
+    runner.invoke(Cli.format, ["a.story", "--watch"])
+    Cli.watch_format.assert_called_with(
+        "a.story", ebnf=None, features={}, inplace=False
+    )
+    App.format.assert_not_called()
+
+
+def test_cli_watch_format(patch, echo, app):
+    patch.init(Watcher)
+    patch.object(Watcher, "watch")
+    Cli.watch_format("stories", ebnf=None, features={}, inplace=False)
+    Watcher.__init__.assert_called_with("stories")
+    Watcher.watch.call_args[0][0](["a.story"], [])
+    App.format.assert_called_with(
+        "a.story", ebnf=None, features={}, inplace=False
+    )
+    click.echo.assert_called_with(App.format())
+
+
 def test_cli_grammar(patch, runner, app, echo):
     patch.object(App, "grammar")
     runner.invoke(Cli.grammar, [])
@@ -636,6 +1039,87 @@ def test_cli_format(runner, echo, app):
     click.echo.assert_called_with(".format.")
 
 
+def test_cli_format_check(patch, runner, echo, app):
+    """
+    Ensures the format command lists the stories which aren't formatted
+    """
+    patch.object(App, "format_paths", return_value=(["a.story"], []))
+    e = runner.invoke(Cli.format, ["stories", "--check", "--jobs", "2"])
+    App.format_paths.assert_called_with(
+        "stories",
+        ignored_path=None,
+        ebnf=None,
+        features={},
+        inplace=False,
+        workers=2,
+        cache=False,
+    )
+    click.echo.assert_called_with("a.story isn't formatted.")
+    assert e.exit_code == 1
+
+
+def test_cli_format_check_formatted(patch, runner, echo, app):
+    patch.object(App, "format_paths", return_value=([], []))
+    e = runner.invoke(Cli.format, ["a.story", "--check"])
+    assert e.exit_code == 0
+    click.echo.assert_not_called()
+    App.format.assert_not_called()
+
+
+def test_cli_format_check_error(patch, runner, echo, app, magic):
+    """
+    Ensures the format command reports the stories with errors next to the
+    stories which aren't formatted
+    """
+    error = magic()
+    patch.object(App, "format_paths", return_value=(["b.story"], [error]))
+    e = runner.invoke(Cli.format, ["stories", "--check"])
+    error.echo.assert_called()
+    click.echo.assert_called_with("b.story isn't formatted.")
+    assert e.exit_code == 1
+
+
+def test_cli_format_directory(patch, runner, echo, app):
+    patch.object(os.path, "isdir", return_value=True)
+    patch.object(App, "format_paths", return_value=([], []))
+    e = runner.invoke(Cli.format, ["stories", "--inplace", "--cache"])
+    App.format_paths.assert_called_with(
+        "stories",
+        ignored_path=None,
+        ebnf=None,
+        features={},
+        inplace=True,
+        workers=None,
+        cache=True,
+    )
+    click.echo.assert_not_called()
+    assert e.exit_code == 0
+
+
+def test_cli_format_directory_error(patch, runner, echo, app, magic):
+    """
+    Ensures formatting a directory inplace fails if a story has errors
+    """
+    error = magic()
+    patch.object(os.path, "isdir", return_value=True)
+    patch.object(App, "format_paths", return_value=(["b.story"], [error]))
+    e = runner.invoke(Cli.format, ["stories", "--inplace"])
+    error.echo.assert_called()
+    click.echo.assert_not_called()
+    assert e.exit_code == 1
+
+
+def test_cli_format_directory_print(patch, runner, echo, app):
+    """
+    Ensures directories are only formatted inplace or checked
+    """
+    patch.object(os.path, "isdir", return_value=True)
+    patch.object(App, "format_paths")
+    e = runner.invoke(Cli.format, ["stories"])
+    assert e.exit_code == 2
+    App.format_paths.assert_not_called()
+
+
 def test_cli_format_no_file(runner, echo, app):
     """
     Ensures the format command receives a file.
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+from pytest import fixture
+
+from storyscript import CompileCache as CompileCacheModule
+from storyscript.CompileCache import CompileCache
+from storyscript.compiler.semantics.functions.PrecompiledMutations import (
+    PrecompiledMutations,
+)
+from storyscript.exceptions.Deprecation import Deprecation
+from storyscript.parser.Grammar import Grammar
+
+
+@fixture
+def cache(tmpdir):
+    return CompileCache(directory=str(tmpdir))
+
+
+@fixture
+def story(magic):
+    story = magic()
+    story.story = "a = 1"
+    story.context.features = "Features(globals=False)"
+    return story
+
+
+@fixture
+def fingerprint(patch):
+    patch.object(
+        CompileCacheModule, "service_fingerprint", return_value="fingerprint"
+    )
+
+
+def test_compilecache_init():
+    cache = CompileCache()
+    assert cache.directory == ".storyscript-cache"
+    assert cache.ebnf is None
+
+
+def test_compilecache_key(cache, story):
+    key = cache.key(story)
+    assert key == cache.key(story)
+    story.story = "a = 2"
+    assert key != cache.key(story)
+
+
+def test_compilecache_key_features(cache, story):
+    key = cache.key(story)
+    story.context.features = "Features(globals=True)"
+    assert key != cache.key(story)
+
+
+def test_compilecache_grammar(patch):
+    patch.object(Grammar, "build", return_value="grammar")
+    assert CompileCache().grammar() == "grammar"
+
+
+def test_compilecache_grammar_ebnf(tmpdir):
+    ebnf = tmpdir.join("grammar.ebnf")
+    ebnf.write("start: NAME")
+    assert CompileCache(ebnf=str(ebnf)).grammar() == "start: NAME"
+
+
+def test_compilecache_key_ebnf(tmpdir, cache, story):
+    """
+    Ensures stories parsed with another grammar miss the cache
+    """
+    ebnf = tmpdir.join("grammar.ebnf")
+    ebnf.write("start: NAME")
+    other = CompileCache(directory=cache.directory, ebnf=str(ebnf))
+    assert cache.key(story) != other.key(story)
+
+
+def test_compilecache_key_mutations(patch, cache, story):
+    """
+    Ensures other builtin mutations miss the cache
+    """
+    key = cache.key(story)
+    patch.object(PrecompiledMutations, "fingerprint", return_value="other")
+    assert CompileCache(directory=cache.directory).key(story) != key
+
+
+def test_compilecache_compiler(patch, cache):
+    patch.object(Grammar, "build", return_value="grammar")
+    patch.object(PrecompiledMutations, "fingerprint", return_value="hub")
+    fingerprint = cache.compiler()
+    assert cache.compiler() == fingerprint
+    assert Grammar.build.call_count == 1
+
+
+def test_compilecache_path(cache, story):
+    assert cache.path("key") == os.path.join(cache.directory, "key.json")
+
+
+def test_compilecache_load_missing(cache, story):
+    assert cache.load(story) is None
+
+
+def test_compilecache_save_load(cache, story, fingerprint):
+    output = {"tree": {}, "services": ["http"]}
+    deprecation = Deprecation("no_range", format_args={"a": "b"})
+    deprecation.line = "1"
+    cache.save(story, output, [deprecation])
+    CompileCacheModule.service_fingerprint.assert_called_with(
+        story.context.hub, "http"
+    )
+    result, deprecations = cache.load(story)
+    assert result == output
+    assert deprecations[0].deprecation == "no_range"
+    assert deprecations[0].format_args.a == "b"
+    assert deprecations[0].line == "1"
+    assert not hasattr(deprecations[0], "column")
+
+
+def test_compilecache_save_json(cache, story, fingerprint):
+    """
+    Ensures cache entries are plain JSON, s.t. loading them runs no code
+    """
+    cache.save(story, {"services": []}, [])
+    with open(cache.path(cache.key(story))) as f:
+        assert json.load(f) == {
+            "output": {"services": []},
+            "deprecations": [],
+            "services": {},
+        }
+
+
+def test_compilecache_save_not_json(cache, story, fingerprint):
+    cache.save(story, {"services": [], "tree": object()}, [])
+    assert os.listdir(cache.directory) == []
+
+
+def test_compilecache_load_invalid(cache, story):
+    with open(cache.path(cache.key(story)), "w") as f:
+        f.write("invalid")
+    assert cache.load(story) is None
+
+
+def test_compilecache_load_service_changed(patch, cache, story, fingerprint):
+    cache.save(story, {"services": ["http"]}, [])
+    CompileCacheModule.service_fingerprint.return_value = "changed"
+    assert cache.load(story) is None
+
+
+def test_compilecache_save_unknown_service(patch, cache, story):
+    patch.object(CompileCacheModule, "service_fingerprint", return_value=None)
+    cache.save(story, {"services": ["http"]}, [])
+    assert os.listdir(cache.directory) == []
+
+
+def test_compilecache_save_readonly(patch, cache, story, fingerprint):
+    patch.object(os, "makedirs", side_effect=PermissionError())
+    cache.save(story, {"services": []}, [])
+    assert cache.load(story) is None
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import os
+
+from pytest import fixture
+
+from storyscript.FormatCache import FormatCache
+
+
+@fixture
+def cache(tmpdir):
+    return FormatCache(path=str(tmpdir.join("cache", "formatted")))
+
+
+def test_formatcache_init():
+    cache = FormatCache()
+    assert cache.path == os.path.join(".storyscript-cache", "formatted")
+    assert cache.changed is False
+
+
+def test_formatcache_key():
+    key = FormatCache.key("a = 1", "Features(globals=False)")
+    assert key == FormatCache.key("a = 1", "Features(globals=False)")
+    assert key != FormatCache.key("a = 2", "Features(globals=False)")
+    assert key != FormatCache.key("a = 1", "Features(globals=True)")
+
+
+def test_formatcache_read_missing(cache):
+    assert cache.read() == set()
+
+
+def test_formatcache_add(cache):
+    cache.add("a = 1", "features")
+    assert cache.formatted("a = 1", "features")
+    assert not cache.formatted("a = 2", "features")
+    assert cache.changed is True
+
+
+def test_formatcache_add_known(cache):
+    cache.digests.add(FormatCache.key("a = 1", "features"))
+    cache.add("a = 1", "features")
+    assert cache.changed is False
+
+
+def test_formatcache_save(cache):
+    cache.add("a = 1", "features")
+    cache.save()
+    assert cache.changed is False
+    assert FormatCache(path=cache.path).formatted("a = 1", "features")
+
+
+def test_formatcache_save_unchanged(patch, cache):
+    patch.object(os, "replace")
+    cache.save()
+    os.replace.assert_not_called()
+
+
+def test_formatcache_save_readonly(patch, cache):
+    patch.object(os, "makedirs", side_effect=OSError())
+    cache.add("a = 1", "features")
+    cache.save()
+    assert not os.path.exists(cache.path)
@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+import os
+from unittest.mock import ANY
+
+from pytest import fixture, raises
+
+from storyscript import Formatter as FormatterModule
+from storyscript.Bundle import Bundle
+from storyscript.FormatCache import FormatCache
+from storyscript.Formatter import Formatter
+from storyscript.Story import Story
+from storyscript.exceptions import StoryError
+
+
+@fixture
+def formatter():
+    return Formatter()
+
+
+@fixture
+def stories(tmpdir):
+    tmpdir.join("a.story").write("a = 1")
+    tmpdir.join("b.story").write("b=2")
+    return [str(tmpdir.join("a.story")), str(tmpdir.join("b.story"))]
+
+
+def test_formatter_init():
+    formatter = Formatter(ebnf="ebnf", features={"globals": True})
+    assert formatter.ebnf == "ebnf"
+    assert formatter.features.globals is True
+    assert formatter.errors == []
+    assert formatter.cache is None
+
+
+def test_formatter_find(patch):
+    patch.object(os.path, "isdir", return_value=False)
+    assert Formatter.find("a.story") == ["a.story"]
+
+
+def test_formatter_find_directory(patch):
+    patch.object(os.path, "isdir", return_value=True)
+    patch.object(Bundle, "parse_directory")
+    result = Formatter.find("stories", ignored_path="ignored")
+    Bundle.parse_directory.assert_called_with(
+        "stories", ignored_path="ignored"
+    )
+    assert result == Bundle.parse_directory()
+
+
+def test_formatter_format_source(patch):
+    patch.init(Story)
+    patch.object(Story, "parse")
+    result = Formatter.format_source("a.story", "a=1", "parser", "features")
+    Story.__init__.assert_called_with("a=1", "features", path="a.story")
+    Story.parse.assert_called_with(parser="parser")
+    assert result == Story.parse().format()
+
+
+def test_formatter_format_stories(patch, formatter):
+    patch.many(Formatter, ["format_source"])
+    patch.object(Bundle, "parser")
+    result = formatter.format_stories(["a.story"], {"a.story": "a=1"})
+    Bundle.parser.assert_called_with(None)
+    Formatter.format_source.assert_called_with(
+        "a.story", "a=1", Bundle.parser(), formatter.features
+    )
+    assert result == [Formatter.format_source()]
+
+
+def test_formatter_format_stories_error(patch, formatter):
+    """
+    Ensures the error of a story is collected and the other stories are
+    still formatted
+    """
+    error = StoryError(None, None)
+    patch.object(Formatter, "format_source", side_effect=[error, "b = 2"])
+    patch.object(Bundle, "parser")
+    sources = {"a.story": "a=", "b.story": "b=2"}
+    result = formatter.format_stories(["a.story", "b.story"], sources)
+    assert result == [None, "b = 2"]
+    assert formatter.errors == [error]
+
+
+def test_formatter_write_inplace(tmpdir):
+    story = tmpdir.join("a.story")
+    story.write("a=1")
+    os.chmod(str(story), 0o750)
+    Formatter.write_inplace(str(story), Formatter.writer("a = 1"))
+    assert story.read() == "a = 1"
+    assert os.stat(str(story)).st_mode & 0o777 == 0o750
+    assert tmpdir.listdir() == [story]
+
+
+def test_formatter_write_inplace_unchanged(tmpdir):
+    story = tmpdir.join("a.story")
+    story.write("a = 1")
+    Formatter.write_inplace(str(story), lambda f: False)
+    assert story.read() == "a = 1"
+    assert tmpdir.listdir() == [story]
+
+
+def test_formatter_write_inplace_error(tmpdir):
+    """
+    Ensures an interrupted write leaves the story untouched
+    """
+    story = tmpdir.join("a.story")
+    story.write("a=1")
+
+    def write(f):
+        f.write("a")
+        raise ValueError()
+
+    with raises(ValueError):
+        Formatter.write_inplace(str(story), write)
+    assert story.read() == "a=1"
+    assert tmpdir.listdir() == [story]
+
+
+def test_formatter_format_parallel(patch, formatter):
+    patch.object(FormatterModule, "ProcessPoolExecutor")
+    executor = FormatterModule.ProcessPoolExecutor().__enter__()
+    executor.map.return_value = ["a = 1"]
+    result = formatter.format_parallel(["a.story"], {"a.story": "a=1"}, 2)
+    FormatterModule.ProcessPoolExecutor.assert_called_with(
+        max_workers=2,
+        initializer=FormatterModule._init_worker,
+        initargs=(None, formatter.features.features),
+    )
+    executor.map.assert_called_with(
+        FormatterModule._format_worker, ["a.story"], ["a=1"]
+    )
+    assert result == ["a = 1"]
+
+
+def test_formatter_format_parallel_error(patch, formatter):
+    """
+    Ensures stories that failed in a worker are formatted again locally
+    """
+    patch.object(FormatterModule, "ProcessPoolExecutor")
+    patch.object(Formatter, "format_stories", return_value=["a = 1"])
+    executor = FormatterModule.ProcessPoolExecutor().__enter__()
+    executor.map.return_value = [None]
+    result = formatter.format_parallel(["a.story"], {"a.story": "a=1"}, 2)
+    Formatter.format_stories.assert_called_with(
+        ["a.story"], {"a.story": "a=1"}
+    )
+    assert result == ["a = 1"]
+
+
+def test_formatter_format_worker(patch):
+    patch.object(Formatter, "format_source")
+    patch.object(Bundle, "parser")
+    FormatterModule._init_worker("ebnf", {"globals": True})
+    Bundle.parser.assert_called_with("ebnf")
+    assert FormatterModule._worker["features"].globals is True
+    result = FormatterModule._format_worker("a.story", "a=1")
+    Formatter.format_source.assert_called_with(
+        "a.story",
+        "a=1",
+        FormatterModule._worker["parser"],
+        FormatterModule._worker["features"],
+    )
+    assert result == Formatter.format_source()
+
+
+def test_formatter_format_worker_error(patch):
+    patch.object(Formatter, "format_source", side_effect=Exception())
+    FormatterModule._init_worker(None, None)
+    assert FormatterModule._format_worker("a.story", "a=1") is None
+
+
+def test_formatter_format(formatter, stories):
+    assert formatter.format(stories) == [stories[1]]
+    with open(stories[1]) as f:
+        assert f.read() == "b=2"
+
+
+def test_formatter_format_inplace(formatter, stories):
+    assert formatter.format(stories, inplace=True) == [stories[1]]
+    with open(stories[1]) as f:
+        assert f.read() == "b = 2"
+
+
+def test_formatter_format_workers(patch, formatter, stories):
+    patch.object(Formatter, "format_parallel", return_value=["a = 1", "b=2"])
+    assert formatter.format(stories, workers=2) == []
+    Formatter.format_parallel.assert_called_with(
+        stories, {stories[0]: "a = 1", stories[1]: "b=2"}, 2
+    )
+
+
+def test_formatter_format_cache(patch, tmpdir, stories):
+    cache = FormatCache(path=str(tmpdir.join("formatted")))
+    formatter = Formatter(cache=cache)
+    assert formatter.format(stories, inplace=True) == [stories[1]]
+    assert cache.formatted("a = 1", formatter.features)
+    assert cache.formatted("b = 2", formatter.features)
+    patch.object(Formatter, "format_stories", return_value=[])
+    cache = FormatCache(path=cache.path)
+    assert Formatter(cache=cache).format(stories) == []
+    Formatter.format_stories.assert_called_with([], ANY)
+
+
+def test_formatter_format_error(formatter, tmpdir, stories):
+    """
+    Ensures a story with an error is reported and the other stories are
+    still checked
+    """
+    story = tmpdir.join("c.story")
+    story.write("a = ")
+    paths = [str(story)] + stories
+    assert formatter.format(paths, inplace=True) == [stories[1]]
+    assert len(formatter.errors) == 1
+    assert isinstance(formatter.errors[0], StoryError)
+    assert story.read() == "a = "
+    with open(stories[1]) as f:
+        assert f.read() == "b = 2"
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+
+from pytest import fixture, mark
+
+from storyscript.Gitignore import Gitignore
+
+
+@fixture
+def repository(tmpdir):
+    tmpdir.mkdir(".git").mkdir("info").join("exclude").write("*.exclude\n")
+    tmpdir.join(".gitignore").write("build/\n*.log\n!keep.log\n/root.story\n")
+    tmpdir.mkdir("a").join(".gitignore").write("one.story\n")
+    return tmpdir
+
+
+@fixture
+def gitignore(repository):
+    return Gitignore(str(repository))
+
+
+def test_gitignore_init():
+    gitignore = Gitignore("root")
+    assert gitignore.root == "root"
+    assert gitignore.rules == {}
+
+
+def test_gitignore_find(repository):
+    path = str(repository.join("a"))
+    assert Gitignore.find(path).root == str(repository)
+
+
+def test_gitignore_find_none(patch):
+    patch.object(os.path, "exists", return_value=False)
+    assert Gitignore.find("path") is None
+
+
+@mark.parametrize(
+    "pattern,path,matches",
+    [
+        ("*.story", "a.story", True),
+        ("*.story", "a/b.story", False),
+        ("a?c", "abc", True),
+        ("a?c", "a/c", False),
+        ("**/build", "x/y/build", True),
+        ("**/build", "build", True),
+        ("a/**", "a/b/c", True),
+        ("[ab].story", "b.story", True),
+        ("[!ab].story", "b.story", False),
+        ("[a", "[a", True),
+        ("\\*.story", "*.story", True),
+        ("\\*.story", "a.story", False),
+    ],
+)
+def test_gitignore_translate(pattern, path, matches):
+    regex = re.compile(f"{Gitignore.translate(pattern)}\\Z")
+    assert bool(regex.match(path)) is matches
+
+
+def test_gitignore_parse():
+    rules = Gitignore.parse(
+        ["# comment\n", "\n", "!keep.log\n", "build/ \n", "/a/b\n", "/\n"]
+    )
+    assert [(negated, directories) for _, negated, directories in rules] == [
+        (True, False),
+        (False, True),
+        (False, False),
+    ]
+    assert rules[0][0].match("x/keep.log")
+    assert rules[1][0].match("x/build")
+    assert rules[2][0].match("a/b")
+    assert rules[2][0].match("x/a/b") is None
+
+
+def test_gitignore_read_missing(tmpdir):
+    assert Gitignore.read(str(tmpdir.join("missing"))) == []
+
+
+def test_gitignore_directory_rules(gitignore, repository):
+    rules = gitignore.directory_rules(str(repository))
+    assert len(rules) == 5
+    assert rules[0][0].match("a.exclude")
+    assert gitignore.rules[str(repository)] == rules
+
+
+def test_gitignore_directory_rules_cache(patch, gitignore):
+    patch.object(Gitignore, "read")
+    gitignore.rules["dir"] = "rules"
+    assert gitignore.directory_rules("dir") == "rules"
+    Gitignore.read.assert_not_called()
+
+
+@mark.parametrize(
+    "path,is_dir,ignored",
+    [
+        ("x.story", False, False),
+        (".git", True, True),
+        ("build", True, True),
+        ("build", False, False),
+        ("a/b/build", True, True),
+        ("debug.log", False, True),
+        ("keep.log", False, False),
+        ("a.exclude", False, True),
+        ("root.story", False, True),
+        ("a/root.story", False, False),
+        ("a/one.story", False, True),
+        ("one.story", False, False),
+    ],
+)
+def test_gitignore_ignored(gitignore, repository, path, is_dir, ignored):
+    path = os.path.join(str(repository), *path.split("/"))
+    assert gitignore.ignored(path, is_dir) is ignored
+
+
+def test_gitignore_ignored_outside(gitignore, repository):
+    path = os.path.join(str(repository), os.pardir, "debug.log")
+    assert gitignore.ignored(path, False) is False
+
+
+def test_gitignore_ignored_directory(gitignore, repository):
+    path = str(repository.join("build", "a"))
+    assert gitignore.ignored_directory(path) is True
+    assert gitignore.ignored_directory(str(repository.join("a"))) is False
+    assert gitignore.ignored_directory(str(repository)) is False
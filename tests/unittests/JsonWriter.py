@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+
+from pytest import fixture, mark
+
+from storyscript.JsonWriter import JsonWriter
+
+
+@fixture
+def results():
+    return {
+        "stories": {
+            "a.story": {"tree": {"1": {"args": ["a\nb", None]}}, "x": {}},
+            "b.story": {"tree": {}, "services": ["http"]},
+        },
+        "services": ["http"],
+        "entrypoint": ["a.story", "b.story"],
+    }
+
+
+def write(results, **kwargs):
+    stream = io.StringIO()
+    writer = JsonWriter(stream, **kwargs)
+    for path, story in results["stories"].items():
+        writer.story(path, story)
+    writer.end(results["services"], results["entrypoint"])
+    return stream.getvalue()
+
+
+def test_jsonwriter_init():
+    writer = JsonWriter("stream")
+    assert writer.stream == "stream"
+    assert writer.indent == 2
+    assert writer.concise is False
+    assert writer.separator == ","
+    assert JsonWriter("stream", indent=None).separator == ", "
+
+
+@mark.parametrize("indent", [None, 2, 4])
+def test_jsonwriter(results, indent):
+    assert write(results, indent=indent) == json.dumps(results, indent=indent)
+
+
+@mark.parametrize("indent", [None, 2])
+def test_jsonwriter_empty(indent):
+    results = {"stories": {}, "services": [], "entrypoint": []}
+    assert write(results, indent=indent) == json.dumps(results, indent=indent)
+
+
+def test_jsonwriter_concise():
+    results = {"stories": {}, "services": [], "entrypoint": []}
+    assert write(results, concise=True) == "{}"
+    results["entrypoint"] = ["a.story"]
+    expected = json.dumps({"entrypoint": ["a.story"]}, indent=2)
+    assert write(results, concise=True) == expected
+
+
+def test_jsonwriter_dumps():
+    writer = JsonWriter(None)
+    assert writer.dumps({"a": 1}, 1) == '{\n    "a": 1\n  }'
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+
+from pytest import fixture, mark, raises
+
+from storyscript import PackedBundle as PackedBundleModule
+from storyscript.PackedBundle import PackedBundle
+
+
+@fixture
+def results():
+    return {
+        "stories": {
+            "a.story": {"tree": {"1": {"method": "set"}}},
+            "b.story": {"tree": {}, "services": ["http"]},
+        },
+        "services": ["http"],
+        "entrypoint": ["a.story", "b.story"],
+    }
+
+
+@fixture
+def packed(tmpdir, results):
+    path = tmpdir.join("bundle.pack")
+    path.write_binary(PackedBundle.pack(results))
+    with PackedBundle(str(path)) as packed:
+        yield packed
+
+
+def test_packedbundle_pack(results):
+    data = PackedBundle.pack(results)
+    header, payloads = data.split(b"\n", 1)
+    manifest = json.loads(header)
+    assert manifest["version"] == PackedBundle.format_version
+    assert manifest["entrypoint"] == ["a.story", "b.story"]
+    assert manifest["services"] == ["http"]
+    entry = manifest["stories"]["b.story"]
+    payload = payloads[entry["offset"] : entry["offset"] + entry["length"]]
+    assert json.loads(payload) == results["stories"]["b.story"]
+    assert entry["hash"] == PackedBundle.digest(payload)
+
+
+def test_packedbundle_pack_concise():
+    data = PackedBundle.pack({"stories": {}})
+    manifest = json.loads(data.split(b"\n", 1)[0])
+    assert manifest["entrypoint"] == []
+    assert manifest["services"] == []
+
+
+def test_packedbundle_init(packed, results):
+    assert packed.entrypoint() == ["a.story", "b.story"]
+    assert packed.services() == ["http"]
+    assert packed.start == PackedBundle.pack(results).index(b"\n") + 1
+
+
+def test_packedbundle_init_invalid(tmpdir):
+    path = tmpdir.join("bundle.json")
+    path.write('{"stories": {}}\n')
+    with raises(ValueError):
+        PackedBundle(str(path))
+
+
+@mark.parametrize("header", ["not json\n", "[]\n", ""])
+def test_packedbundle_init_invalid_header(patch, tmpdir, header):
+    """
+    Ensures the file is closed if the header isn't a manifest
+    """
+    path = tmpdir.join("bundle.json")
+    path.write(header)
+    files = []
+    patch.object(
+        PackedBundleModule,
+        "open",
+        create=True,
+        side_effect=lambda *args: files.append(io.open(*args)) or files[-1],
+    )
+    with raises(ValueError):
+        PackedBundle(str(path))
+    assert files[0].closed
+
+
+def test_packedbundle_story(packed, results):
+    for path, story in results["stories"].items():
+        assert packed.story(path) == story
+        assert packed.story(path, verify=True) == story
+
+
+def test_packedbundle_story_corrupted(patch, packed):
+    packed.manifest["stories"]["a.story"]["hash"] = "0"
+    assert packed.story("a.story") == {"tree": {"1": {"method": "set"}}}
+    with raises(ValueError):
+        packed.story("a.story", verify=True)
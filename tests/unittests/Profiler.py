@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import json
+import pstats
+import tracemalloc
+
+from pytest import fixture, raises
+
+from storyscript import Profiler as ProfilerModule
+from storyscript.Profiler import Profiler
+
+
+@fixture
+def profiler():
+    return Profiler()
+
+
+def test_profiler_init(profiler):
+    assert profiler.memory is False
+    assert profiler.stories == {}
+    assert profiler.profile is None
+
+
+def test_profiler_phase(profiler):
+    with profiler.phase("a.story", "parse"):
+        assert tracemalloc.is_tracing() is False
+    with profiler.phase("a.story", "parse"):
+        pass
+    stats = profiler.stories["a.story"]["parse"]
+    assert stats["calls"] == 2
+    assert stats["time"] > 0
+    assert stats["peak_memory"] == 0
+
+
+def test_profiler_phase_memory():
+    profiler = Profiler(memory=True)
+    with profiler.phase("a.story", "parse"):
+        data = [0] * 10000
+    assert profiler.stories["a.story"]["parse"]["peak_memory"] >= len(data)
+    assert tracemalloc.is_tracing() is False
+
+
+def test_profiler_phase_memory_untimed(patch):
+    """
+    Ensures memory tracing starts and stops outside the timed region
+    """
+    calls = []
+
+    def record(name, value=None):
+        return lambda: calls.append(name) or value
+
+    patch.object(tracemalloc, "is_tracing", return_value=False)
+    patch.object(tracemalloc, "start", side_effect=record("start"))
+    patch.object(tracemalloc, "stop", side_effect=record("stop"))
+    patch.object(tracemalloc, "get_traced_memory", return_value=(0, 0))
+    patch.object(
+        ProfilerModule.time, "perf_counter", side_effect=record("time", 1.0)
+    )
+    with Profiler(memory=True).phase("a.story", "parse"):
+        pass
+    assert calls == ["start", "time", "time", "stop"]
+
+
+def test_profiler_phase_error(profiler):
+    """
+    Ensures failing phases are recorded too
+    """
+    with raises(ValueError):
+        with profiler.phase("a.story", "parse"):
+            raise ValueError()
+    assert profiler.stories["a.story"]["parse"]["calls"] == 1
+    assert tracemalloc.is_tracing() is False
+
+
+def test_profiler_report(profiler):
+    profiler.stories = {
+        "a.story": {"parse": {"time": 1.0, "calls": 1, "peak_memory": 10}},
+        "b.story": {"parse": {"time": 2.0, "calls": 1, "peak_memory": 5}},
+    }
+    result = profiler.report()
+    assert result["stories"] == profiler.stories
+    assert result["phases"] == {
+        "parse": {"time": 3.0, "calls": 2, "peak_memory": 10}
+    }
+
+
+def test_profiler_write(tmpdir, profiler):
+    with profiler.phase("a.story", "parse"):
+        pass
+    path = str(tmpdir.join("report.json"))
+    profiler.write(path)
+    with open(path) as f:
+        assert json.load(f) == profiler.report()
+
+
+def test_profiler_dump_stats(tmpdir):
+    profiler = Profiler(cprofile=True)
+    with profiler.phase("a.story", "parse"):
+        sorted([3, 2, 1])
+    path = str(tmpdir.join("compile.prof"))
+    profiler.dump_stats(path)
+    assert pstats.Stats(path).total_calls > 0
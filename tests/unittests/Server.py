@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import stat
+
+from pytest import fixture, mark, raises
+
+from storyscript import Server as ServerModule
+from storyscript.Api import Api
+from storyscript.Server import Server
+from storyscript.Story import Story
+from storyscript.compiler.semantics.functions.MutationTable import (
+    MutationTable,
+)
+from storyscript.exceptions import StoryError
+
+
+@fixture
+def server():
+    return Server(features={"globals": True}, hub="hub")
+
+
+@fixture
+def request_line():
+    def request_line(method, params=None, id=1):
+        request = {"jsonrpc": "2.0", "id": id, "method": method}
+        if params is not None:
+            request["params"] = params
+        return json.dumps(request)
+
+    return request_line
+
+
+def test_server_init():
+    server = Server()
+    assert server.features == {}
+    assert server.hub is None
+
+
+def test_server_warm(patch):
+    patch.many(ServerModule, ["_parser", "story_hub"])
+    patch.object(MutationTable, "instance")
+    Server.warm()
+    assert ServerModule._parser.call_count == 1
+    assert ServerModule.story_hub.call_count == 1
+    assert MutationTable.instance.call_count == 1
+
+
+def test_server_story_features(server):
+    result = server.story_features({"debug": True})
+    assert result == {"globals": True, "debug": True}
+    assert server.story_features(None) == {"globals": True}
+
+
+def test_server_message(magic):
+    error = magic()
+    error.error_tuple = ("E0101", "message")
+    result = Server.message(error)
+    assert error.with_color is False
+    assert result == {"code": "E0101", "message": error.message()}
+
+
+def test_server_compilation(patch, magic):
+    patch.object(Server, "message")
+    result = magic()
+    result.deprecations.return_value = ["deprecation"]
+    result.errors.return_value = []
+    compilation = Server.compilation(result, lambda compiled: "output")
+    Server.message.assert_called_with("deprecation")
+    assert compilation == {
+        "success": result.success(),
+        "result": "output",
+        "errors": [],
+        "deprecations": [Server.message()],
+    }
+
+
+def test_server_compilation_error(patch, magic):
+    patch.object(Server, "message")
+    result = magic()
+    result.success.return_value = False
+    result.deprecations.return_value = {"a.story": []}
+    result.errors.return_value = ["error"]
+    compilation = Server.compilation(result, lambda compiled: "output")
+    assert compilation["result"] is None
+    assert compilation["errors"] == [Server.message("error")]
+    assert compilation["deprecations"] == {"a.story": []}
+
+
+def test_server_compile(patch, server):
+    patch.object(Api, "loads")
+    patch.object(Server, "compilation")
+    result = server.compile("a = 1", features={"debug": True})
+    Api.loads.assert_called_with(
+        "a = 1", features={"globals": True, "debug": True}, hub="hub"
+    )
+    assert Server.compilation.call_args[0][0] == Api.loads()
+    assert result == Server.compilation()
+
+
+def test_server_compile_map(patch, server):
+    patch.object(Api, "load_map")
+    patch.object(Server, "compilation")
+    result = server.compile_map({"a.story": "a = 1"})
+    Api.load_map.assert_called_with(
+        {"a.story": "a = 1"}, features={"globals": True}, hub=server.hub
+    )
+    assert Server.compilation.call_args[0][0] == Api.load_map()
+    assert result == Server.compilation()
+
+
+def test_server_format(patch, server):
+    patch.init(Story)
+    patch.object(Story, "parse")
+    result = server.format("a = 1")
+    Story.parse.assert_called_with(parser=None)
+    assert result == Story.parse().format()
+
+
+def test_server_lex(patch, magic, server):
+    patch.init(Story)
+    token = magic(type="NAME", value="a", line=1, column=1)
+    patch.object(Story, "lex", return_value=[token])
+    result = server.lex("a")
+    Story.lex.assert_called_with(parser=None)
+    assert result == [{"type": "NAME", "value": "a", "line": 1, "column": 1}]
+
+
+def test_server_handle(patch, server, request_line):
+    patch.object(Server, "format", return_value="a = 1")
+    result = server.handle(request_line("format", {"source": "a  = 1"}))
+    Server.format.assert_called_with(source="a  = 1")
+    assert result == {"jsonrpc": "2.0", "id": 1, "result": "a = 1"}
+
+
+def test_server_handle_notification(patch, server):
+    patch.object(Server, "format")
+    request = {"jsonrpc": "2.0", "method": "format", "params": {"source": ""}}
+    assert server.handle(json.dumps(request)) is None
+    assert Server.format.call_count == 1
+
+
+@mark.parametrize(
+    "method,params",
+    [
+        ("warm", {}),
+        ("format", {"story": "a = 1"}),
+        ("format", {"source": "a ="}),
+        ("lex", {"source": "a"}),
+    ],
+)
+def test_server_handle_notification_error(patch, server, method, params):
+    """
+    Ensures failed notifications aren't answered either
+    """
+    patch.object(Server, "format", side_effect=StoryError(None, None))
+    patch.object(Server, "message", return_value={"message": "m"})
+    patch.object(Server, "lex", side_effect=ValueError("ICE"))
+    request = {"jsonrpc": "2.0", "method": method, "params": params}
+    assert server.handle(json.dumps(request)) is None
+
+
+def test_server_handle_parse_error(server):
+    result = server.handle("{")
+    assert result["id"] is None
+    assert result["error"]["code"] == Server.parse_error
+
+
+def test_server_handle_invalid_request(server, request_line):
+    assert server.handle("[]")["error"]["code"] == Server.invalid_request
+    result = server.handle(request_line("format", params=[1]))
+    assert result["error"]["code"] == Server.invalid_request
+
+
+def test_server_handle_method_not_found(server, request_line):
+    result = server.handle(request_line("warm"))
+    assert result["id"] == 1
+    assert result["error"]["code"] == Server.method_not_found
+
+
+def test_server_handle_invalid_params(server, request_line):
+    result = server.handle(request_line("format", {"story": "a = 1"}))
+    assert result["error"]["code"] == Server.invalid_params
+
+
+def test_server_handle_story_error(patch, server, request_line):
+    error = StoryError(None, None)
+    patch.object(Server, "format", side_effect=error)
+    patch.object(
+        Server, "message", return_value={"code": "E0001", "message": "m"}
+    )
+    result = server.handle(request_line("format", {"source": "a ="}))
+    Server.message.assert_called_with(error)
+    assert result["error"] == {
+        "code": Server.story_error,
+        "message": "m",
+        "data": {"code": "E0001", "message": "m"},
+    }
+
+
+def test_server_handle_internal_error(patch, server, request_line):
+    patch.object(Server, "format", side_effect=ValueError("ICE"))
+    result = server.handle(request_line("format", {"source": "a"}))
+    assert result["error"] == {"code": Server.internal_error, "message": "ICE"}
+
+
+def test_server_serve(patch, server):
+    patch.object(Server, "handle", side_effect=[{"id": 1}, None])
+    outstream = io.StringIO()
+    server.serve(io.StringIO("one\n\ntwo\n"), outstream)
+    assert Server.handle.call_count == 2
+    assert outstream.getvalue() == '{"id": 1}\n'
+
+
+def test_server_serve_lock(patch, server):
+    """
+    Ensures requests of concurrent connections are handled one at a time
+    """
+    locked = []
+    patch.object(
+        Server,
+        "handle",
+        side_effect=lambda line: locked.append(server.lock.locked()),
+    )
+    server.serve(io.StringIO("one\n"), io.StringIO())
+    assert locked == [True]
+    assert server.lock.locked() is False
+
+
+def test_server_serve_socket(patch, magic, server):
+    patch.object(ServerModule.socketserver, "ThreadingUnixStreamServer")
+    patch.object(ServerModule.os.path, "exists", return_value=True)
+    patch.object(
+        ServerModule.os, "stat", return_value=magic(st_mode=stat.S_IFSOCK)
+    )
+    patch.object(ServerModule.os, "remove")
+    server.serve_socket("storyscript.sock")
+    ServerModule.socketserver.ThreadingUnixStreamServer.assert_called_with(
+        "storyscript.sock", ServerModule.RequestHandler
+    )
+    unix_server = ServerModule.socketserver.ThreadingUnixStreamServer()
+    assert unix_server.rpc == server
+    assert unix_server.daemon_threads is True
+    assert unix_server.serve_forever.call_count == 1
+    assert ServerModule.os.remove.call_count == 2
+
+
+def test_server_serve_socket_not_socket(patch, tmpdir, server):
+    """
+    Ensures serve_socket doesn't remove files which aren't sockets
+    """
+    patch.object(ServerModule.socketserver, "ThreadingUnixStreamServer")
+    path = tmpdir.join("notes.txt")
+    path.write("notes")
+    with raises(FileExistsError):
+        server.serve_socket(str(path))
+    assert path.read() == "notes"
+    ServerModule.socketserver.ThreadingUnixStreamServer.assert_not_called()
@@ -179,10 +179,17 @@ def test_story_format(patch, story):
     patch.object(PrettyPrinter, "compile")
     story.tree = "tree"
     r = story.format()
-    PrettyPrinter.compile.assert_called_with(story.tree)
+    PrettyPrinter.compile.assert_called_with(story.tree, writer=None)
     assert r == PrettyPrinter.compile()
 
 
+def test_story_format_writer(patch, story):
+    patch.object(PrettyPrinter, "compile")
+    story.tree = "tree"
+    story.format(writer="writer")
+    PrettyPrinter.compile.assert_called_with(story.tree, writer="writer")
+
+
 @mark.parametrize("error", [StorySyntaxError("error"), CompilerError("error")])
 def test_format_story_compiler_error(patch, story, compiler, error):
     """
@@ -247,3 +254,25 @@ def test_storycontext_deprecate(patch, storycontext):
     StoryModule.deprecate.assert_called_with(token=token, name="deprecation_2")
 
     assert storycontext.deprecations() == ["d1", "d2"]
+
+
+def test_storycontext_phase(storycontext):
+    with storycontext.phase("parse"):
+        pass
+
+
+def test_storycontext_phase_profiler(magic):
+    profiler = magic()
+    storycontext = StoryContext(
+        features=None, hub=None, name="a.story", profiler=profiler
+    )
+    result = storycontext.phase("parse")
+    profiler.phase.assert_called_with("a.story", "parse")
+    assert result == profiler.phase()
+
+
+def test_story_parse_profiler(patch, magic, parser):
+    profiler = magic()
+    story = Story("story", features=None, path="a.story", profiler=profiler)
+    story.parse(parser=parser)
+    profiler.phase.assert_called_with("a.story", "parse")
@@ -1,10 +1,37 @@
+from importlib import metadata
+
 import pkg_resources
 
 
+from storyscript import Version as VersionModule
 from storyscript.Version import get_version
 
 
+def test_version(patch):
+    patch.object(metadata, "version", return_value="1.2.3")
+    assert get_version() == "1.2.3"
+    metadata.version.assert_called_with("storyscript")
+
+
 def test_version_failure(patch):
+    patch.object(
+        metadata, "version", side_effect=metadata.PackageNotFoundError
+    )
+    version = get_version()
+    metadata.version.assert_called_with("storyscript")
+    assert version == "0.0.0"
+
+
+def test_version_pkg_resources(patch):
+    patch.object(VersionModule, "metadata", None)
+    patch.object(pkg_resources, "get_distribution")
+    version = get_version()
+    pkg_resources.get_distribution.assert_called_with("storyscript")
+    assert version == pkg_resources.get_distribution().version
+
+
+def test_version_pkg_resources_failure(patch):
+    patch.object(VersionModule, "metadata", None)
     patch.object(
         pkg_resources,
         "get_distribution",
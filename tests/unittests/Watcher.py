@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import os
+import time
+
+from pytest import fixture
+
+from storyscript.Bundle import Bundle
+from storyscript.Watcher import Watcher
+
+
+@fixture
+def watcher():
+    return Watcher("path")
+
+
+def test_watcher_init(watcher):
+    assert watcher.path == "path"
+    assert watcher.ignored_path is None
+    assert watcher.interval == 0.5
+    assert watcher.mtimes == {}
+
+
+def test_watcher_stories(patch, watcher):
+    patch.object(os.path, "isdir", return_value=True)
+    patch.object(Bundle, "parse_directory")
+    watcher.ignored_path = "ignored"
+    result = watcher.stories()
+    Bundle.parse_directory.assert_called_with("path", ignored_path="ignored")
+    assert result == Bundle.parse_directory()
+
+
+def test_watcher_stories_file(patch, watcher):
+    patch.object(os.path, "isdir", return_value=False)
+    assert watcher.stories() == ["path"]
+
+
+def test_watcher_snapshot(tmpdir):
+    story = tmpdir.join("a.story")
+    story.write("a = 1")
+    watcher = Watcher(str(story))
+    assert watcher.snapshot() == {str(story): os.stat(story).st_mtime_ns}
+
+
+def test_watcher_snapshot_removed(patch, watcher):
+    patch.object(Watcher, "stories", return_value=["a.story"])
+    patch.object(os, "stat", side_effect=FileNotFoundError())
+    assert watcher.snapshot() == {}
+
+
+def test_watcher_poll(patch, watcher):
+    mtimes = {"a.story": 1, "b.story": 3, "d.story": 1}
+    patch.object(Watcher, "snapshot", return_value=mtimes)
+    watcher.mtimes = {"a.story": 1, "b.story": 2, "c.story": 1}
+    changed, removed = watcher.poll()
+    assert changed == ["b.story", "d.story"]
+    assert removed == ["c.story"]
+    assert watcher.mtimes == mtimes
+
+
+def test_watcher_watch(patch, magic, watcher):
+    patch.object(
+        Watcher,
+        "poll",
+        side_effect=[(["a.story"], []), ([], []), KeyboardInterrupt()],
+    )
+    patch.object(time, "sleep")
+    callback = magic()
+    watcher.watch(callback)
+    callback.assert_called_once_with(["a.story"], [])
+    time.sleep.assert_called_with(0.5)
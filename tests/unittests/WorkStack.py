@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+from pytest import raises
+
+from storyscript.WorkStack import WorkStack
+
+
+def depth(level):
+    if level == 0:
+        return 0
+    result = yield depth(level - 1)
+    return result + 1
+
+
+def failing(level):
+    if level == 0:
+        raise ValueError(level)
+    yield failing(level - 1)
+
+
+def test_workstack_run():
+    assert WorkStack.run(depth(0)) == 0
+    assert WorkStack.run(depth(3)) == 3
+
+
+def test_workstack_run_deep():
+    """
+    Ensures tasks can be nested deeper than the recursion limit
+    """
+    assert WorkStack.run(depth(100000)) == 100000
+
+
+def test_workstack_run_error():
+    with raises(ValueError):
+        WorkStack.run(failing(3))
+
+
+def test_workstack_run_error_caught():
+    """
+    Ensures errors of a subtask are raised in the task waiting for it
+    """
+
+    def task():
+        try:
+            yield failing(2)
+        except ValueError:
+            return "caught"
+
+    assert WorkStack.run(task()) == "caught"
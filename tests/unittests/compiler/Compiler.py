@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from storyscript.compiler import Compiler
+from storyscript.compiler.binary import BinaryEncoder
 from storyscript.compiler.json import JSONCompiler
 from storyscript.compiler.lowering import Lowering
 from storyscript.compiler.semantics import Semantics
@@ -19,6 +20,7 @@ def test_compiler_generate(patch, magic):
     )
     Lowering.process.assert_called_with(tree)
     Semantics.process.assert_called_with(Lowering.process())
+    storycontext.phase.assert_called_with("lowering")
     assert result == (Lowering.process(), Semantics.process())
 
 
@@ -30,6 +32,19 @@ def test_compiler_compile(patch, magic):
     result = Compiler.compile(tree, story=story)
     Compiler.generate.assert_called_with(tree, story.context, scope=None)
     JSONCompiler.compile.assert_called_with("tree")
+    story.context.phase.assert_called_with("json")
     assert result.output() == JSONCompiler.compile()
     assert result.module() == "sem"
     assert result.backend == "json"
+
+
+def test_compiler_compile_binary(patch, magic):
+    patch.object(Compiler, "generate", return_value=("tree", "sem"))
+    patch.object(JSONCompiler, "compile")
+    patch.object(BinaryEncoder, "encode")
+    story = magic()
+    result = Compiler.compile(magic(), story=story, backend="binary")
+    BinaryEncoder.encode.assert_called_with(JSONCompiler.compile())
+    story.context.phase.assert_called_with("binary")
+    assert result.output() == BinaryEncoder.encode()
+    assert result.backend == "binary"
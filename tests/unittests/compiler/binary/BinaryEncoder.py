@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import json
+from collections import Counter
+
+from pytest import mark, raises
+
+from storyscript.compiler.binary.BinaryEncoder import BinaryEncoder
+
+
+@mark.parametrize(
+    "value",
+    [
+        None,
+        True,
+        False,
+        0,
+        -1,
+        63,
+        -64,
+        2**70,
+        -(2**70),
+        1.5,
+        "",
+        "ü",
+        [],
+        {},
+        [1, [2, None], {"a": "b"}],
+        {"tree": {"1": {"method": "set", "args": [{"$OBJECT": "int"}]}}},
+    ],
+)
+def test_binaryencoder_round_trip(value):
+    assert BinaryEncoder.decode(BinaryEncoder.encode(value)) == value
+
+
+def test_binaryencoder_round_trip_tuple():
+    assert BinaryEncoder.decode(BinaryEncoder.encode((1, 2))) == [1, 2]
+
+
+@mark.parametrize("value", [0, 1, 127, 128, 300, 2**64])
+def test_binaryencoder_varint(value):
+    buffer = bytearray()
+    BinaryEncoder.write_varint(buffer, value)
+    assert BinaryEncoder.read_varint(buffer, 0) == (value, len(buffer))
+
+
+def test_binaryencoder_count_strings():
+    counter = Counter()
+    BinaryEncoder.count_strings({"a": ["b", "a", 1]}, counter)
+    assert counter == {"a": 2, "b": 1}
+
+
+def test_binaryencoder_encode_string_table():
+    """
+    Ensures strings are stored once and ordered by frequency
+    """
+    value = [{"method": "a"}, {"method": "b"}, {"method": "b"}]
+    data = BinaryEncoder.encode(value)
+    assert data.startswith(BinaryEncoder.magic)
+    assert data.count(b"method") == 1
+    assert data.index(b"method") < data.index(b"b") < data.index(b"a")
+
+
+def test_binaryencoder_encode_smaller():
+    value = {
+        str(line): {"method": "expression", "ln": str(line), "src": "a = 1"}
+        for line in range(100)
+    }
+    assert len(BinaryEncoder.encode(value)) < len(json.dumps(value)) / 2
+
+
+def test_binaryencoder_encode_invalid():
+    with raises(TypeError):
+        BinaryEncoder.encode({1: "a"})
+    with raises(TypeError):
+        BinaryEncoder.encode(object())
+
+
+def test_binaryencoder_decode_invalid():
+    with raises(ValueError):
+        BinaryEncoder.decode(b"{}")
+    with raises(ValueError):
+        BinaryEncoder.decode(BinaryEncoder.magic + b"\x00\x08")
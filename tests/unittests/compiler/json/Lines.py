@@ -19,7 +19,8 @@ def test_lines_init(lines):
     assert lines.variables == []
     assert lines.services == []
     assert lines.functions == {}
-    assert lines.output_scopes == []
+    assert lines.output_scopes == {}
+    assert lines.variable_names == set()
 
 
 def test_lines_first(patch, lines):
@@ -49,6 +50,14 @@ def test_lines_set_name(patch, lines):
     assert d["name"] == "name"
 
 
+def test_lines_set_name_variable_names(patch, lines):
+    patch.object(Lines, "last", return_value={})
+    name = ["a", {"$OBJECT": "dot", "dot": "b"}]
+    lines.set_name(name)
+    assert lines.variables == [name]
+    assert lines.variable_names == {"a"}
+
+
 def test_lines_set_next(patch, lines):
     lines.lines["1"] = {}
     patch.object(Lines, "last", return_value=lines.lines["1"])
@@ -57,38 +66,55 @@ def test_lines_set_next(patch, lines):
 
 
 def test_lines_set_scope(patch, lines):
-    lines.output_scopes = []
     lines.set_scope("2", "1", [])
-    assert lines.output_scopes[0]["2"] == {"parent": "1", "output": []}
+    assert lines.scopes == ["2"]
+    assert lines.output_scopes["2"] == set()
 
 
 def test_lines_set_scope_output(lines):
-    lines.output_scopes = []
     lines.set_scope("2", "1", output=["x"])
-    assert lines.output_scopes[0]["2"]["output"] == ["x"]
+    assert lines.output_scopes["2"] == {"x"}
+
+
+def test_lines_set_scope_parent_output(lines):
+    """
+    Ensures the outputs of the parent scopes are visible in a scope
+    """
+    lines.set_scope("1", None, output=["x"])
+    lines.set_scope("2", "1", output=["y"])
+    lines.set_scope("3", "2", output=[])
+    assert lines.output_scopes["3"] == {"x", "y"}
 
 
 def test_lines_finish_scope(lines):
     lines.scopes = ["1", "2"]
-    lines.output_scopes = [1, 2]
+    lines.output_scopes = {"1": set(), "2": set()}
     lines.finish_scope(".")
     assert lines.finished_scopes == ["2"]
+    assert lines.output_scopes == {"1": set()}
     lines.finish_scope(".")
     assert lines.finished_scopes == ["2", "1"]
+    assert lines.output_scopes == {}
 
 
 def test_lines_is_output(lines):
-    lines.output_scopes = [{"1": {"parent": None, "output": ["service"]}}]
+    lines.set_scope("1", None, ["service"])
     assert lines.is_output("1", "service") is True
 
 
 def test_lines_is_output_from_parent(lines):
-    lines.output_scopes = [
-        {"2": {"parent": "1", "output": []}, "1": {"output": ["service"]}}
-    ]
+    lines.set_scope("1", None, ["service"])
+    lines.set_scope("2", "1", [])
     assert lines.is_output("2", "service") is True
 
 
+def test_lines_is_output_finished_parent(lines):
+    lines.set_scope("1", None, ["service"])
+    lines.finish_scope("1")
+    lines.set_scope("2", "1", [])
+    assert lines.is_output("2", "service") is False
+
+
 def test_lines_is_output_false(lines):
     assert lines.is_output("1", "service") is False
 
@@ -257,8 +283,13 @@ def test_lines_is_variable_defined(patch, lines):
     """
     Ensures that the check for previously seen variables works
     """
-    lines.variables = [["one", "two"], ["three"]]
+    lines.variable_names = {"one", "two", "three"}
     assert lines.is_variable_defined("one")
     assert lines.is_variable_defined("two")
     assert lines.is_variable_defined("three")
     assert not lines.is_variable_defined("four")
+
+
+def test_lines_is_variable_defined_path(lines):
+    lines.variable_names = {"one"}
+    assert not lines.is_variable_defined(["one"])
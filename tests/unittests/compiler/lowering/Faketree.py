@@ -137,6 +137,28 @@ def test_faketree_path_line(fake_tree):
     assert fake_tree.path(line=1).child(0).line == 1
 
 
+def test_faketree_mark_line(fake_tree):
+    first = Token("NAME", "a", line="1")
+    second = Token("NAME", "b", line="1")
+    tree = Tree("expression", [first, Tree("path", [second])])
+    fake_tree.mark_line(tree, "1.1")
+    assert first.line == "1.1"
+    assert second.line == "1.1"
+
+
+def test_faketree_mark_line_deep(fake_tree):
+    """
+    Ensures the lines of a tree nested deeper than the recursion limit can
+    be updated
+    """
+    token = Token("NAME", "a", line="1")
+    tree = Tree("path", [token])
+    for _ in range(5000):
+        tree = Tree("expression", [tree])
+    fake_tree.mark_line(tree, "1.1")
+    assert token.line == "1.1"
+
+
 def test_faketree_set_line(patch, fake_tree):
     tok = Token("NAME", "foo")
     tree = Tree("path", [tok])
@@ -173,7 +195,7 @@ def test_faketree_add_assignment(patch, fake_tree, block):
     block.child.return_value = None
     result = fake_tree.add_assignment("value", original_line=10)
     FakeTree.assignment.assert_called_with("value")
-    assert block.children == [FakeTree.assignment(), 1]
+    block.set_children.assert_called_with([FakeTree.assignment(), 1])
     path_tok = FakeTree.assignment().path.child(0)
     Tree.create_token_from_tok.assert_called_with(
         path_tok, "NAME", path_tok.value
@@ -190,7 +212,7 @@ def test_faketree_add_assignment_more_children(patch, fake_tree, block):
     block.children = ["c1", fake_tree.block.last_child()]
     fake_tree.add_assignment("value", original_line=42)
     expected = [FakeTree.assignment(), "c1", block.last_child()]
-    assert block.children == expected
+    block.set_children.assert_called_with(expected)
 
 
 def test_faketree_add_assignment_four_children(patch, fake_tree, block):
@@ -199,7 +221,7 @@ def test_faketree_add_assignment_four_children(patch, fake_tree, block):
     block.children = ["c1", "c2", "c3", fake_tree.block.last_child()]
     fake_tree.add_assignment("value", original_line=42)
     expected = ["c1", FakeTree.assignment(), "c2", "c3", block.last_child()]
-    assert block.children == expected
+    block.set_children.assert_called_with(expected)
 
 
 def test_faketree_add_assignment_four_children_bottom(patch, fake_tree, block):
@@ -208,4 +230,4 @@ def test_faketree_add_assignment_four_children_bottom(patch, fake_tree, block):
     block.children = ["c1", "c2", "c3", fake_tree.block.last_child()]
     fake_tree.add_assignment("value", original_line=42)
     expected = ["c1", "c2", "c3", FakeTree.assignment(), block.last_child()]
-    assert block.children == expected
+    block.set_children.assert_called_with(expected)
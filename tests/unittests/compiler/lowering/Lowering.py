@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
 from unittest import mock
 
+from lark.lexer import Token
+
 from pytest import fixture
 
 from storyscript.compiler.lowering import FakeTree, Lowering
+from storyscript.exceptions import StorySyntaxError
 from storyscript.parser import Tree
 
 
@@ -78,6 +81,70 @@ def test_preprocessor_process(patch, magic, preprocessor):
     )
 
 
+def test_preprocessor_process_traversals(patch, magic, preprocessor):
+    """
+    Check that process applies the traversals in order
+    """
+    patch.many(Lowering, ["walk", "visit", "visit_path"])
+    tree = magic()
+    preprocessor.process(tree)
+    assert preprocessor.walk.call_args_list == [
+        mock.call(tree, preprocessor.rewrites),
+        mock.call(tree, preprocessor.string_templates),
+        mock.call(tree, preprocessor.call_rewrites),
+        mock.call(tree, preprocessor.value_rewrites),
+    ]
+    preprocessor.visit_path.assert_called_with(tree, None)
+
+
+def test_preprocessor_walk(magic, preprocessor):
+    traversal = magic()
+    preprocessor.fake_trees = {1: "fake_tree"}
+    preprocessor.walk("tree", traversal)
+    traversal.walk.assert_called_with("tree")
+    assert preprocessor.fake_trees == {}
+
+
+def test_preprocessor_block_fake_tree(preprocessor):
+    block = Tree("block", [])
+    fake_tree = preprocessor.block_fake_tree(block)
+    assert preprocessor.block_fake_tree(block) is fake_tree
+    Lowering.fake_tree.assert_called_once_with(block)
+
+
+def test_preprocessor_lower_concise_when_nested(patch, magic, preprocessor):
+    """
+    Check that only root-level blocks are searched for concise_when_blocks
+    """
+    patch.object(Lowering, "process_concise_block")
+    block = Tree("block", [Tree("concise_when_block", [])])
+    preprocessor.lower_concise_when(block, Tree("nested_block", []), block)
+    Lowering.process_concise_block.assert_not_called()
+
+
+def test_preprocessor_lower_concise_when(patch, preprocessor):
+    patch.object(Lowering, "process_concise_block")
+    concise_when = Tree("concise_when_block", [])
+    block = Tree("block", [concise_when])
+    preprocessor.lower_concise_when(block, Tree("start", [block]), block)
+    Lowering.process_concise_block.assert_called_with(
+        concise_when, Lowering.fake_tree()
+    )
+    assert block.children == [Lowering.process_concise_block()]
+
+
+def test_preprocessor_lower_destructoring_path(patch, preprocessor):
+    """
+    Check that plain assignments are kept
+    """
+    patch.object(Lowering, "block_fake_tree")
+    rules = Tree("rules", [Tree("assignment", [Tree("path", [])])])
+    block = Tree("block", [rules])
+    preprocessor.lower_destructoring(rules, block, block)
+    Lowering.block_fake_tree.assert_not_called()
+    assert block.children == [rules]
+
+
 def test_preprocessor_is_inline_expression(magic):
     """
     Check that inline_expressions are correctly detected
@@ -323,7 +390,7 @@ def test_preprocessor_visit_base_expression(
     replace.assert_called_with(
         base_expression, preprocessor.fake_tree(), base_expression
     )
-    assert base_expression.children == [Tree("path", ["42"])]
+    base_expression.set_children.assert_called_with([Tree("path", ["42"])])
     assert replace.call_count == 1
 
 
@@ -433,3 +500,87 @@ def test_objects_flatten_template_escapes_uni3(patch, tree):
     assert result == [
         flatten_to_string(r"\N{LATIN CAPITAL LETTER A}"),
     ]
+
+
+def test_lowering_eval(magic, preprocessor):
+    """
+    Check that eval parses the code as a single expression
+    """
+    preprocessor.parser = magic()
+    orig_node = magic()
+    orig_node.line.return_value = "2"
+    orig_node.column.return_value = "5"
+    fake_tree = magic()
+    result = preprocessor.eval(orig_node, "foo bar", fake_tree)
+    preprocessor.parser.parse_expression.assert_called_with(
+        "foo bar", line=2, column_offset=6, allow_single_quotes=True
+    )
+    new_node = preprocessor.parser.parse_expression()
+    fake_tree.add_assignment.assert_called_with(new_node, original_line="2")
+    assert result == fake_tree.add_assignment()
+
+
+def test_lowering_eval_plain_path(patch, magic, preprocessor):
+    """
+    Check that eval references plain names directly
+    """
+    patch.object(Lowering, "plain_path")
+    preprocessor.parser = magic()
+    preprocessor.parser.parse_expression.return_value = Tree(
+        "expression",
+        [Tree("entity", [Tree("path", [Token("NAME", "a")])])],
+    )
+    orig_node = magic()
+    orig_node.line.return_value = "1"
+    orig_node.column.return_value = "3"
+    fake_tree = magic()
+    result = preprocessor.eval(orig_node, "a", fake_tree)
+    Lowering.plain_path.assert_called_with(orig_node, "a")
+    fake_tree.add_assignment.assert_not_called()
+    assert result == Lowering.plain_path()
+
+
+def test_lowering_eval_fallback(patch, magic, preprocessor):
+    """
+    Check that eval parses other snippets as story to report their errors
+    """
+    patch.object(Lowering, "eval_story")
+    preprocessor.parser = magic()
+    preprocessor.parser.parse_expression.side_effect = StorySyntaxError(
+        "error"
+    )
+    orig_node = magic()
+    orig_node.line.return_value = "1"
+    orig_node.column.return_value = "3"
+    result = preprocessor.eval(orig_node, "if", "fake_tree")
+    Lowering.eval_story.assert_called_with(orig_node, "if", "fake_tree")
+    assert result == Lowering.eval_story()
+
+
+def test_lowering_eval_no_expression_rule(patch, magic, preprocessor):
+    """
+    Check that eval parses snippets as story if the grammar has no entry
+    point for single expressions
+    """
+    patch.object(Lowering, "eval_story")
+    preprocessor.parser = magic()
+    preprocessor.parser.parses_expressions.return_value = False
+    result = preprocessor.eval("orig_node", "a", "fake_tree")
+    preprocessor.parser.parse_expression.assert_not_called()
+    Lowering.eval_story.assert_called_with("orig_node", "a", "fake_tree")
+    assert result == Lowering.eval_story()
+
+
+def test_lowering_plain_path(magic):
+    """
+    Check that plain_path creates a path to the plain name
+    """
+    orig_node = magic()
+    orig_node.line.return_value = "1"
+    orig_node.column.return_value = "3"
+    orig_node.end_column.return_value = "8"
+    result = Lowering.plain_path(orig_node, " a ")
+    token = result.child(0)
+    assert result.data == "path"
+    assert (token.value, token.line, token.column) == ("a", "1", 4)
+    assert token.end_column == 7
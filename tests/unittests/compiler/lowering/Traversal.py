@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from lark.lexer import Token
+
+from storyscript.compiler.lowering import Traversal
+from storyscript.parser import Tree
+
+
+def test_traversal_init():
+    assert Traversal().handlers == {}
+
+
+def test_traversal_on_enter(magic):
+    handler = magic()
+    traversal = Traversal()
+    assert traversal.on_enter("path", handler) == traversal
+    assert traversal.handlers == {"path": ([handler], [])}
+
+
+def test_traversal_on_leave(magic):
+    handler = magic()
+    traversal = Traversal()
+    assert traversal.on_leave("path", handler) == traversal
+    assert traversal.handlers == {"path": ([], [handler])}
+
+
+def test_traversal_walk_order():
+    """
+    Ensures that enter handlers run top-down and leave handlers bottom-up
+    """
+    calls = []
+    traversal = Traversal()
+    for data in ("start", "path"):
+        traversal.on_enter(data, lambda n, p, b: calls.append(("enter", n)))
+        traversal.on_leave(data, lambda n, p, b: calls.append(("leave", n)))
+    path = Tree("path", [Token("NAME", "a")])
+    tree = Tree("start", [path])
+    traversal.walk(tree)
+    assert calls == [
+        ("enter", tree),
+        ("enter", path),
+        ("leave", path),
+        ("leave", tree),
+    ]
+
+
+def test_traversal_walk_nested():
+    """
+    Ensures that nested trees and their siblings are visited in order
+    """
+    calls = []
+    traversal = Traversal()
+    for data in ("start", "path"):
+        traversal.on_enter(data, lambda n, p, b: calls.append(("enter", n)))
+        traversal.on_leave(data, lambda n, p, b: calls.append(("leave", n)))
+    inner = Tree("path", [Token("NAME", "a")])
+    path = Tree("path", [inner, Tree("path", [])])
+    tree = Tree("start", [path])
+    traversal.walk(tree)
+    assert calls == [
+        ("enter", tree),
+        ("enter", path),
+        ("enter", inner),
+        ("leave", inner),
+        ("leave", path),
+        ("leave", tree),
+    ]
+
+
+def test_traversal_walk_deep():
+    tree = Tree("path", [Token("NAME", "a")])
+    for _ in range(5000):
+        tree = Tree("path", [tree])
+    leaves = []
+    traversal = Traversal().on_leave("path", lambda n, p, b: leaves.append(n))
+    traversal.walk(tree)
+    assert len(leaves) == 5001
+    assert leaves[-1] == tree
+
+
+def test_traversal_walk_context(magic):
+    handler = magic()
+    path = Tree("path", [Token("NAME", "a")])
+    rules = Tree("rules", [path])
+    block = Tree("block", [rules])
+    Traversal().on_enter("path", handler).walk(Tree("start", [block]))
+    handler.assert_called_with(path, rules, block)
+
+
+def test_traversal_walk_rewritten_children(magic):
+    """
+    Ensures that children written by enter handlers are visited
+    """
+    handler = magic()
+    path = Tree("path", [Token("NAME", "a")])
+    traversal = Traversal()
+    traversal.on_enter("entity", lambda n, p, b: n.set_children([path]))
+    traversal.on_enter("path", handler)
+    traversal.walk(Tree("entity", [Tree("values", [])]))
+    handler.assert_called_with(path, Tree("entity", [path]), None)
+
+
+def test_traversal_walk_empty(magic):
+    handler = magic()
+    traversal = Traversal().on_enter("path", handler)
+    traversal.walk(Tree("path", []))
+    traversal.walk(Token("NAME", "a"))
+    handler.assert_not_called()
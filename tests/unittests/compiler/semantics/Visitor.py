@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 from lark.lexer import Token
 
-from storyscript.compiler.semantics.Visitors import SelectiveVisitor
+from storyscript.compiler.semantics.Visitors import (
+    FullVisitor,
+    SelectiveVisitor,
+)
 from storyscript.parser import Tree
 
 
@@ -24,3 +27,41 @@ def test_a_selective_visitor():
     visitor = TestVisitor()
     visitor.visit(tree)
     assert visitor._node == 2
+
+
+def test_a_full_visitor():
+    """
+    Tests a full visitor which visits the children of unknown nodes.
+    """
+
+    class TestVisitor(FullVisitor):
+        def node(self, tree):
+            self.nodes.append(tree)
+
+    node = Tree("node", [])
+    tree = Tree("unknown", [Tree("ignored", [node]), Tree("other", [node])])
+    visitor = TestVisitor(module=None, ignore_nodes=["ignored"])
+    visitor.nodes = []
+    visitor.visit(tree)
+    assert visitor.nodes == [node]
+
+
+def test_a_full_visitor_deep():
+    """
+    Tests a full visitor on a tree nested deeper than the recursion limit.
+    """
+
+    class TestVisitor(FullVisitor):
+        def node(self, tree):
+            self.nodes.append(tree)
+
+    first = Tree("node", [])
+    second = Tree("node", [])
+    tree = Tree("unknown", [first, Tree("ignored", [Tree("node", [])])])
+    for _ in range(5000):
+        tree = Tree("unknown", [tree])
+    tree = Tree("unknown", [tree, second])
+    visitor = TestVisitor(module=None, ignore_nodes=["ignored"])
+    visitor.nodes = []
+    visitor.visit(tree)
+    assert visitor.nodes == [first, second]
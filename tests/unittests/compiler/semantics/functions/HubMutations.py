@@ -1,5 +1,35 @@
+import storyscript.compiler.semantics.functions.HubMutations as HubMutationsModule
 from storyscript.compiler.semantics.functions.HubMutations import Hub
+from storyscript.compiler.semantics.functions.PrecompiledMutations import (
+    PrecompiledMutations,
+)
 
 
 def test_mutations_empty():
     assert len(Hub([]).mutations()) == 0
+
+
+def test_mutations_from_mutations():
+    assert Hub.from_mutations(["mutation"]).mutations() == ["mutation"]
+
+
+def test_mutations_instance(patch):
+    patch.object(HubMutationsModule, "builtins", [])
+    patch.object(PrecompiledMutations, "load", return_value=None)
+    Hub.instance.cache_clear()
+    hub = Hub.instance()
+    Hub.instance.cache_clear()
+    assert hub.mutations() == []
+
+
+def test_mutations_instance_cached():
+    assert Hub.instance() is Hub.instance()
+
+
+def test_mutations_instance_precompiled(patch):
+    patch.object(PrecompiledMutations, "load", return_value=["mutation"])
+    Hub.instance.cache_clear()
+    hub = Hub.instance()
+    Hub.instance.cache_clear()
+    PrecompiledMutations.load.assert_called_with(HubMutationsModule.builtins)
+    assert hub.mutations() == ["mutation"]
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+import sys
+
+from pytest import fixture
+
+from storyscript.compiler.semantics.functions.MutationBuilder import (
+    mutation_builder,
+)
+from storyscript.compiler.semantics.functions.PrecompiledMutations import (
+    PrecompiledMutations,
+)
+from storyscript.compiler.semantics.types.GenericTypes import (
+    ListGenericType,
+    TypeSymbol,
+)
+from storyscript.compiler.semantics.types.Types import IntType
+
+builtins = [
+    {
+        "name": "increment",
+        "input_type": "int",
+        "return_type": "int",
+        "desc": "returns the number + 1",
+        "args": {"a": {"type": "int", "desc": "Dummy arg"}},
+    },
+    {
+        "name": "append",
+        "input_type": "List[A]",
+        "return_type": "List[A]",
+        "desc": "appends an 'item'",
+        "args": {"item": {"type": "A", "desc": "the item"}},
+    },
+    {
+        "name": "keys",
+        "input_type": "Map[K,V]",
+        "return_type": "List[K]",
+        "desc": "returns the keys",
+    },
+]
+
+
+@fixture
+def module(patch, tmpdir, monkeypatch):
+    """
+    Generates the module of the builtins into a temporary directory.
+    """
+    monkeypatch.syspath_prepend(str(tmpdir))
+    patch.object(PrecompiledMutations, "module", "PrecompiledTest")
+    PrecompiledMutations.generate(
+        builtins, str(tmpdir.join("PrecompiledTest.py"))
+    )
+    yield
+    sys.modules.pop("PrecompiledTest", None)
+
+
+def summary(mutation):
+    args = {
+        name: (str(arg["type"]), arg["desc"])
+        for name, arg in mutation.args().items()
+    }
+    return (
+        mutation.name(),
+        str(mutation.type()),
+        args,
+        str(mutation.output()),
+        mutation.desc(),
+    )
+
+
+def test_precompiledmutations_fingerprint():
+    fingerprint = PrecompiledMutations.fingerprint(builtins)
+    assert fingerprint == PrecompiledMutations.fingerprint(list(builtins))
+    assert fingerprint != PrecompiledMutations.fingerprint(builtins[1:])
+
+
+def test_precompiledmutations_type_source():
+    source = PrecompiledMutations.type_source(
+        ListGenericType([TypeSymbol("A")])
+    )
+    assert source == "GenericTypes.ListGenericType([TypeSymbol('A')])"
+    source = PrecompiledMutations.type_source(IntType.instance())
+    assert source == "Types.IntType.instance()"
+
+
+def test_precompiledmutations_path():
+    path = PrecompiledMutations.path()
+    assert path.endswith("BuiltinMutations.py")
+
+
+def test_precompiledmutations_load(module):
+    """
+    Ensures the precompiled mutations equal the parsed builtins
+    """
+    mutations = PrecompiledMutations.load(builtins)
+    expected = [summary(mutation_builder(b)) for b in builtins]
+    assert [summary(m) for m in mutations] == expected
+    assert mutations[0].type() is IntType.instance()
+
+
+def test_precompiledmutations_load_stale(module):
+    assert PrecompiledMutations.load(builtins[1:]) is None
+
+
+def test_precompiledmutations_load_missing(patch):
+    patch.object(PrecompiledMutations, "module", "storyscript.missing")
+    assert PrecompiledMutations.load(builtins) is None
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
-from storyscript.compiler.semantics.symbols.Scope import Scope
-from storyscript.compiler.semantics.symbols.Symbols import Symbols
+from storyscript.compiler.semantics.symbols.Scope import Scope, ScopeJoiner
+from storyscript.compiler.semantics.symbols.SymbolTable import SymbolTable
+from storyscript.compiler.semantics.symbols.Symbols import Symbol, Symbols
+from storyscript.compiler.semantics.types.Types import IntType, StringType
 
 
 def test_scope_pretty_none(patch):
@@ -48,20 +50,66 @@ def test_scope_str_with_symbols(patch, magic):
     assert str(scope) == "Scope(s1,s2)"
 
 
-def test_scope_resolve_fail(patch, magic):
-    patch.object(Symbols, "resolve", return_value=False)
-    patch.object(Scope, "scopes", return_value=[Scope(), Scope()])
-    scope = Scope()
+def test_scope_table(patch):
+    patch.init(SymbolTable)
+    parent = Scope()
+    scope = Scope(parent=parent)
+    assert scope.table() == scope.table()
+    SymbolTable.__init__.assert_called_with(
+        scope._symbols, parent=parent.table()
+    )
+
+
+def test_scope_resolve_fail():
+    scope = Scope(parent=Scope())
     assert scope.resolve(".p.") is None
-    Symbols.resolve.call_count == 2
 
 
-def test_scope_resolve_sucess(patch, magic):
-    patch.object(Symbols, "resolve", return_value=True)
-    patch.object(Scope, "scopes", return_value=[Scope(), Scope()])
+def test_scope_resolve_sucess(patch):
+    patch.object(SymbolTable, "resolve")
     scope = Scope()
-    assert scope.resolve(".p.") == Symbols.resolve()
-    Symbols.resolve.call_count == 1
+    result = scope.resolve(".p.")
+    SymbolTable.resolve.assert_called_with(".p.")
+    assert result == SymbolTable.resolve()
+
+
+def test_scope_resolve_parent():
+    """
+    Ensures symbols of parent scopes are resolved, including symbols
+    inserted after the child scope resolved a symbol
+    """
+    a = Symbol("a", IntType.instance())
+    b = Symbol("b", IntType.instance())
+    parent = Scope()
+    parent.insert(a)
+    scope = Scope(parent=Scope(parent=parent))
+    assert scope.resolve("a") == a
+    assert scope.resolve("b") is None
+    parent.insert(b)
+    assert scope.resolve("b") == b
+
+
+def test_scope_resolve_shadowed():
+    a = Symbol("a", IntType.instance())
+    b = Symbol("a", StringType.instance())
+    parent = Scope()
+    parent.insert(a)
+    scope = Scope(parent=parent)
+    scope.insert(b)
+    assert scope.resolve("a") == b
+    assert parent.resolve("a") == a
+
+
+def test_scope_copy():
+    a = Symbol("a", IntType.instance())
+    parent = Scope()
+    scope = Scope(parent=parent)
+    scope.insert(a)
+    copy = scope.copy()
+    copy.insert(Symbol("b", IntType.instance()))
+    assert copy.parent() == parent
+    assert copy.resolve("a") == a
+    assert scope.resolve("b") is None
 
 
 def test_scope_scopes_single():
@@ -80,3 +128,42 @@ def test_scope_scopes_multiple():
     assert r[0] is s3
     assert r[1] is s2
     assert r[2] is s1
+
+
+def test_scopejoiner_add(magic):
+    a = Symbol("a", IntType.instance())
+    b = Symbol("b", IntType.instance())
+    scope1 = Scope()
+    scope1.insert(a)
+    scope1.insert(b)
+    scope2 = Scope()
+    scope2.insert(Symbol("a", IntType.instance()))
+    joiner = ScopeJoiner()
+    joiner.add(scope1)
+    joiner.add(scope2)
+    assert joiner.symbols == {"a": a}
+    assert scope1.resolve("b") == b
+    scope = Scope()
+    joiner.insert_to(magic(), scope)
+    assert scope.resolve("a") == a
+    assert scope.resolve("b") is None
+
+
+def test_scopejoiner_add_incompatible(magic):
+    scope1 = Scope()
+    scope1.insert(Symbol("a", IntType.instance()))
+    scope2 = Scope()
+    scope2.insert(Symbol("a", StringType.instance()))
+    joiner = ScopeJoiner()
+    joiner.add(scope1)
+    joiner.add(scope2)
+    tree = magic()
+    joiner.insert_to(tree, Scope())
+    tree.expect.assert_called_with(
+        False,
+        "scope_join_incompatible",
+        t1name="a",
+        t1type=IntType.instance(),
+        t2name="a",
+        t2type=StringType.instance(),
+    )
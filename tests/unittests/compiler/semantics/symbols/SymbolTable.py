@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import gc
+
+from pytest import raises
+
+from storyscript.compiler.semantics.symbols.SymbolTable import SymbolTable
+from storyscript.compiler.semantics.symbols.Symbols import Symbol, Symbols
+from storyscript.compiler.semantics.types.Types import IntType
+
+
+def table(*names, parent=None):
+    symbols = Symbols()
+    for name in names:
+        symbols.insert(Symbol(name, IntType.instance()))
+    return SymbolTable(symbols, parent=parent)
+
+
+def test_symboltable_init():
+    symbols = Symbols()
+    table = SymbolTable(symbols, parent="parent")
+    assert table._symbols == symbols
+    assert table._parent == "parent"
+    assert table._view is None
+    assert len(table._children) == 0
+
+
+def test_symboltable_view():
+    root = table("a", "b")
+    child = table("b", "c", parent=root)
+    view = child.view()
+    assert list(view.keys()) == ["a", "b", "c"]
+    assert view["a"] == root._symbols.resolve("a")
+    assert view["b"] == child._symbols.resolve("b")
+    assert child.view() is view
+    assert list(root._children) == [child]
+
+
+def test_symboltable_resolve():
+    root = table("a")
+    assert root.resolve("a") == root._symbols.resolve("a")
+    assert root.resolve("b") is None
+
+
+def test_symboltable_resolve_empty():
+    with raises(AssertionError):
+        table().resolve("")
+
+
+def test_symboltable_insert():
+    root = table()
+    root.view()
+    symbol = Symbol("a", IntType.instance())
+    root.insert(symbol)
+    assert root._symbols.resolve("a") == symbol
+    assert root.resolve("a") == symbol
+
+
+def test_symboltable_insert_invalidates():
+    """
+    Ensures symbols inserted into a table are seen by chained tables
+    """
+    root = table()
+    child = table(parent=root)
+    grandchild = table(parent=child)
+    assert grandchild.resolve("a") is None
+    symbol = Symbol("a", IntType.instance())
+    root.insert(symbol)
+    assert child._view is None
+    assert grandchild._view is None
+    assert len(root._children) == 0
+    assert len(child._children) == 0
+    assert grandchild.resolve("a") == symbol
+
+
+def test_symboltable_children_freed():
+    """
+    Ensures that a table doesn't keep the tables chained to it alive
+    """
+    root = table()
+    for _ in range(3):
+        table(parent=root).view()
+    gc.collect()
+    assert len(root._children) == 0
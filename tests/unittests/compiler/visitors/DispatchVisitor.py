@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from pytest import raises
+
+from storyscript.compiler.visitors.DispatchVisitor import (
+    DispatchTable,
+    DispatchVisitor,
+)
+
+
+class Visitor(DispatchVisitor):
+    label = "label"
+
+    def assignment(self, tree):
+        return tree
+
+    def _private(self, tree):
+        return tree
+
+
+class RulesVisitor(Visitor):
+    dispatch_rules = ["assignment", "if_block"]
+
+
+def test_dispatchvisitor_handlers():
+    visitor = Visitor()
+    assert visitor.handlers["assignment"] == visitor.assignment
+    assert "label" not in visitor.handlers
+    assert "_private" not in visitor.handlers
+    assert visitor.handlers is visitor.handlers
+
+
+def test_dispatchvisitor_handlers_class():
+    assert isinstance(Visitor.handlers, DispatchTable)
+
+
+def test_dispatchvisitor_handlers_visitors():
+    """
+    Ensures every visitor has its own handlers
+    """
+    visitor = Visitor()
+    assert visitor.handlers != Visitor().handlers
+
+
+def test_dispatchvisitor_handlers_rules():
+    visitor = RulesVisitor()
+    assert set(visitor.handlers) == {"assignment", "if_block"}
+    assert visitor.handlers["assignment"](1) == 1
+
+
+def test_dispatchvisitor_handlers_missing():
+    """
+    Ensures declared rules without a handler fail when they are dispatched
+    """
+    with raises(AttributeError):
+        RulesVisitor().handlers["if_block"](1)
+
+
+def test_dispatchtable_rules_of():
+    table = DispatchVisitor.handlers
+    assert "assignment" in table.rules_of(Visitor)
+    assert table.rules_of(RulesVisitor) == {"assignment", "if_block"}
+    assert table.rules_of(Visitor) is table.rules_of(Visitor)
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
+from lark.lexer import Token
+
 from pytest import raises
 
+from storyscript.WorkStack import WorkStack
 from storyscript.compiler.visitors.ExpressionVisitor import ExpressionVisitor
+from storyscript.parser import Tree
 
 
 def test_objects_expression_one(patch, tree):
@@ -16,6 +20,22 @@ def test_objects_expression_one(patch, tree):
     assert r == ExpressionVisitor.entity()
 
 
+def run_task(task, values):
+    """
+    Runs an expression task, answering its subtasks with the given values.
+    Returns the result and the number of subtasks.
+    """
+    subtasks = 0
+    value = None
+    try:
+        while True:
+            task.send(value)
+            value = values[subtasks]
+            subtasks += 1
+    except StopIteration as stop:
+        return stop.value, subtasks
+
+
 def test_objects_expression_two(patch, tree):
     """
     Ensures ExpressionVisitor.expression works with two nodes
@@ -23,13 +43,11 @@ def test_objects_expression_two(patch, tree):
     patch.many(ExpressionVisitor, ["nary_expression"])
     tree.first_child().data = "unary_operator"
     tree.children = ["!", 1]
-    expression = ExpressionVisitor().expression
-    patch.object(ExpressionVisitor, "expression")
-    r = expression(tree)
+    task = ExpressionVisitor().expression_task(tree)
+    r, subtasks = run_task(task, ["value"])
+    assert subtasks == 1
     ExpressionVisitor.nary_expression.assert_called_with(
-        tree,
-        tree.first_child().child(0),
-        [ExpressionVisitor.expression(tree.child(1))],
+        tree, tree.first_child().child(0), ["value"]
     )
     assert r == ExpressionVisitor.nary_expression()
 
@@ -41,12 +59,10 @@ def test_objects_expression_two_as(patch, tree):
     patch.many(ExpressionVisitor, ["to_expression"])
     tree.child(1).data = "to_operator"
     tree.children = ["!", 1]
-    expression = ExpressionVisitor().expression
-    patch.object(ExpressionVisitor, "expression")
-    r = expression(tree)
-    ExpressionVisitor.to_expression.assert_called_with(
-        tree, ExpressionVisitor.expression(tree.first_child()),
-    )
+    task = ExpressionVisitor().expression_task(tree)
+    r, subtasks = run_task(task, ["value"])
+    assert subtasks == 1
+    ExpressionVisitor.to_expression.assert_called_with(tree, "value")
     assert r == ExpressionVisitor.to_expression()
 
 
@@ -57,20 +73,46 @@ def test_objects_expression_three(patch, tree):
     patch.many(ExpressionVisitor, ["nary_expression"])
     tree.child(1).data = "mul_operator"
     tree.children = [1, "*", 2]
-    expression = ExpressionVisitor().expression
-    patch.object(ExpressionVisitor, "expression")
-    r = expression(tree)
+    task = ExpressionVisitor().expression_task(tree)
+    r, subtasks = run_task(task, ["first", "second"])
+    assert subtasks == 2
     ExpressionVisitor.nary_expression.assert_called_with(
-        tree,
-        tree.child(1).child(0),
-        [
-            ExpressionVisitor.expression(tree.first_child()),
-            ExpressionVisitor.expression(tree.child(2)),
-        ],
+        tree, tree.child(1).child(0), ["first", "second"]
     )
     assert r == ExpressionVisitor.nary_expression()
 
 
+def test_objects_expression_deep(patch):
+    """
+    Ensures ExpressionVisitor.expression doesn't recurse for deep expressions
+    """
+    patch.object(ExpressionVisitor, "entity", return_value=1)
+    patch.object(
+        ExpressionVisitor,
+        "nary_expression",
+        side_effect=lambda tree, op, values: sum(values),
+    )
+    entity = Tree("expression", [Tree("entity", [])])
+    operator = Tree("arith_operator", [Token("PLUS", "+")])
+    tree = entity
+    for i in range(5000):
+        tree = Tree("expression", [tree, operator, entity])
+    assert ExpressionVisitor().expression(tree) == 5001
+
+
+def test_objects_expression_work_stack(patch, tree):
+    """
+    Ensures ExpressionVisitor.expression runs its task on a work stack
+    """
+    patch.object(WorkStack, "run")
+    patch.object(ExpressionVisitor, "expression_task")
+    visitor = ExpressionVisitor()
+    result = visitor.expression(tree)
+    ExpressionVisitor.expression_task.assert_called_with(tree)
+    WorkStack.run.assert_called_with(ExpressionVisitor.expression_task())
+    assert result == WorkStack.run()
+
+
 def test_objects_nary_expression(patch, tree):
     """
     Ensures that the ExpressionVisitor by default throws AssertionErrors
@@ -1,6 +1,11 @@
 # -*- coding: utf-8 -*-
+import pickle
+
+from lark.lexer import Token
+
 from pytest import raises
 
+from storyscript.exceptions.Deprecation import Deprecation
 from storyscript.exceptions.Diagnostics import ConstDict
 
 
@@ -13,3 +18,17 @@ def test_const_dict():
     assert d.f2 == "b2"
     with raises(Exception):
         d.bar
+
+
+def test_diagnostics_pickle():
+    """
+    Ensures that diagnostics can be sent to other processes
+    """
+    token = Token("NAME", "foo", line=1, column=2)
+    token.end_column = 5
+    deprecation = Deprecation("dep", token=token, format_args={"a": "b"})
+    result = pickle.loads(pickle.dumps(deprecation))
+    assert isinstance(result, Deprecation)
+    assert result.deprecation == "dep"
+    assert (result.line, result.column, result.end_column) == (1, 2, 5)
+    assert result.format_args.a == "b"
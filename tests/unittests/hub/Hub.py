@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import storyscript.hub.Hub as HubModule
+from storyscript.hub.Hub import service_fingerprint, story_hub
+
+
+class Hub:
+    def __init__(self, services):
+        self.services = services
+
+    def get(self, name):
+        return self.services.get(name)
+
+
+def test_hub_service_fingerprint():
+    hub = Hub({"http": {"actions": ["get"]}})
+    fingerprint = service_fingerprint(hub, "http")
+    assert fingerprint == service_fingerprint(hub, "http")
+    hub.services["http"]["actions"].append("post")
+    assert fingerprint != service_fingerprint(hub, "http")
+
+
+def test_hub_service_fingerprint_unknown_service():
+    hub = Hub({})
+    assert service_fingerprint(hub, "http") is not None
+
+
+def test_hub_service_fingerprint_unpicklable(magic):
+    hub = Hub({"http": lambda: None})
+    assert service_fingerprint(hub, "http") is None
+
+
+def test_hub_story_hub(patch):
+    patch.object(HubModule, "StoryscriptHub")
+    story_hub.cache_clear()
+    assert story_hub() == HubModule.StoryscriptHub()
+    story_hub.cache_clear()
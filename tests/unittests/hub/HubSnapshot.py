@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+import json
+
+from pytest import fixture, mark, raises
+
+from storyhub.sdk.ServiceWrapper import ServiceWrapper
+from storyhub.sdk.service.ServiceData import ServiceData
+
+from storyscript.hub.HubSnapshot import HubSnapshot, HubSnapshotError
+
+
+http = {
+    "service": {
+        "name": "http",
+        "alias": "http",
+        "owner": {"username": "storyscript"},
+    },
+    "configuration": {"actions": {}},
+}
+aws = {
+    "service": {"name": "aws-s3", "alias": None, "owner": {"username": "a"}},
+    "configuration": {"actions": {}},
+}
+
+
+@fixture
+def snapshot(tmpdir):
+    path = tmpdir.join("hub.snapshot")
+    path.write_binary(HubSnapshot.dumps([http, aws]))
+    return HubSnapshot(str(path))
+
+
+def test_hubsnapshot_init(snapshot):
+    assert snapshot.index["http"] == snapshot.index["storyscript/http"]
+    assert snapshot.services == {}
+
+
+@mark.parametrize(
+    "header, message",
+    [
+        ("[1, 2]", "is not a hub snapshot."),
+        ("not json", "is not a hub snapshot."),
+        ('{"services": {}}', "is not a hub snapshot."),
+        ('{"version": 0}', "is a hub snapshot of version 0"),
+        ('{"version": 1}', "has no index of services."),
+        ('{"version": 1, "services": []}', "has no index of services."),
+    ],
+)
+def test_hubsnapshot_init_invalid(tmpdir, header, message):
+    path = tmpdir.join("hub.snapshot")
+    path.write(f"{header}\n")
+    with raises(HubSnapshotError) as e:
+        HubSnapshot(str(path))
+    assert str(e.value).startswith(f"{path} {message}")
+
+
+def test_hubsnapshot_catalog(tmpdir):
+    path = tmpdir.join("dump.json")
+    path.write(json.dumps([http]))
+    assert HubSnapshot.catalog(str(path)) == [http]
+
+
+@mark.parametrize("content", ["{}", "not json"])
+def test_hubsnapshot_catalog_invalid(tmpdir, content):
+    path = tmpdir.join("dump.json")
+    path.write(content)
+    with raises(HubSnapshotError, match="is not a hub dump."):
+        HubSnapshot.catalog(str(path))
+
+
+def test_hubsnapshot_keys():
+    assert HubSnapshot.keys(http) == ["http", "storyscript/http"]
+    assert HubSnapshot.keys(aws) == ["a/aws-s3"]
+    assert HubSnapshot.keys({"service": {"name": "x", "alias": "x"}}) == ["x"]
+
+
+def test_hubsnapshot_select():
+    entries = [http, aws, http]
+    assert HubSnapshot.select(entries, ["http"]) == [http]
+    assert HubSnapshot.select(entries, ["a/aws-s3", "log"]) == [aws]
+
+
+def test_hubsnapshot_fetch(patch):
+    def as_json_file(path):
+        with open(path, "w") as f:
+            json.dump([http], f)
+
+    patch.init(ServiceWrapper)
+    patch.object(ServiceWrapper, "as_json_file", side_effect=as_json_file)
+    assert HubSnapshot.fetch({"log", "http"}) == [http]
+    ServiceWrapper.__init__.assert_called_with(["http", "log"])
+
+
+def test_hubsnapshot_dumps():
+    result = HubSnapshot.dumps([http])
+    header, payload = result.split(b"\n", 1)
+    location = {"offset": 0, "length": len(payload)}
+    assert json.loads(header) == {
+        "version": 1,
+        "services": {"http": location, "storyscript/http": location},
+    }
+    assert json.loads(payload) == http
+
+
+def test_hubsnapshot_names(snapshot):
+    assert snapshot.names() == ["a/aws-s3", "http", "storyscript/http"]
+
+
+def test_hubsnapshot_entry(snapshot):
+    assert snapshot.entry("http") == http
+    assert snapshot.entry("a/aws-s3") == aws
+    assert snapshot.entry("log") is None
+
+
+def test_hubsnapshot_load(patch):
+    patch.object(ServiceData, "from_dict")
+    result = HubSnapshot.load(http)
+    ServiceData.from_dict.assert_called_with(data={"service_data": http})
+    assert result == ServiceData.from_dict()
+
+
+def test_hubsnapshot_get(patch, snapshot):
+    patch.object(HubSnapshot, "load")
+    result = snapshot.get("http")
+    assert snapshot.get("http") == result
+    HubSnapshot.load.assert_called_once_with(http)
+    assert result == HubSnapshot.load.return_value
+
+
+def test_hubsnapshot_get_unknown(patch, snapshot):
+    patch.object(HubSnapshot, "load")
+    assert snapshot.get("log") is None
+    HubSnapshot.load.assert_not_called()
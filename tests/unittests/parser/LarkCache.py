@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+import os
+
+from lark import Lark
+
+from pytest import fixture
+
+from storyscript.parser import CustomIndenter, Grammar, LarkCache
+
+
+@fixture
+def cache(tmpdir):
+    return LarkCache(directory=str(tmpdir))
+
+
+@fixture
+def lark():
+    return Lark(Grammar().build(), parser="lalr", postlex=CustomIndenter())
+
+
+def test_larkcache_init(patch):
+    patch.object(LarkCache, "default_directory")
+    assert LarkCache().directory == LarkCache.default_directory()
+
+
+def test_larkcache_default_directory(patch):
+    patch.dict(os.environ, {"STORYSCRIPT_CACHE_DIR": "/cache"})
+    assert LarkCache.default_directory() == "/cache"
+
+
+def test_larkcache_default_directory_xdg(patch):
+    patch.dict(os.environ, {"XDG_CACHE_HOME": "/xdg"})
+    patch.dict(os.environ, {"STORYSCRIPT_CACHE_DIR": ""})
+    assert LarkCache.default_directory() == os.path.join("/xdg", "storyscript")
+
+
+def test_larkcache_key():
+    key = LarkCache.key("grammar", "lalr", ["start"])
+    assert key == LarkCache.key("grammar", "lalr", ["start"])
+    assert key != LarkCache.key("grammar2", "lalr", ["start"])
+    assert key != LarkCache.key("grammar", "earley", ["start"])
+    assert key != LarkCache.key("grammar", "lalr", ["start", "other"])
+
+
+def test_larkcache_path(cache):
+    expected = os.path.join(cache.directory, "lark-key.pickle")
+    assert cache.path("key") == expected
+
+
+def test_larkcache_load_missing(cache):
+    assert cache.load("key", postlex=CustomIndenter()) is None
+
+
+def test_larkcache_load_corrupt(cache):
+    with open(cache.path("key"), "wb") as f:
+        f.write(b"corrupt")
+    assert cache.load("key", postlex=CustomIndenter()) is None
+
+
+def test_larkcache_save_load(cache, lark):
+    """
+    Ensures a cached parser parses and lexes like the original one.
+    """
+    source = "a = 1\nif a\n    b = [1, 2]\n"
+    cache.save("key", lark)
+    result = cache.load("key", postlex=CustomIndenter())
+    assert result.parse(source) == lark.parse(source)
+    tokens = [(t.type, t.value) for t in result.lex(source)]
+    assert tokens == [(t.type, t.value) for t in lark.lex(source)]
+
+
+def test_larkcache_save_readonly(patch, cache, lark):
+    patch.object(os, "makedirs", side_effect=PermissionError())
+    cache.save("key", lark)
+    assert cache.load("key", postlex=CustomIndenter()) is None
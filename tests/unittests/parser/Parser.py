@@ -2,12 +2,15 @@
 import io
 
 from lark import Lark
+from lark.lexer import Token
+from lark.tree import Tree as LarkTree
 
 from pytest import fixture
 
 from storyscript.parser import (
     CustomIndenter,
     Grammar,
+    LarkCache,
     Parser,
     Transformer,
     Tree,
@@ -20,7 +23,9 @@ def parser(magic, patch):
     parser = Parser()
     parser.algo = "lalr"
     parser.ebnf = None
+    parser.cache = False
     parser.lark = magic()
+    parser.expressions = {}
     return parser
 
 
@@ -29,6 +34,7 @@ def test_parser_init(patch):
     parser = Parser()
     assert parser.algo == "lalr"
     assert parser.ebnf is None
+    assert parser.cache is True
 
 
 def test_parser_init_algo(patch):
@@ -75,24 +81,169 @@ def test_parser_lark(patch, parser):
     Ensures Parser.lark can produce the correct Lark instance.
     """
     patch.init(Lark)
-    patch.many(Parser, ["indenter", "grammar"])
+    patch.many(Parser, ["indenter", "grammar", "start_rules"])
     result = parser._lark()
-    kwargs = {"parser": parser.algo, "postlex": Parser.indenter()}
+    kwargs = {
+        "parser": parser.algo,
+        "start": Parser.start_rules(),
+        "postlex": Parser.indenter(),
+    }
     Lark.__init__.assert_called_with(parser.grammar(), **kwargs)
     assert isinstance(result, Lark)
 
 
+def test_parser_lark_cached(patch, parser):
+    """
+    Ensures Parser.lark loads the Lark instance from the cache.
+    """
+    patch.init(LarkCache)
+    patch.many(LarkCache, ["key", "load", "save"])
+    patch.many(Parser, ["indenter", "grammar", "start_rules"])
+    parser.cache = True
+    result = parser._lark()
+    LarkCache.key.assert_called_with(
+        parser.grammar(), "lalr", Parser.start_rules()
+    )
+    LarkCache.load.assert_called_with(
+        LarkCache.key(), postlex=Parser.indenter()
+    )
+    LarkCache.save.assert_not_called()
+    assert result == LarkCache.load()
+
+
+def test_parser_lark_cache_miss(patch, parser):
+    """
+    Ensures Parser.lark builds and caches the Lark instance on a cache miss.
+    """
+    patch.init(Lark)
+    patch.init(LarkCache)
+    patch.many(LarkCache, ["key", "save"])
+    patch.object(LarkCache, "load", return_value=None)
+    patch.many(Parser, ["indenter", "grammar", "start_rules"])
+    parser.cache = True
+    result = parser._lark()
+    kwargs = {
+        "parser": "lalr",
+        "start": Parser.start_rules(),
+        "postlex": Parser.indenter(),
+    }
+    Lark.__init__.assert_called_with(parser.grammar(), **kwargs)
+    LarkCache.save.assert_called_with(LarkCache.key(), result)
+    assert isinstance(result, Lark)
+
+
+def test_parser_lark_cache_earley(patch, parser):
+    """
+    Ensures Parser.lark doesn't use the cache for non-LALR parsers.
+    """
+    patch.init(Lark)
+    patch.object(LarkCache, "load")
+    patch.many(Parser, ["indenter", "grammar", "start_rules"])
+    parser.cache = True
+    parser.algo = "earley"
+    parser._lark()
+    LarkCache.load.assert_not_called()
+
+
+def test_parser_start_rules():
+    grammar = "start: _NL? block*\nexpression_start: expression| service"
+    assert Parser.start_rules(grammar) == ["start", "expression_start"]
+
+
+def test_parser_start_rules_custom():
+    """
+    Ensures grammars without an expression entry point can be used
+    """
+    grammar = "start: block*\nexpression: NAME"
+    assert Parser.start_rules(grammar) == ["start"]
+
+
+def test_parser_parses_expressions(parser):
+    assert parser.parses_expressions() is True
+    parser.starts = ["start"]
+    assert parser.parses_expressions() is False
+
+
 def test_parser_parse(patch, parser):
     """
     Ensures the build method can build the grammar
     """
     patch.many(Parser, ["transformer"])
     result = parser.parse("source", allow_single_quotes=False)
-    parser.lark.parse.assert_called_with("source\n")
+    parser.lark.parse.assert_called_with("source\n", start="start")
     Parser.transformer().transform.assert_called_with(parser.lark.parse())
     assert result == Parser.transformer().transform()
 
 
+def test_parser_move():
+    """
+    Ensures Parser.move copies a tree with its tokens moved
+    """
+    token = Token("NAME", "a", 0, 1, 1, 1, 2)
+    newline = Token("NAME", "b", 3, 2, 1, 2, 2)
+    tree = LarkTree("expression", [LarkTree("path", [token]), newline])
+    result = Parser.move(tree, 5, 10)
+    moved = result.children[0].children[0]
+    assert (moved.line, moved.column, moved.end_column) == (5, 11, 12)
+    assert moved.pos_in_stream == 10
+    assert result.children[1].line == 6
+    assert result.children[1].column == 1
+    assert token.line == 1
+    assert result.data == "expression"
+
+
+def test_parser_move_deep():
+    """
+    Ensures Parser.move can copy a tree nested deeper than the recursion
+    limit
+    """
+    token = Token("NAME", "a", 0, 1, 1, 1, 2)
+    tree = LarkTree("path", [token])
+    for _ in range(5000):
+        tree = LarkTree("expression", [tree])
+    result = Parser.move(tree, 5, 10)
+    for _ in range(5000):
+        assert result.data == "expression"
+        result = result.children[0]
+    assert result.children[0].line == 5
+    assert result.children[0].column == 11
+
+
+def test_parser_parse_expression(patch, parser):
+    """
+    Ensures Parser.parse_expression parses and moves a single expression
+    """
+    patch.many(Parser, ["transformer", "move"])
+    result = parser.parse_expression("a", line=2, column_offset=3)
+    parser.lark.parse.assert_called_with("a", start="expression_start")
+    Parser.move.assert_called_with(parser.lark.parse(), 2, 3)
+    Parser.transformer.assert_called_with(False)
+    Parser.transformer().transform.assert_called_with(Parser.move())
+    assert result == Parser.transformer().transform().children[0]
+
+
+def test_parser_parse_expression_memo(patch, parser):
+    """
+    Ensures Parser.parse_expression reuses the trees of repeated snippets
+    """
+    patch.many(Parser, ["transformer", "move"])
+    parser.expressions["a"] = "tree"
+    parser.parse_expression("a")
+    parser.lark.parse.assert_not_called()
+    Parser.move.assert_called_with("tree", 1, 0)
+
+
+def test_parser_parse_expression_bounded(patch, parser):
+    """
+    Ensures Parser.parse_expression bounds the number of memoized trees
+    """
+    patch.many(Parser, ["transformer", "move"])
+    parser.max_expressions = 1
+    parser.expressions["a"] = "tree"
+    parser.parse_expression("b")
+    assert parser.expressions == {"b": parser.lark.parse()}
+
+
 def test_parser_parse_empty(patch, parser, magic):
     """
     Ensures that empty stories are parsed correctly
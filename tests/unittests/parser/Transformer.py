@@ -177,7 +177,7 @@ def test_transformer_service_block_indented_args(tree, magic, patch):
     block = magic()
     matches = [block, tree]
     result = Transformer.service_block(matches)
-    block.service_fragment.children.append.assert_called_with("argument")
+    block.service_fragment.append.assert_called_with("argument")
     assert result == Tree("service_block", [block])
 
 
@@ -282,7 +282,7 @@ def test_transformer_function_block(patch, tree, magic):
     m.find_data.return_value = [".indented.node."]
     r = Transformer.function_block([function_block, m, block])
     m.find_data.assert_called_with("typed_argument")
-    function_block.children.append.assert_called_with(".indented.node.")
+    function_block.append.assert_called_with(".indented.node.")
     assert r.data == "function_block"
     assert r.children == [function_block, Tree("nested_block", [block])]
 
@@ -8,6 +8,7 @@ from pytest import fixture, raises
 
 from storyscript.exceptions.CompilerError import CompilerError
 from storyscript.parser import Tree
+from storyscript.parser.Tree import Children
 
 
 @fixture
@@ -41,6 +42,102 @@ def test_tree_walk_token():
     assert result == inner_tree
 
 
+def test_tree_child_index():
+    first = Tree("inner", [])
+    tree = Tree("rule", [Token("test", "test"), first, Tree("inner", [])])
+    assert tree.child_index() == {"inner": first}
+    assert tree.child_index() is tree.child_index()
+
+
+def test_tree_child_index_rename():
+    """
+    Ensures that renaming a child invalidates the index of its parent
+    """
+    inner = Tree("inner", [])
+    tree = Tree("rule", [inner])
+    assert tree.inner == inner
+    inner.rename("other")
+    assert tree.inner is None
+    assert tree.other == inner
+
+
+def test_tree_child_index_replace():
+    tree = Tree("rule", [Tree("inner", [])])
+    assert tree.other is None
+    tree.replace(0, Tree("other", []))
+    assert tree.other == Tree("other", [])
+
+
+def test_tree_child_index_insert():
+    inner = Tree("inner", [])
+    tree = Tree("rule", [inner])
+    assert tree.inner is inner
+    tree.insert(Tree("inner", ["first"]))
+    assert tree.inner == Tree("inner", ["first"])
+
+
+def test_tree_child_index_children():
+    """
+    Ensures that the index follows changes of the children list
+    """
+    tree = Tree("rule", [])
+    assert tree.inner is None
+    tree.children.append(Tree("inner", []))
+    assert tree.inner == Tree("inner", [])
+    tree.children = [Tree("other", [])]
+    assert tree.inner is None
+    assert tree.other == Tree("other", [])
+
+
+def test_tree_children():
+    tree = Tree("rule", [Token("test", "test")])
+    assert isinstance(tree.children, Children)
+    tree.children = [Token("other", "other")]
+    assert isinstance(tree.children, Children)
+
+
+def test_tree_children_generation():
+    """
+    Ensures that building a tree keeps the caches, but modifying the
+    children of an existing tree invalidates them
+    """
+    generation = Tree._generation
+    tree = Tree("rule", [])
+    assert Tree._generation == generation
+    tree.children.append(Token("test", "test"))
+    assert Tree._generation == generation + 1
+    tree.children.sort(key=str)
+    assert Tree._generation == generation + 2
+    tree.children = []
+    assert Tree._generation == generation + 3
+
+
+def test_tree_children_setitem():
+    """
+    Ensures that replacing a child in place invalidates the index and the
+    positions of its tree
+    """
+    tree = Tree("rule", [Tree("inner", [Token("a", "a", line=1)])])
+    assert tree.child(0).data == "inner"
+    assert tree.inner is not None
+    assert tree.line() == "1"
+    tree.children[0] = Tree("other", [Token("b", "b", line=2)])
+    assert tree.child(0).data == "other"
+    assert tree.inner is None
+    assert tree.other is not None
+    assert tree.line() == "2"
+    assert tree.position().line == "2"
+
+
+def test_tree_children_insert():
+    tree = Tree("rule", [Tree("inner", [Token("a", "a", line=2)])])
+    assert tree.line() == "2"
+    tree.children.insert(0, Token("b", "b", line=1))
+    assert tree.line() == "1"
+    del tree.children[0]
+    assert tree.line() == "2"
+
+
 def test_tree_node(patch):
     patch.object(Tree, "walk")
     tree = Tree("rule", [])
@@ -115,6 +212,17 @@ def test_tree_column():
     assert tree.column() == "1"
 
 
+def test_tree_line_deep():
+    """
+    Ensures the position of a tree nested deeper than the recursion limit
+    can be found
+    """
+    tree = Tree("path", [Token("WORD", "word", line=1)])
+    for _ in range(5000):
+        tree = Tree("outer", [tree])
+    assert tree.line() == "1"
+
+
 def test_tree_end_column():
     """
     Ensures Tree.end_column can find the end column of a tree.
@@ -131,6 +239,39 @@ def test_tree_insert():
     assert tree.children == ["child"]
 
 
+def test_tree_append():
+    tree = Tree("tree", ["first"])
+    tree.append("child")
+    assert tree.children == ["first", "child"]
+
+
+def test_tree_remove():
+    tree = Tree("tree", ["first", "child"])
+    tree.remove("first")
+    assert tree.children == ["child"]
+
+
+def test_tree_set_children():
+    tree = Tree("tree", ["first"])
+    tree.set_children(["child"])
+    assert tree.children == ["child"]
+
+
+def test_tree_set_position():
+    tree = Tree("tree", [])
+    tree.set_position(1, 2, 3)
+    assert tree.line() == "1"
+    assert tree.column() == "2"
+    assert tree.end_column() == "3"
+
+
+def test_tree_set_position_line():
+    tree = Tree("tree", [])
+    tree.set_position(1)
+    assert tree.line() == "1"
+    assert tree.column() is None
+
+
 def test_tree_rename():
     """
     Ensures Tree.rename can rename the current tree
@@ -227,6 +368,19 @@ def test_tree_find_first_token_none():
     assert tree.find_first_token() is None
 
 
+def test_tree_find_first_token_deep():
+    """
+    Ensures Tree.find_first_token can search a tree nested deeper than the
+    recursion limit
+    """
+    token = Token("WORD", "word")
+    tree = Tree("path", [token])
+    for _ in range(5000):
+        tree = Tree("outer", [Tree("empty", []), tree])
+    assert tree.find_first_token() == token
+    assert tree.find_first_token(reverse=True) == token
+
+
 def test_tree_find_position_none():
     """
     Ensures Tree.find_first_token can find the correct Token
@@ -236,6 +390,40 @@ def test_tree_find_position_none():
     assert tree._find_position("line") is None
 
 
+def test_tree_find_position_token_update():
+    """
+    Ensures that changes of the tokens are visible in cached positions
+    """
+    token = Token("WORD", "word", line=1)
+    tree = Tree("outer", [Tree("path", [token])])
+    assert tree.line() == "1"
+    token.line = 2
+    assert tree.line() == "2"
+
+
+def test_tree_find_position_children_update():
+    """
+    Ensures that modifying the children invalidates cached positions
+    """
+    inner = Tree("path", [])
+    tree = Tree("outer", [inner])
+    assert tree.line() is None
+    inner.append(Token("WORD", "word", line=1))
+    assert tree.line() == "1"
+    inner.set_children([Token("WORD", "word", line=2)])
+    assert tree.line() == "2"
+    tree.insert(Token("WORD", "word", line=3))
+    assert tree.line() == "3"
+
+
+def test_tree_find_position_set_position():
+    inner = Tree("path", [])
+    tree = Tree("outer", [inner])
+    assert tree.line() is None
+    inner.set_position(4)
+    assert tree.line() == "4"
+
+
 def test_tree_extract():
     target = Tree("target", [])
     tree = Tree(